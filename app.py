@@ -5,13 +5,14 @@ This is the main entry point for the Fort Wise Voice AI Assistant.
 It initializes the Flask web application and sets up the routes.
 """
 
+import io
 import os
-import time
-import uuid
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from typing import Dict
+from flask import Flask, Request, request, jsonify, render_template, send_from_directory, Response, stream_with_context, g, url_for
 from dotenv import load_dotenv
 import logging
 import shutil
+import threading
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,14 +20,26 @@ load_dotenv()
 # Import core modules
 from core.voice_processor import VoiceProcessor
 from utils.logging_utils import setup_logger
+from utils import web_utils
+from utils.web_utils import sse, sentence_sse, upload_filename
+from config import settings
 import manual_setup
 
 # Set up logging
 setup_logger()
 logger = logging.getLogger(__name__)
 
+class InMemoryRequest(Request):
+    """Request that keeps uploaded files in memory instead of spooling large ones to disk."""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 # Initialize the Flask application
 app = Flask(__name__, static_folder='static', template_folder='templates')
+app.request_class = InMemoryRequest
+# Uploads are held in memory, so bound their size
+app.config['MAX_CONTENT_LENGTH'] = settings.MAX_UPLOAD_BYTES
 
 # Run the manual setup if it's the first time
 if not os.path.exists(os.path.join('data', 'knowledge_base.txt')) or os.path.getsize(os.path.join('data', 'knowledge_base.txt')) == 0:
@@ -50,10 +63,26 @@ try:
     
     voice_processor = VoiceProcessor()
     logger.info("Voice processor initialized successfully")
+    
+    # Pre-render error and fallback audio so those paths skip TTS, without holding up startup
+    threading.Thread(target=manual_setup.setup_phrase_bank, args=(voice_processor.phrase_bank,),
+                     name="phrase-bank", daemon=True).start()
 except Exception as e:
     logger.error(f"Failed to initialize voice processor: {e}")
     raise
 
+@app.before_request
+def load_session_id():
+    """Identify the caller's session from the header or cookie, or start a new one."""
+    g.session_id, g.new_session = web_utils.resolve_session_id(request.headers, request.cookies)
+
+@app.after_request
+def save_session_id(response):
+    """Hand newly created session ids back to the client as a cookie."""
+    if g.get('new_session'):
+        web_utils.set_session_cookie(response, g.session_id)
+    return response
+
 @app.route('/')
 def index():
     """Render the main page."""
@@ -74,84 +103,191 @@ def process_audio():
         
         audio_file = request.files['audio']
         
-        # Generate a unique filename for the audio
-        filename = f"{str(uuid.uuid4())}.wav"
-        save_path = os.path.join('data', 'recordings', filename)
+        # Process the voice input straight from memory
+        text_input = voice_processor.speech_to_text(audio_file.read(), upload_filename(audio_file))
+        logger.info(f"Transcribed text: {text_input}")
+        
+        return jsonify(_answer(text_input, g.session_id))
         
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/process_audio_segment', methods=['POST'])
+def process_audio_segment():
+    """
+    Process a recording uploaded in segments while the user is still speaking.
+    
+    Expects a 'turn_id' form field identifying the recording, an 'audio' file
+    with the next chunk of it, and 'final=true' on the last request. Segments
+    must be sent in order. Retrieval runs on the partial transcript as segments
+    arrive; the last request is answered like /process_audio.
+    """
+    try:
+        turn_id = request.form.get('turn_id', '')
+        final = request.form.get('final', 'false').lower() == 'true'
+        audio_file = request.files.get('audio')
+        data = audio_file.read() if audio_file else b''
+        extension = os.path.splitext(upload_filename(audio_file))[1]
+            
+        if not final:
+            if not data:
+                return jsonify({'error': 'No audio segment provided'}), 400
+            segments = voice_processor.add_audio_segment(g.session_id, turn_id, data, extension)
+            return jsonify({'status': 'received', 'segments': segments})
+            
+        audio_path, turn = voice_processor.finish_turn(g.session_id, turn_id, data, extension)
         
-        # Save the file temporarily
-        audio_file.save(save_path)
+        try:
+            text_input = voice_processor.speech_to_text(audio_path)
+            logger.info(f"Transcribed text: {text_input}")
+        finally:
+            web_utils.remove_upload(audio_path)
+                
+        return jsonify(_answer(text_input, g.session_id, turn))
         
-        logger.info(f"Audio saved to {save_path}, processing...")
+    except ValueError as e:
+        logger.error(f"Invalid audio segment: {e}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error processing audio segment: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/process_audio_stream', methods=['POST'])
+def process_audio_stream():
+    """
+    Process audio from client and stream the response.
+    
+    Transcribes the audio, then streams Server-Sent Events: a 'transcript' event,
+    one 'sentence' event per response sentence with its audio URL as soon as that
+    sentence is synthesized, and a final 'done' event with the full response text.
+    """
+    # Check if audio file is in the request
+    if 'audio' not in request.files:
+        return jsonify({'error': 'No audio file provided'}), 400
+    
+    try:
+        audio_file = request.files['audio']
         
-        # Process the voice input
-        text_input = voice_processor.speech_to_text(save_path)
+        # Process the voice input straight from memory
+        text_input = voice_processor.speech_to_text(audio_file.read(), upload_filename(audio_file))
         logger.info(f"Transcribed text: {text_input}")
-        
-        # Check if we got any text
-        if not text_input or text_input.strip() == "":
-            text_response = "I couldn't understand your question. Please try again."
-            text_input = "[No speech detected]"
-        elif "what is my name" in text_input.lower() or "what's my name" in text_input.lower() or "who am i" in text_input.lower():
-            # Direct response for name-related queries
-            user_info = voice_processor.context_manager.get_user_info()
-            if user_info and "name" in user_info:
-                text_response = f"Your name is {user_info['name']}. How can I help you today?"
-                voice_processor.context_manager.add_exchange(text_input, text_response)
-            else:
-                # Get relevant context from knowledge base
-                context = voice_processor.retrieve_context(text_input)
-                # Generate response using LLM
-                text_response = voice_processor.generate_response(text_input, context)
-        else:
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+    
+    session_id = g.session_id
+    
+    def generate():
+        try:
+            yield sse('transcript', {'text_input': web_utils.display_transcript(text_input)})
+            
+            # Answer directly when there is no speech or the LLM isn't needed
+            text_response = voice_processor.quick_response(text_input, session_id)
+            
+            if text_response is not None:
+                yield sentence_sse(0, text_response, voice_processor.text_to_speech(text_response))
+                yield sse('done', {'text_response': text_response})
+                return
+            
             # Get relevant context from knowledge base
-            context = voice_processor.retrieve_context(text_input)
+            context = voice_processor.retrieve_context(text_input, session_id)
             
-            # Generate response using LLM
-            text_response = voice_processor.generate_response(text_input, context)
+            # Stream the response sentence by sentence
+            for event in voice_processor.stream_response(text_input, context, session_id):
+                if event['type'] == 'sentence':
+                    yield sentence_sse(event['index'], event['text'], event['audio_path'])
+                else:
+                    logger.info(f"Generated response: {event['text']}")
+                    yield sse('done', {'text_response': event['text']})
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}", exc_info=True)
+            yield sse('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _answer(text_input: str, session_id: str, turn=None) -> Dict[str, str]:
+    """
+    Answer a transcribed query and synthesize the response.
+    
+    Args:
+        text_input: Transcribed user query
+        session_id: Caller session identifier
+        turn: Finished segmented turn whose speculative retrieval may be reused
         
-        # Validate we have a response
-        if not text_response or text_response.strip() == "":
-            logger.warning("Empty response received from LLM, using fallback")
-            text_response = "I'm sorry, I couldn't generate a proper response. Please try asking again."
+    Returns:
+        Dictionary with the query text, response text and audio URL
+    """
+    # Answer directly when there is no speech or the LLM isn't needed
+    text_response = voice_processor.quick_response(text_input, session_id)
         
-        logger.info(f"Generated response: {text_response}")
+    if text_response is None:
+        # Get relevant context from knowledge base
+        context = voice_processor.retrieve_context_for_turn(text_input, session_id, turn)
+            
+        # Generate response using LLM
+        text_response = voice_processor.generate_response(text_input, context, session_id)
+            
+    text_response = web_utils.checked_response(text_response)
+    return web_utils.answer_payload(text_input, text_response, _audio_url(text_response))
+
+def _audio_url(text: str) -> str:
+    """
+    Get the URL the client fetches a response's audio from.
+    
+    Args:
+        text: Response text
         
+    Returns:
+        URL of a synthesized file, or of a stream synthesized while it is fetched
+    """
+    if settings.TTS_DELIVERY == 'stream':
+        audio_path = voice_processor.find_audio(text)
+        if audio_path is None:
+            return web_utils.speech_url(voice_processor.tts.save_request(text))
+    else:
         # Convert text to speech
-        audio_output_path = voice_processor.text_to_speech(text_response)
-        
-        # Get the relative URL for the audio file
-        audio_url = f"/audio/{os.path.basename(audio_output_path)}"
-        
-        # Clean up input file
-        try:
-            os.remove(save_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete temporary audio file: {e}")
-        
-        return jsonify({
-            'text_input': text_input,
-            'text_response': text_response,
-            'audio_url': audio_url
-        })
+        audio_path = voice_processor.text_to_speech(text)
         
-    except Exception as e:
-        logger.error(f"Error processing audio: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
+    return web_utils.audio_url(audio_path)
 
 @app.route('/audio/<filename>')
 def serve_audio(filename):
     """Serve generated audio files."""
-    return send_from_directory(os.path.join('data', 'recordings'), filename)
+    etag = web_utils.cached_audio_etag(filename)
+    if etag:
+        response = send_from_directory(settings.TTS_CACHE_DIR, filename, etag=etag, max_age=31536000)
+        web_utils.mark_immutable(response)
+        return response
+        
+    return send_from_directory(settings.RECORDINGS_DIR, filename)
+
+@app.route('/speech/<token>')
+def stream_speech(token):
+    """Relay synthesized speech for a response as it is generated."""
+    request_key = web_utils.speech_request_key(token)
+    text = voice_processor.tts.load_request(request_key) if request_key else None
+    if text is None:
+        return jsonify({'error': 'Invalid or expired speech URL'}), 404
+        
+    return Response(
+        stream_with_context(voice_processor.tts.stream(text)),
+        mimetype=voice_processor.tts.mimetype,
+        headers={'Cache-Control': 'private, max-age=3600'}
+    )
 
 @app.route('/upload_knowledge', methods=['POST'])
 def upload_knowledge():
     """
     Handle knowledge base file upload.
     
-    Uploads and saves a text file to use as the knowledge base.
+    Queues a background re-index of the uploaded text file; questions are
+    answered from the current knowledge base until the new one is ready.
+    Poll the returned status URL for the outcome.
     """
     try:
         # Check if file is in the request
@@ -168,36 +304,52 @@ def upload_knowledge():
         if not file.filename.lower().endswith('.txt'):
             return jsonify({'error': 'Only .txt files are allowed'}), 400
         
-        # Save the file
-        file_path = os.path.join('data', 'knowledge_base.txt')
-        file.save(file_path)
+        try:
+            text = file.read().decode('utf-8')
+        except UnicodeDecodeError:
+            return jsonify({'error': 'The file must be UTF-8 text'}), 400
         
-        # Reinitialize the knowledge base
-        voice_processor.reinitialize_knowledge_base()
+        # Save the text and re-embed the chunks that changed in the background
+        job = voice_processor.reindex_jobs.submit(text, filename=file.filename)
         
-        logger.info(f"Knowledge base file uploaded and saved to {file_path}")
+        logger.info(f"Knowledge base file {file.filename} uploaded, re-index job {job['id']} queued")
         
         return jsonify({
-            'status': 'success',
-            'message': 'Knowledge base file uploaded successfully',
-            'filename': file.filename
-        })
+            'status': 'accepted',
+            'message': 'Knowledge base file uploaded, indexing in the background',
+            'filename': file.filename,
+            'job_id': job['id'],
+            'status_url': url_for('knowledge_job_status', job_id=job['id'])
+        }), 202
         
     except Exception as e:
         logger.error(f"Error uploading knowledge base file: {e}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/knowledge/jobs/<job_id>')
+def knowledge_job_status(job_id):
+    """Report the status of a knowledge base re-index job."""
+    job = voice_processor.reindex_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
 @app.route('/reset_context', methods=['POST'])
 def reset_context():
     """Reset the conversation context."""
     try:
         # Only reset conversation history, keep user information
-        voice_processor.context_manager.reset()
+        voice_processor.reset_context(g.session_id)
         return jsonify({'status': 'success', 'message': 'Conversation reset successfully'})
     except Exception as e:
         logger.error(f"Error resetting context: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/stats')
+def stats():
+    """Report cache and session statistics."""
+    return jsonify(voice_processor.get_stats())
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV', 'production') == 'development'
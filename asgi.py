@@ -0,0 +1,405 @@
+"""
+Fort Wise Voice AI Assistant - ASGI Entry Point
+
+This module serves the voice pipeline on asyncio, so one process can hold
+many concurrent calls while they wait on Whisper, chat and TTS:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The audio processing and audio file routes are handled asynchronously by a
+Quart app; every other route is passed through to the Flask app in app.py.
+"""
+
+import io
+import os
+import json
+import uuid
+import asyncio
+import logging
+from typing import Dict, Optional
+from quart import Quart, Request, request, websocket, jsonify, Response, g, send_from_directory
+from quart.formparser import FormDataParser
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, voice_processor
+from core.async_voice_processor import AsyncVoiceProcessor
+from utils import web_utils
+from utils.web_utils import sse, sentence_sse, upload_filename, remove_upload
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class InMemoryRequest(Request):
+    """Request that keeps uploaded files in memory instead of spooling large ones to disk."""
+    
+    def make_form_data_parser(self) -> FormDataParser:
+        return self.form_data_parser_class(
+            stream_factory=_memory_stream,
+            max_content_length=self.max_content_length,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+        )
+
+def _memory_stream(total_content_length, content_type, filename=None, content_length=None):
+    return io.BytesIO()
+
+# Initialize the async application around the shared pipeline
+async_app = Quart(__name__)
+async_app.request_class = InMemoryRequest
+async_app.config['MAX_CONTENT_LENGTH'] = settings.MAX_UPLOAD_BYTES
+pipeline = AsyncVoiceProcessor(voice_processor, max_workers=settings.CPU_EXECUTOR_WORKERS)
+
+# Routes served natively on the event loop; the rest go to Flask
+ASYNC_ROUTES = {'/process_audio', '/process_audio_segment', '/process_audio_stream', '/ws'}
+ASYNC_ROUTE_PREFIXES = ('/audio/', '/speech/')
+
+@async_app.before_serving
+async def startup():
+    """Route blocking work in the event loop's default executor to the bounded pool."""
+    pipeline.install_executor()
+
+@async_app.before_request
+async def load_session_id():
+    """Identify the caller's session from the header or cookie, or start a new one."""
+    g.session_id, g.new_session = web_utils.resolve_session_id(request.headers, request.cookies)
+
+@async_app.after_request
+async def save_session_id(response):
+    """Hand newly created session ids back to the client as a cookie."""
+    if g.get('new_session'):
+        web_utils.set_session_cookie(response, g.session_id)
+    return response
+
+@async_app.route('/process_audio', methods=['POST'])
+async def process_audio():
+    """Process audio from client; see app.process_audio."""
+    try:
+        files = await request.files
+        if 'audio' not in files:
+            return jsonify({'error': 'No audio file provided'}), 400
+            
+        audio_file = files['audio']
+        text_input = await pipeline.speech_to_text(audio_file.read(), upload_filename(audio_file))
+        logger.info(f"Transcribed text: {text_input}")
+        
+        return jsonify(await _answer(text_input, g.session_id))
+        
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@async_app.route('/process_audio_segment', methods=['POST'])
+async def process_audio_segment():
+    """Process a recording uploaded in segments; see app.process_audio_segment."""
+    try:
+        form = await request.form
+        files = await request.files
+        turn_id = form.get('turn_id', '')
+        final = form.get('final', 'false').lower() == 'true'
+        audio_file = files.get('audio')
+        data = audio_file.read() if audio_file else b''
+        extension = os.path.splitext(upload_filename(audio_file))[1]
+            
+        if not final:
+            if not data:
+                return jsonify({'error': 'No audio segment provided'}), 400
+            segments = await pipeline.run_blocking(voice_processor.add_audio_segment, g.session_id, turn_id, data, extension)
+            return jsonify({'status': 'received', 'segments': segments})
+            
+        audio_path, turn = await pipeline.run_blocking(voice_processor.finish_turn, g.session_id, turn_id, data, extension)
+        
+        try:
+            text_input = await pipeline.speech_to_text(audio_path)
+            logger.info(f"Transcribed text: {text_input}")
+        finally:
+            remove_upload(audio_path)
+            
+        return jsonify(await _answer(text_input, g.session_id, turn))
+        
+    except ValueError as e:
+        logger.error(f"Invalid audio segment: {e}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error processing audio segment: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@async_app.route('/process_audio_stream', methods=['POST'])
+async def process_audio_stream():
+    """Process audio from client and stream the response; see app.process_audio_stream."""
+    files = await request.files
+    if 'audio' not in files:
+        return jsonify({'error': 'No audio file provided'}), 400
+        
+    try:
+        audio_file = files['audio']
+        text_input = await pipeline.speech_to_text(audio_file.read(), upload_filename(audio_file))
+        logger.info(f"Transcribed text: {text_input}")
+    except Exception as e:
+        logger.error(f"Error processing audio: {e}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+        
+    session_id = g.session_id
+    
+    async def generate():
+        try:
+            yield sse('transcript', {'text_input': web_utils.display_transcript(text_input)})
+            
+            # Answer directly when there is no speech or the LLM isn't needed
+            text_response = await pipeline.quick_response(text_input, session_id)
+                
+            if text_response is not None:
+                yield sentence_sse(0, text_response, await pipeline.text_to_speech(text_response))
+                yield sse('done', {'text_response': text_response})
+                return
+                
+            context = await pipeline.retrieve_context(text_input, session_id)
+            
+            # Stream the response sentence by sentence
+            async for event in pipeline.stream_response(text_input, context, session_id):
+                if event['type'] == 'sentence':
+                    yield sentence_sse(event['index'], event['text'], event['audio_path'])
+                else:
+                    logger.info(f"Generated response: {event['text']}")
+                    yield sse('done', {'text_response': event['text']})
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}", exc_info=True)
+            yield sse('error', {'error': str(e)})
+            
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+@async_app.route('/audio/<filename>')
+async def serve_audio(filename):
+    """Serve generated audio files; see app.serve_audio."""
+    etag = web_utils.cached_audio_etag(filename)
+    if etag:
+        response = await send_from_directory(settings.TTS_CACHE_DIR, filename, add_etags=False, cache_timeout=31536000)
+        response.set_etag(etag)
+        web_utils.mark_immutable(response)
+        return await response.make_conditional(request)
+        
+    return await send_from_directory(settings.RECORDINGS_DIR, filename)
+
+@async_app.websocket('/ws')
+async def voice_session():
+    """
+    Full-duplex voice session.
+    
+    The client sends {"type": "start", "format": ".webm"} to begin a turn,
+    then the recording as binary messages while it is captured, then
+    {"type": "end"}. The server answers with 'transcript', 'text' (LLM output
+    as it is generated), 'audio' (a sentence, followed by a binary message with
+    its encoded audio) and 'done' messages. Starting a new turn or sending
+    {"type": "interrupt"} while a response is playing cancels it (barge-in);
+    {"type": "reset"} resets the conversation. The session stays bound to the
+    connection for its whole lifetime; the first 'session' message carries the
+    token that resumes it over HTTP (in the session header).
+    """
+    session_id, _ = web_utils.resolve_session_id(websocket.headers, websocket.cookies)
+        
+    await websocket.accept()
+    await websocket.send_json({'type': 'session', 'session_id': session_id,
+                               'session_token': web_utils.session_token(session_id)})
+    logger.info(f"Voice session opened for session {session_id}")
+    
+    turn_id = None
+    extension = '.webm'
+    response_task = None
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            
+            # Binary messages carry the audio of the current turn
+            if isinstance(message, bytes):
+                if turn_id is None:
+                    continue
+                try:
+                    await pipeline.run_blocking(voice_processor.add_audio_segment, session_id, turn_id, message, extension)
+                except ValueError as e:
+                    await websocket.send_json({'type': 'error', 'error': str(e)})
+                    voice_processor.turns.discard(session_id, turn_id, extension)
+                    turn_id = None
+                continue
+                
+            # A malformed command is reported without ending the session
+            try:
+                command = json.loads(message)
+            except ValueError:
+                command = None
+            if not isinstance(command, dict):
+                await websocket.send_json({'type': 'error', 'error': 'Commands must be JSON objects'})
+                continue
+            kind = command.get('type')
+            
+            if kind == 'start':
+                # Speaking over a response interrupts it
+                if await _cancel(response_task):
+                    await websocket.send_json({'type': 'interrupted'})
+                turn_id = uuid.uuid4().hex
+                extension = command.get('format', '.webm')
+                if extension not in settings.ALLOWED_AUDIO_FORMATS:
+                    extension = '.webm'
+            elif kind == 'end' and turn_id is not None:
+                response_task = asyncio.create_task(_respond_to_turn(session_id, turn_id, extension))
+                turn_id = None
+            elif kind == 'interrupt':
+                if await _cancel(response_task):
+                    await websocket.send_json({'type': 'interrupted'})
+            elif kind == 'reset':
+                await _cancel(response_task)
+                await pipeline.run_blocking(voice_processor.reset_context, session_id)
+                await websocket.send_json({'type': 'reset'})
+    finally:
+        await _cancel(response_task)
+        if turn_id is not None:
+            voice_processor.turns.discard(session_id, turn_id, extension)
+        logger.info(f"Voice session closed for session {session_id}")
+
+async def _respond_to_turn(session_id: str, turn_id: str, extension: str) -> None:
+    """
+    Transcribe a finished websocket turn and stream the answer back.
+    
+    Args:
+        session_id: Caller session identifier
+        turn_id: Turn identifier
+        extension: Audio file extension of the turn's recording
+    """
+    try:
+        audio_path, turn = await pipeline.run_blocking(voice_processor.finish_turn, session_id, turn_id, None, extension)
+        
+        try:
+            text_input = await pipeline.speech_to_text(audio_path)
+            logger.info(f"Transcribed text: {text_input}")
+        finally:
+            remove_upload(audio_path)
+            
+        await websocket.send_json({'type': 'transcript', 'text': web_utils.display_transcript(text_input)})
+            
+        # Answer directly when there is no speech or the LLM isn't needed
+        text_response = await pipeline.quick_response(text_input, session_id)
+            
+        if text_response is not None:
+            await websocket.send_json({'type': 'text', 'text': text_response})
+            await _send_audio(0, text_response, await pipeline.text_to_speech(text_response))
+            await websocket.send_json({'type': 'done', 'text': text_response})
+            return
+            
+        context = await pipeline.run_blocking(voice_processor.retrieve_context_for_turn, text_input, session_id, turn)
+        
+        async for event in pipeline.stream_response(text_input, context, session_id, emit_text=True):
+            if event['type'] == 'text':
+                await websocket.send_json(event)
+            elif event['type'] == 'sentence':
+                await _send_audio(event['index'], event['text'], event['audio_path'])
+            else:
+                logger.info(f"Generated response: {event['text']}")
+                await websocket.send_json({'type': 'done', 'text': event['text']})
+    except asyncio.CancelledError:
+        logger.info(f"Response for session {session_id} interrupted")
+        raise
+    except Exception as e:
+        logger.error(f"Error in voice session: {e}", exc_info=True)
+        await websocket.send_json({'type': 'error', 'error': str(e)})
+
+async def _send_audio(index: int, text: str, audio_path: str) -> None:
+    """
+    Send a sentence's audio over the websocket.
+    
+    Args:
+        index: Position of the sentence in the response
+        text: Sentence text
+        audio_path: Path to the sentence's audio file
+    """
+    with open(audio_path, 'rb') as f:
+        audio = await asyncio.to_thread(f.read)
+        
+    # The header tells the client how to play the binary message that follows
+    await websocket.send_json({
+        'type': 'audio',
+        'index': index,
+        'text': text,
+        'format': os.path.splitext(audio_path)[1].lstrip('.'),
+        'audio_url': web_utils.audio_url(audio_path)
+    })
+    await websocket.send(audio)
+
+async def _cancel(task: Optional[asyncio.Task]) -> bool:
+    """
+    Cancel a response task if it is still running.
+    
+    Args:
+        task: Response task, if any
+        
+    Returns:
+        True if a running task was cancelled
+    """
+    if task is None or task.done():
+        return False
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return True
+
+async def _answer(text_input: str, session_id: str, turn=None) -> Dict[str, str]:
+    """
+    Answer a transcribed query and synthesize the response; see app._answer.
+    
+    Args:
+        text_input: Transcribed user query
+        session_id: Caller session identifier
+        turn: Finished segmented turn whose speculative retrieval may be reused
+        
+    Returns:
+        Dictionary with the query text, response text and audio URL
+    """
+    # Answer directly when there is no speech or the LLM isn't needed
+    text_response = await pipeline.quick_response(text_input, session_id)
+        
+    if text_response is None:
+        context = await pipeline.run_blocking(voice_processor.retrieve_context_for_turn, text_input, session_id, turn)
+        text_response = await pipeline.generate_response(text_input, context, session_id)
+            
+    text_response = web_utils.checked_response(text_response)
+    return web_utils.answer_payload(text_input, text_response, await _audio_url(text_response))
+
+async def _audio_url(text: str) -> str:
+    """Get the URL the client fetches a response's audio from; see app._audio_url."""
+    if settings.TTS_DELIVERY == 'stream':
+        audio_path = await pipeline.run_blocking(voice_processor.find_audio, text)
+        if audio_path is None:
+            return web_utils.speech_url(await pipeline.run_blocking(voice_processor.tts.save_request, text))
+    else:
+        audio_path = await pipeline.text_to_speech(text)
+        
+    return web_utils.audio_url(audio_path)
+
+@async_app.route('/speech/<token>')
+async def stream_speech(token):
+    """Relay synthesized speech for a response as it is generated."""
+    request_key = web_utils.speech_request_key(token)
+    text = await pipeline.run_blocking(voice_processor.tts.load_request, request_key) if request_key else None
+    if text is None:
+        return jsonify({'error': 'Invalid or expired speech URL'}), 404
+        
+    response = Response(voice_processor.tts.astream(text), mimetype=voice_processor.tts.mimetype)
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    response.timeout = None
+    return response
+
+# Flask routes run in a worker thread through the WSGI adapter
+wsgi_app = WsgiToAsgi(flask_app)
+
+async def application(scope, receive, send):
+    """ASGI entry point dispatching between the async and the Flask routes."""
+    path = scope.get('path', '')
+    if scope['type'] == 'lifespan' or path in ASYNC_ROUTES or path.startswith(ASYNC_ROUTE_PREFIXES):
+        await async_app(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
@@ -0,0 +1,107 @@
+"""
+Audio Duration Benchmark
+
+This script compares reading audio durations from container headers with
+getting them by decoding, on the sample recordings in data/sample_recordings:
+
+    python -m benchmarks.audio_duration [directory] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import warnings
+from collections import defaultdict
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_utils import probe_duration, decode_audio_duration
+
+# Container names by magic bytes; anything else is tried as MP3
+CONTAINERS = [(b"RIFF", "wav"), (b"\x1aE\xdf\xa3", "webm"), (b"OggS", "ogg")]
+
+def container(data: bytes) -> str:
+    """Name the container of encoded audio from its magic bytes."""
+    for magic, name in CONTAINERS:
+        if data.startswith(magic):
+            return name
+    return "mp3/other"
+
+def timed(func: Callable, arg, repeat: int) -> Tuple[Optional[float], float]:
+    """
+    Time a duration function.
+    
+    Args:
+        func: Function returning a duration
+        arg: Argument to call it with
+        repeat: Number of calls to average over
+        
+    Returns:
+        (duration or None if the function failed, mean seconds per call)
+    """
+    result = None
+    started = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            result = func(arg)
+        except Exception:
+            result = None
+    return result, (time.perf_counter() - started) / repeat
+
+def list_recordings(directory: str) -> List[str]:
+    """List the audio files under a directory."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in sorted(files))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=os.path.join("data", "sample_recordings"))
+    parser.add_argument("--repeat", type=int, default=20, help="Calls averaged per file")
+    args = parser.parse_args()
+    
+    # The decoders are noisy about fallbacks; only timings matter here
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    
+    paths = list_recordings(args.directory)
+    if not paths:
+        print(f"No recordings found in {args.directory}")
+        return
+        
+    # Keep one-off decoder imports and JIT warm-up out of the timings
+    timed(decode_audio_duration, paths[0], 1)
+    
+    rows = defaultdict(lambda: {"files": 0, "probe": 0.0, "decode": 0.0, "probed": 0, "decoded": 0, "max_diff": 0.0})
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        row = rows[container(data)]
+        
+        probed, probe_seconds = timed(probe_duration, data, args.repeat)
+        # Decoding is slow, so average over fewer calls
+        decoded, decode_seconds = timed(decode_audio_duration, path, max(1, args.repeat // 10))
+        
+        row["files"] += 1
+        row["probe"] += probe_seconds
+        row["decode"] += decode_seconds
+        row["probed"] += probed is not None
+        row["decoded"] += decoded is not None
+        if probed is not None and decoded is not None:
+            row["max_diff"] = max(row["max_diff"], abs(probed - decoded))
+            
+    print(f"{'container':<10} {'files':>5} {'probe ms':>9} {'decode ms':>10} {'speedup':>8} "
+          f"{'probed':>7} {'decoded':>8} {'max diff s':>11}")
+    for name, row in sorted(rows.items()):
+        probe_ms = row["probe"] / row["files"] * 1000
+        decode_ms = row["decode"] / row["files"] * 1000
+        speedup = decode_ms / probe_ms if probe_ms else 0.0
+        print(f"{name:<10} {row['files']:>5} {probe_ms:>9.3f} {decode_ms:>10.3f} {speedup:>7.0f}x "
+              f"{row['probed']:>7} {row['decoded']:>8} {row['max_diff']:>11.3f}")
+
+if __name__ == "__main__":
+    main()
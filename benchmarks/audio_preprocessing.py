@@ -0,0 +1,101 @@
+"""
+Audio Preprocessing Benchmark
+
+This script compares chaining the file-based audio helpers (convert, then
+normalize, then trim, each decoding and re-encoding the file) with a single
+AudioPipeline that decodes once and encodes once, on the sample recordings
+in data/sample_recordings, and reports the time spent in each pipeline stage:
+
+    python -m benchmarks.audio_preprocessing [directory] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import warnings
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_utils import (AudioPipeline, Normalize, TrimSilence, VoiceActivity,
+                               convert_audio_format, normalize_audio, trim_silence, load_audio)
+
+SAMPLE_RATE = 16000
+
+def chained(path: str, work_dir: str) -> None:
+    """Preprocess a recording with the file-based helpers, one after the other."""
+    output_path = os.path.join(work_dir, "chained.wav")
+    convert_audio_format(path, output_path, sample_rate=SAMPLE_RATE)
+    normalize_audio(output_path)
+    trim_silence(output_path)
+
+def decodable(paths: List[str]) -> List[str]:
+    """Keep the recordings the local decoders can read."""
+    readable = []
+    for path in paths:
+        try:
+            load_audio(path, SAMPLE_RATE)
+            readable.append(path)
+        except Exception:
+            pass
+    return readable
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=os.path.join("data", "sample_recordings"))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs averaged per file")
+    args = parser.parse_args()
+    
+    # The decoders are noisy about fallbacks; only timings matter here
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    
+    paths = [os.path.join(root, name) for root, _, files in os.walk(args.directory) for name in sorted(files)]
+    paths = decodable(paths)
+    if not paths:
+        print(f"No decodable recordings found in {args.directory}")
+        return
+        
+    pipeline = AudioPipeline([Normalize(), TrimSilence()], sample_rate=SAMPLE_RATE)
+    vad_pipeline = AudioPipeline([Normalize(), VoiceActivity()], sample_rate=SAMPLE_RATE)
+    
+    work_dir = tempfile.mkdtemp(prefix="audio-bench-")
+    totals = defaultdict(float)
+    stages: Dict[str, Dict[str, float]] = {"pipeline": defaultdict(float), "pipeline+vad": defaultdict(float)}
+    try:
+        for path in paths:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                chained(path, work_dir)
+                totals["chained helpers"] += time.perf_counter() - started
+                
+                for name, candidate in (("pipeline", pipeline), ("pipeline+vad", vad_pipeline)):
+                    timings = {}
+                    started = time.perf_counter()
+                    candidate.encode(path, "wav", timings)
+                    totals[name] += time.perf_counter() - started
+                    for stage, seconds in timings.items():
+                        stages[name][stage] += seconds
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        
+    runs = len(paths) * args.repeat
+    baseline = totals["chained helpers"] / runs
+    print(f"{len(paths)} recordings, {args.repeat} runs each\n")
+    print(f"{'method':<16} {'ms/file':>8} {'speedup':>8}")
+    for name, seconds in totals.items():
+        per_file = seconds / runs
+        print(f"{name:<16} {per_file * 1000:>8.2f} {baseline / per_file:>7.1f}x")
+        
+    for name, timings in stages.items():
+        print(f"\n{name} stages (ms/file)")
+        for stage, seconds in timings.items():
+            print(f"  {stage:<12} {seconds / runs * 1000:>8.3f}")
+
+if __name__ == "__main__":
+    main()
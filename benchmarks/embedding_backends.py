@@ -0,0 +1,164 @@
+"""
+Embedding Backends Benchmark
+
+This script compares the embedding backends on the knowledge base: query
+encoding latency (one query at a time, as KnowledgeBase.search does) and
+accuracy against the full precision PyTorch model, both as cosine similarity
+of the embeddings and as agreement of the chunks retrieved with them:
+
+    python -m benchmarks.embedding_backends [--backends torch int8 onnx] [--repeat N] [--model NAME]
+
+It exits with status 1 if a backend's embeddings fall below --min-similarity.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import warnings
+from typing import Dict, List
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from core import model_registry
+from core.knowledge_base import chunker_settings
+from utils.text_utils import split_chunks
+
+# Questions callers ask, in addition to the first line of every chunk
+SAMPLE_QUERIES = [
+    "What is Fort Wise?",
+    "What services does Fort Wise offer?",
+    "Tell me about Alara",
+    "How much does Alara cost?",
+    "How do I contact the agency?",
+    "What are the pricing plans?",
+    "Who founded the company?",
+    "Can Alara answer phone calls?",
+    "What languages are supported?",
+    "How do I get started?"
+]
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length."""
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+def encode_queries(model, queries: List[str], repeat: int) -> Dict[str, object]:
+    """
+    Encode queries one at a time and time each call.
+    
+    Args:
+        model: Embedding model
+        queries: Query texts
+        repeat: Number of passes over the queries
+        
+    Returns:
+        Dictionary with the query embeddings and per-call latencies in seconds
+    """
+    latencies = []
+    vectors = None
+    for _ in range(repeat):
+        batch = []
+        for query in queries:
+            started = time.perf_counter()
+            batch.append(np.asarray(model.encode([query])[0], dtype='float32'))
+            latencies.append(time.perf_counter() - started)
+        vectors = np.stack(batch)
+    return {"vectors": vectors, "latencies": np.array(latencies)}
+
+def top_k(chunk_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    """Search chunk vectors the way the knowledge base does (L2, flat index)."""
+    index = faiss.IndexFlatL2(chunk_vectors.shape[1])
+    index.add(np.ascontiguousarray(chunk_vectors, dtype='float32'))
+    return index.search(np.ascontiguousarray(query_vectors, dtype='float32'), k)[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(model_registry.EMBEDDING_BACKENDS),
+                        choices=model_registry.EMBEDDING_BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the queries")
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K_RESULTS)
+    parser.add_argument("--min-similarity", type=float, default=0.98,
+                        help="Lowest acceptable cosine similarity to the PyTorch embeddings")
+    parser.add_argument("--kb", default=settings.KB_TEXT_PATH, help="Knowledge base text")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL,
+                        help="SentenceTransformer model name or local directory")
+    args = parser.parse_args()
+    
+    # Loading progress and export warnings would drown the table
+    logging.disable(logging.WARNING)
+    warnings.simplefilter("ignore")
+    
+    with open(args.kb, 'r', encoding='utf-8') as f:
+        chunks = [chunk.text for chunk in split_chunks(f.read(), **chunker_settings())]
+    queries = SAMPLE_QUERIES + [chunk.splitlines()[0] for chunk in chunks]
+    
+    # PyTorch is the reference, so it always runs first
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    results = {}
+    for backend in backends:
+        try:
+            started = time.monotonic()
+            model = model_registry.get_embedding_model(args.model, backend)
+            load_seconds = time.monotonic() - started
+        except Exception as e:
+            print(f"{backend}: not available ({e})")
+            continue
+            
+        # The first call initializes kernels and thread pools
+        model.encode(["warm up"])
+        
+        timing = encode_queries(model, queries, args.repeat)
+        started = time.perf_counter()
+        chunk_vectors = np.asarray(model.encode(chunks), dtype='float32')
+        results[backend] = {
+            "load_seconds": load_seconds,
+            "queries": timing["vectors"],
+            "latencies": timing["latencies"],
+            "chunks": chunk_vectors,
+            "chunk_seconds": time.perf_counter() - started
+        }
+        
+    if "torch" not in results:
+        print("The PyTorch backend is needed as the accuracy reference")
+        sys.exit(1)
+        
+    reference = results["torch"]
+    reference_top = top_k(reference["chunks"], reference["queries"], args.top_k)
+    reference_ms = np.median(reference["latencies"]) * 1000
+    memory = model_registry.get_stats()["models"]
+    
+    print(f"{len(queries)} queries x {args.repeat}, {len(chunks)} chunks, model {args.model}\n")
+    print(f"{'backend':<8} {'load s':>7} {'RSS MB':>7} {'p50 ms':>7} {'p95 ms':>7} {'speedup':>8} "
+          f"{'chunks s':>9} {'min cos':>8} {'mean cos':>9} {'top-1':>6} {f'recall@{args.top_k}':>9}")
+          
+    failed = False
+    for backend, result in results.items():
+        similarity = np.sum(normalize(result["queries"]) * normalize(reference["queries"]), axis=1)
+        
+        # Chunks this backend retrieves with its own vectors, compared with the reference
+        found = top_k(result["chunks"], result["queries"], args.top_k)
+        top1 = np.mean(found[:, 0] == reference_top[:, 0])
+        recall = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(found, reference_top)])
+        
+        rss = memory.get(f"embedding:{args.model}:{backend}", {}).get("rss_delta_bytes")
+        p50 = np.median(result["latencies"]) * 1000
+        p95 = np.percentile(result["latencies"], 95) * 1000
+        print(f"{backend:<8} {result['load_seconds']:>7.2f} "
+              f"{(rss or 0) / 1024 / 1024:>7.1f} {p50:>7.2f} {p95:>7.2f} {reference_ms / p50:>7.2f}x "
+              f"{result['chunk_seconds']:>9.2f} {similarity.min():>8.4f} {similarity.mean():>9.4f} "
+              f"{top1:>6.2f} {recall:>9.2f}")
+              
+        if similarity.min() < args.min_similarity:
+            failed = True
+            
+    if failed:
+        print(f"\nA backend's embeddings fall below the minimum similarity of {args.min_similarity}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -17,31 +17,130 @@ VERSION = "1.0.0"
 # API keys (from environment variables)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Key for signing URLs and session cookies; must be the same in every worker.
+# Required in production; in development a random key is generated once and kept in SECRET_KEY_FILE
+SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY_FILE = os.path.join('data', 'secret_key')
+
 # Audio settings
 MAX_AUDIO_DURATION = 30  # Maximum audio duration in seconds
 ALLOWED_AUDIO_FORMATS = ['.wav', '.mp3', '.ogg', '.m4a', '.webm']
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 16 * 1024 * 1024))  # Uploads are held in memory
+
+# Voice activity detection before STT: trim silence, skip recordings without speech
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_TOP_DB = 35.0         # Frames this many dB below the loudest one count as silence
+VAD_MIN_LEVEL_DB = -50.0  # Frames quieter than this (dBFS) always count as silence
+VAD_NOISE_MARGIN_DB = 6.0 # Frames must be this many dB above the background noise
+VAD_MIN_SPEECH = 0.2      # Seconds of voiced audio below which a recording has no speech
+VAD_PADDING = 0.2         # Seconds kept before and after the speech
+VAD_MIN_TRIM = 0.5        # Seconds of silence worth re-encoding a smaller upload for
+STT_SAMPLE_RATE = 16000   # Whisper works at 16 kHz mono
+STT_UPLOAD_ENCODING = os.getenv("STT_UPLOAD_ENCODING", "ogg")  # 'ogg' (Vorbis), 'flac' or 'wav'
+
+# OpenAI client settings (one pooled client per process)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 32))        # Concurrent connections to the API
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", 16))            # Idle connections kept open for reuse
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 120))   # Seconds an idle connection is kept
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"          # Needs the h2 package
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 60))                      # Default read timeout
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 2))
 
 # STT settings
 STT_MODEL = "whisper-1"  # OpenAI Whisper model
+STT_TIMEOUT = float(os.getenv("STT_TIMEOUT", 30))
+STT_MAX_RETRIES = int(os.getenv("STT_MAX_RETRIES", 1))
+# 'openai' (Whisper API) or 'local' (quantized Whisper on the CPU, needs faster-whisper)
+STT_BACKEND = os.getenv("STT_BACKEND", "openai")
+STT_WARMUP = os.getenv("STT_WARMUP", "true").lower() == "true"          # Prepare the backend at startup
+LOCAL_STT_MODEL = os.getenv("LOCAL_STT_MODEL", "small.en")             # faster-whisper model size or path
+LOCAL_STT_COMPUTE_TYPE = os.getenv("LOCAL_STT_COMPUTE_TYPE", "int8")   # Weight quantization
+LOCAL_STT_THREADS = int(os.getenv("LOCAL_STT_THREADS", 4))             # CPU threads per transcription
+LOCAL_STT_WORKERS = int(os.getenv("LOCAL_STT_WORKERS", 1))             # Transcriptions run in parallel per process
+LOCAL_STT_BEAM_SIZE = int(os.getenv("LOCAL_STT_BEAM_SIZE", 1))         # 1 decodes greedily, which is fastest
+LOCAL_STT_MODEL_DIR = os.path.join('data', 'models')
 
 # LLM settings
 LLM_MODEL = "o4-mini-2025-04-16"  # As specified in requirements
 LLM_TEMPERATURE = 0.7
 LLM_MAX_TOKENS = 500
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
 
 # TTS settings
 TTS_MODEL = "tts-1"  # OpenAI TTS model
 TTS_VOICE = "alloy"  # Default voice
 TTS_SPEED = 1.0      # Default speed
+TTS_FORMAT = os.getenv("TTS_FORMAT", "mp3")  # 'mp3', 'opus', 'aac', 'flac' or 'wav'
+# 'file': synthesize before answering and serve the file; 'stream': answer first and
+# relay the audio from the TTS API while the client downloads it
+TTS_DELIVERY = os.getenv("TTS_DELIVERY", "file")
+SPEECH_URL_MAX_AGE = int(os.getenv("SPEECH_URL_MAX_AGE", 3600))  # Seconds a streamed speech URL stays valid
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", 30))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", 2))
+TTS_CACHE_DIR = os.path.join('data', 'tts_cache')
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))  # Synthesized audio kept on disk
+PHRASE_BANK_VOICES = [voice for voice in os.getenv("PHRASE_BANK_VOICES", "").split(",") if voice]  # Defaults to the TTS voice
+
+# Streaming settings
+STREAM_TTS_WORKERS = int(os.getenv("STREAM_TTS_WORKERS", 2))  # Sentences synthesized in parallel per process
+SENTENCE_MIN_LENGTH = 20  # Shorter sentences are merged with the next one before TTS
+
+# Async serving settings (asgi.py)
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", 4))  # Threads for embedding, FAISS and audio decoding
+
+# Speculative retrieval settings (audio uploaded in segments while the caller speaks)
+TURNS_DIR = os.path.join('data', 'recordings', 'turns')
+TURN_TTL = 120                # Seconds without a new segment before a turn is abandoned
+MAX_TURN_BYTES = int(os.getenv("MAX_TURN_BYTES", 10 * 1024 * 1024))  # Largest recording accepted in segments
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", 2))
+SPECULATION_THRESHOLD = float(os.getenv("SPECULATION_THRESHOLD", 0.8))  # Min partial/final transcript word similarity
 
 # Knowledge base settings
-FAISS_INDEX_PATH = os.path.join('data', 'faiss_index', 'index.faiss')
+FAISS_INDEX_DIR = os.path.join('data', 'faiss_index')  # Index bundle: vectors, chunk texts and manifest
 KB_TEXT_PATH = os.path.join('data', 'knowledge_base.txt')
+CHUNK_MIN_SIZE = 300      # Characters a chunk needs before a section header may end it
+CHUNK_MAX_SIZE = 1000     # Characters after which a chunk is split without a header
+CHUNK_OVERLAP_LINES = 0   # Trailing lines of a chunk repeated in the next one
+INDEX_KEEP_VERSIONS = 2   # Newest bundle versions kept on disk (the current one is always kept)
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", 5))  # Seconds between checks for a newer bundle
+INDEX_JOBS_DIR = os.path.join(FAISS_INDEX_DIR, 'jobs')  # Status of background re-index jobs, shared by workers
+INDEX_JOBS_KEEP = 20      # Finished job records kept
 TOP_K_RESULTS = 5  # Number of context chunks to retrieve
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))  # Torch threads per forked worker (0 keeps the default)
+# 'torch' (full precision), 'int8' (dynamically quantized PyTorch) or 'onnx' (ONNX Runtime,
+# needs optimum[onnxruntime]); compare them with python -m benchmarks.embedding_backends
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")  # e.g. onnx/model_qint8_avx512_vnni.onnx; empty for onnx/model.onnx
+
+# Retrieval cache settings
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))  # Cached query embeddings
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join('data', 'embedding_cache.npz'))  # Empty to disable persistence
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 1024))        # Cached ranked search results for questions asked without history
+
+# Semantic response cache settings
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 512))                 # Cached LLM answers
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.95))    # Minimum query cosine similarity
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 86400))                 # Seconds an answer may be reused
 
 # Context manager settings
 MAX_HISTORY = 10  # Maximum conversation history to keep
 
+# Session settings
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 1000))  # Live sessions kept per process
+SESSION_TTL = int(os.getenv("SESSION_TTL", 1800))    # Seconds of inactivity before a session is dropped
+SESSION_COOKIE_NAME = "fw_session"
+SESSION_HEADER = "X-Session-ID"
+# Where sessions live: 'memory' (this worker only), 'sqlite' or 'redis' (shared across workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.path.join('data', 'sessions.db')
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_FLUSH_INTERVAL = 0.1  # Seconds between batched session writes
+SESSION_BATCH_SIZE = 64       # Pending session writes that trigger an immediate flush
+SESSION_VERSION_CHECK_INTERVAL = 1.0  # Seconds a cached session is used before checking the backend for newer updates
+
 # Flask settings
 PORT = int(os.getenv("PORT", 5000))
 FLASK_ENV = os.getenv("FLASK_ENV", "production")
@@ -51,6 +150,13 @@ DEBUG = FLASK_ENV == "development"
 RECORDINGS_DIR = os.path.join('data', 'recordings')
 LOGS_DIR = 'logs'
 
+# Recordings retention (enforced by a background janitor in every worker)
+RECORDINGS_MAX_BYTES = int(os.getenv("RECORDINGS_MAX_BYTES", 500 * 1024 * 1024))
+RECORDINGS_MAX_AGE = int(os.getenv("RECORDINGS_MAX_AGE", 86400))      # Seconds since last modification
+RECORDINGS_MAX_FILES = int(os.getenv("RECORDINGS_MAX_FILES", 10000))
+RECORDINGS_MIN_AGE = max(300, TURN_TTL * 2)  # Recordings younger than this may still be in use
+RECORDINGS_CLEANUP_INTERVAL = int(os.getenv("RECORDINGS_CLEANUP_INTERVAL", 60))  # Seconds between cleanups
+
 # Ensure directories exist
-for directory in [RECORDINGS_DIR, LOGS_DIR, os.path.dirname(FAISS_INDEX_PATH)]:
+for directory in [RECORDINGS_DIR, LOGS_DIR, FAISS_INDEX_DIR]:
     os.makedirs(directory, exist_ok=True)
\ No newline at end of file
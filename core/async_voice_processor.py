@@ -0,0 +1,249 @@
+"""
+Async Voice Processor Module
+
+This module runs the voice processing pipeline on asyncio for the ASGI server.
+Network calls (Whisper, chat, TTS) go through the shared async OpenAI client,
+while CPU-bound work (embedding, FAISS search, audio decoding) and session
+store access run in a bounded thread pool, so a single process can hold many
+calls that are waiting on the network. Everything else (caching, session
+updates, sentence pipelining) is delegated to the VoiceProcessor primitives.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Optional
+
+from core.voice_processor import VoiceProcessor, SentenceQueue
+from core.session_store import DEFAULT_SESSION_ID
+from utils.audio_utils import AudioInput
+
+logger = logging.getLogger(__name__)
+
+class AsyncVoiceProcessor:
+    """Asyncio front end to the voice processing pipeline."""
+    
+    def __init__(self, processor: VoiceProcessor, max_workers: int = 4):
+        """
+        Initialize the async voice processor.
+        
+        Args:
+            processor: Voice processor whose components and caches are shared
+            max_workers: Size of the thread pool for CPU-bound and blocking work
+        """
+        self.processor = processor
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu")
+        
+        logger.info(f"Async Voice Processor initialized with {max_workers} CPU workers")
+    
+    def install_executor(self) -> None:
+        """
+        Make the bounded pool the event loop's default executor.
+        
+        The STT and TTS modules offload file and decode work with
+        asyncio.to_thread, which uses the default executor.
+        """
+        asyncio.get_running_loop().set_default_executor(self.executor)
+    
+    async def run_blocking(self, func, *args):
+        """
+        Run a blocking function in the bounded thread pool.
+        
+        Args:
+            func: Function doing CPU-bound or blocking work
+            *args: Positional arguments for func
+            
+        Returns:
+            The function's return value
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+    
+    async def speech_to_text(self, audio: AudioInput, filename: Optional[str] = None) -> str:
+        """
+        Convert speech to text.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            filename: Name of the file the audio bytes came from
+            
+        Returns:
+            Transcribed text
+        """
+        logger.info("Converting speech to text")
+        
+        try:
+            return await self.processor.stt.atranscribe(audio, filename=filename)
+        except Exception as e:
+            logger.error(f"Error in speech-to-text conversion: {e}")
+            raise
+    
+    async def retrieve_context(self, query: str, session_id: str = DEFAULT_SESSION_ID) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant context from knowledge base.
+        
+        Args:
+            query: User query text
+            session_id: Caller session identifier
+            
+        Returns:
+            List of relevant context chunks
+        """
+        # Embedding and FAISS search are CPU-bound
+        return await self.run_blocking(self.processor.retrieve_context, query, session_id)
+    
+    async def quick_response(self, text_input: str, session_id: str = DEFAULT_SESSION_ID) -> Optional[str]:
+        """
+        Answer queries that don't need the knowledge base or the LLM; see VoiceProcessor.quick_response.
+        
+        Args:
+            text_input: Transcribed user query
+            session_id: Caller session identifier
+            
+        Returns:
+            Response text, or None if the query should go through the LLM
+        """
+        return await self.run_blocking(self.processor.quick_response, text_input, session_id)
+    
+    async def generate_response(self, query: str, context: List[Dict[str, Any]],
+                                session_id: str = DEFAULT_SESSION_ID) -> str:
+        """
+        Generate response using LLM.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            session_id: Caller session identifier
+            
+        Returns:
+            Generated response text
+        """
+        logger.info("Generating response with LLM")
+        
+        try:
+            prepared = await self.run_blocking(self.processor.prepare_response, query, context, session_id)
+            
+            if prepared["cached"] is not None:
+                response = prepared["cached"]
+            else:
+                response = await self.processor.llm.agenerate_response(
+                    query=query,
+                    context=context,
+                    conversation_history=prepared["conversation_history"],
+                    user_info=prepared["user_info"]
+                )
+                
+            await self.run_blocking(self.processor.finish_response, query, response, prepared, session_id)
+            
+            return response
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise
+    
+    async def stream_response(self, query: str, context: List[Dict[str, Any]],
+                              session_id: str = DEFAULT_SESSION_ID,
+                              emit_text: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a response and synthesize it sentence by sentence.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            session_id: Caller session identifier
+            emit_text: Also yield {"type": "text", "text"} for every fragment of
+                LLM output as soon as it is generated
+            
+        Yields:
+            The same events as VoiceProcessor.stream_response
+        """
+        logger.info("Generating streamed response with LLM")
+        
+        prepared = await self.run_blocking(self.processor.prepare_response, query, context, session_id)
+        
+        # A cached answer is emitted as a single sentence with its existing audio
+        if prepared["cached"] is not None:
+            response = prepared["cached"]
+            if emit_text:
+                yield {"type": "text", "text": response}
+            yield {"type": "sentence", "index": 0, "text": response, "audio_path": await self.text_to_speech(response)}
+            
+            await self.run_blocking(self.processor.finish_response, query, response, prepared, session_id)
+            
+            yield {"type": "done", "text": response}
+            return
+            
+        sentences = SentenceQueue(lambda sentence: asyncio.ensure_future(self.text_to_speech(sentence)))
+            
+        try:
+            async for fragment in self.processor.llm.agenerate_response_stream(
+                query=query,
+                context=context,
+                conversation_history=prepared["conversation_history"],
+                user_info=prepared["user_info"]
+            ):
+                sentences.feed(fragment)
+                if emit_text:
+                    yield {"type": "text", "text": fragment}
+                
+                # Emit sentences whose audio is already ready, preserving order
+                for item in sentences.ready():
+                    yield await self._sentence_event(*item)
+                    
+            # Synthesize whatever is left after the stream ends
+            for item in sentences.drain():
+                yield await self._sentence_event(*item)
+                
+            # Only a stream that ended normally is a complete answer
+            response = sentences.text
+            await self.run_blocking(self.processor.finish_response, query, response, prepared, session_id)
+            
+            yield {"type": "done", "text": response}
+        except Exception as e:
+            logger.error(f"Error generating streamed response: {e}")
+            raise
+        finally:
+            # Don't synthesize audio nobody will fetch if the client went away
+            sentences.cancel()
+    
+    async def _sentence_event(self, index: int, sentence: str, task: asyncio.Future) -> Dict[str, Any]:
+        """
+        Build a sentence event once its audio has been synthesized.
+        
+        Args:
+            index: Position of the sentence in the response
+            sentence: Sentence text
+            task: Task resolving to the sentence's audio path
+            
+        Returns:
+            Sentence event dictionary
+        """
+        return {
+            "type": "sentence",
+            "index": index,
+            "text": sentence,
+            "audio_path": await task
+        }
+    
+    async def text_to_speech(self, text: str) -> str:
+        """
+        Convert text to speech.
+        
+        Args:
+            text: Text to convert to speech
+            
+        Returns:
+            Path to the generated audio file
+        """
+        logger.info("Converting text to speech")
+        
+        try:
+            text, existing_audio = self.processor.prepare_speech(text)
+            if existing_audio:
+                return existing_audio
+                
+            output_path = await self.processor.tts.asynthesize_cached(text)
+            self.processor.response_cache.attach_audio(text, output_path)
+            
+            return output_path
+        except Exception as e:
+            logger.error(f"Error in text-to-speech conversion: {e}")
+            raise
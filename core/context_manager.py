@@ -6,13 +6,41 @@ This module manages conversation context for follow-up questions and remembers u
 
 import logging
 import re
+from collections import deque
 from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+def extract_user_info(query: str) -> Dict[str, Any]:
+    """
+    Extract personal user information from a query.
+    
+    Args:
+        query: User query text
+        
+    Returns:
+        Dictionary with extracted information (empty if none)
+    """
+    # Extract name using pattern matching
+    name_patterns = [
+        r"my name is (\w+)",
+        r"I am (\w+)",
+        r"I'm (\w+)",
+        r"call me (\w+)"
+    ]
+    
+    for pattern in name_patterns:
+        match = re.search(pattern, query, re.IGNORECASE)
+        if match:
+            return {"name": match.group(1)}
+            
+    return {}
+
 class ContextManager:
     """Class for managing conversation context."""
     
+    __slots__ = ("history", "max_history", "user_info")
+    
     def __init__(self, max_history: int = 10):
         """
         Initialize the context manager.
@@ -20,10 +48,11 @@ class ContextManager:
         Args:
             max_history: Maximum number of exchanges to keep in history
         """
-        self.history = []
+        # Ring buffer: appending beyond max_history drops the oldest exchange
+        self.history = deque(maxlen=max_history)
         self.max_history = max_history
         self.user_info = {}  # Dictionary to store user information
-        logger.info(f"Context Manager initialized with max_history={max_history}")
+        logger.debug(f"Context Manager initialized with max_history={max_history}")
     
     def add_exchange(self, query: str, response: str) -> None:
         """
@@ -43,10 +72,6 @@ class ContextManager:
         
         self.history.append(exchange)
         
-        # Trim history if it exceeds max_history
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
-        
         logger.debug(f"Added exchange to history. Current history size: {len(self.history)}")
         logger.debug(f"Current user info: {self.user_info}")
     
@@ -57,20 +82,10 @@ class ContextManager:
         Args:
             query: User query text
         """
-        # Extract name using pattern matching
-        name_patterns = [
-            r"my name is (\w+)",
-            r"I am (\w+)",
-            r"I'm (\w+)",
-            r"call me (\w+)"
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                self.user_info["name"] = match.group(1)
-                logger.info(f"Extracted user name: {self.user_info['name']}")
-                break
+        extracted = extract_user_info(query)
+        if extracted:
+            self.user_info.update(extracted)
+            logger.info(f"Extracted user name: {self.user_info['name']}")
     
     def get_history(self) -> List[Dict[str, str]]:
         """
@@ -79,7 +94,7 @@ class ContextManager:
         Returns:
             List of query-response exchanges
         """
-        return self.history
+        return list(self.history)
     
     def get_user_info(self) -> Dict[str, Any]:
         """
@@ -92,15 +107,44 @@ class ContextManager:
     
     def reset(self) -> None:
         """Reset the conversation history but keep user information."""
-        self.history = []
+        self.history.clear()
         logger.info("Conversation history reset, user information retained")
     
     def reset_all(self) -> None:
         """Reset both conversation history and user information."""
-        self.history = []
+        self.history.clear()
         self.user_info = {}
         logger.info("Conversation history and user information reset")
     
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the context for storage in a session backend.
+        
+        Returns:
+            Dictionary with history and user information
+        """
+        return {
+            "history": list(self.history),
+            "user_info": dict(self.user_info)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_history: int = 10) -> "ContextManager":
+        """
+        Restore a context serialized with to_dict.
+        
+        Args:
+            data: Serialized context
+            max_history: Maximum number of exchanges to keep in history
+        
+        Returns:
+            Restored context manager
+        """
+        context_manager = cls(max_history=max_history)
+        context_manager.history.extend(data.get("history", []))
+        context_manager.user_info.update(data.get("user_info", {}))
+        return context_manager
+    
     def get_last_exchange(self) -> Dict[str, str]:
         """
         Get the last exchange in the history.
@@ -129,7 +173,7 @@ class ContextManager:
         
         # Add recent conversation history (last 3 exchanges)
         if self.history:
-            recent_history = self.history[-3:]
+            recent_history = list(self.history)[-3:]
             summary += "\nRecent Conversation:\n"
             for i, exchange in enumerate(recent_history):
                 summary += f"User: {exchange['query']}\n"
@@ -0,0 +1,180 @@
+"""
+Embedding Cache Module
+
+This module caches query embeddings so that repeated questions skip the
+sentence transformer forward pass, optionally persisting them across restarts.
+
+New embeddings are written to disk by a background thread, every
+save_interval seconds or sooner once save_every of them are waiting, and
+once more at shutdown, so a cache miss never waits for the file write.
+"""
+
+import os
+import re
+import json
+import atexit
+import logging
+import threading
+import numpy as np
+from typing import Optional
+
+from utils.cache_utils import LRUCache
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize query text so that trivially different phrasings share an embedding.
+    
+    Args:
+        text: Query text
+    
+    Returns:
+        Lowercased text with collapsed whitespace and no trailing punctuation
+    """
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return text.rstrip('?.!,; ')
+
+class EmbeddingCache(LRUCache):
+    """LRU cache of normalized query text to embedding vector."""
+    
+    def __init__(self, model_name: str, maxsize: int = 2048, path: Optional[str] = None,
+                 save_every: int = 50, save_interval: float = 30.0):
+        """
+        Initialize the embedding cache.
+        
+        Args:
+            model_name: Name of the embedding model; a persisted cache built with
+                a different model is ignored
+            maxsize: Maximum number of cached embeddings
+            path: Optional .npz file to persist the cache to
+            save_every: Number of new embeddings after which the cache is saved
+                without waiting for the save interval
+            save_interval: Seconds between background saves of new embeddings
+        """
+        super().__init__(maxsize=maxsize)
+        self.model_name = model_name
+        self.path = path
+        self.save_every = save_every
+        self.save_interval = save_interval
+        
+        # Number of embeddings added since the last save, guarded by _unsaved_lock
+        self._unsaved = 0
+        self._unsaved_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        
+        # Background saver state
+        self._saver = None
+        self._saver_pid = None
+        self._save_due = threading.Event()
+        self._stop = threading.Event()
+        
+        if self.path:
+            self.load()
+            atexit.register(self.close)
+        
+        logger.info(f"Embedding cache initialized with maxsize={maxsize}, {len(self)} entries loaded")
+    
+    def get_or_encode(self, model, text: str) -> np.ndarray:
+        """
+        Get the embedding for a query, encoding it only on a cache miss.
+        
+        Args:
+            model: SentenceTransformer used on a miss
+            text: Query text
+        
+        Returns:
+            Embedding vector (float32)
+        """
+        key = normalize_query(text)
+        vector = self.get(key)
+        if vector is not None:
+            return vector
+        
+        vector = np.asarray(model.encode([key])[0], dtype='float32')
+        self.put(key, vector)
+        
+        if self.path:
+            with self._unsaved_lock:
+                self._unsaved += 1
+                save_now = self._unsaved >= self.save_every
+            self._ensure_saver()
+            if save_now:
+                self._save_due.set()
+                
+        return vector
+    
+    def _ensure_saver(self) -> None:
+        """Start the background save thread in this process if it isn't running."""
+        # Threads don't survive a fork, so check the pid as well
+        if self._saver is not None and self._saver_pid == os.getpid():
+            return
+            
+        with self._unsaved_lock:
+            if self._saver is None or self._saver_pid != os.getpid():
+                self._saver = threading.Thread(target=self._save_loop, name="embedding-cache-saver", daemon=True)
+                self._saver_pid = os.getpid()
+                self._saver.start()
+    
+    def _save_loop(self) -> None:
+        """Save new embeddings periodically, or as soon as enough of them are waiting."""
+        while not self._stop.is_set():
+            self._save_due.wait(self.save_interval)
+            self._save_due.clear()
+            if self._unsaved and not self._stop.is_set():
+                self.save()
+        
+    def close(self) -> None:
+        """Stop the background saver and write any unsaved embeddings."""
+        self._stop.set()
+        self._save_due.set()
+        if self._unsaved:
+            self.save()
+    
+    def load(self) -> None:
+        """Load persisted embeddings from disk, if present and built with the same model."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("model") != self.model_name:
+                    logger.warning(f"Ignoring embedding cache at {self.path} built with model {meta.get('model')}")
+                    return
+                for key, vector in zip(data["keys"], data["vectors"]):
+                    self.put(str(key), vector)
+            logger.info(f"Loaded {len(self)} cached embeddings from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading embedding cache from {self.path}: {e}")
+    
+    def save(self) -> None:
+        """Persist the cached embeddings to disk atomically."""
+        if not self.path:
+            return
+        
+        with self._save_lock:
+            with self._unsaved_lock:
+                entries = self.items()
+                unsaved, self._unsaved = self._unsaved, 0
+            if not entries:
+                return
+        
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                keys = np.array([key for key, _ in entries])
+                vectors = np.stack([vector for _, vector in entries])
+                meta = json.dumps({"model": self.model_name})
+                
+                # Write to a temporary file first so readers never see a partial cache
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as file:
+                    np.savez(file, keys=keys, vectors=vectors, meta=np.array(meta))
+                os.replace(tmp_path, self.path)
+                
+                logger.debug(f"Saved {len(entries)} cached embeddings to {self.path}")
+            except Exception as e:
+                logger.error(f"Error saving embedding cache to {self.path}: {e}")
+                # Keep the embeddings counted so the next save retries them
+                with self._unsaved_lock:
+                    self._unsaved += unsaved
@@ -0,0 +1,506 @@
+"""
+Index Bundle Module
+
+This module stores the knowledge base's chunk vectors, FAISS index, chunk
+texts and chunk offsets together with the chunker parameters and embedding
+model they were built with. Bundles are memory-mapped on load and validated
+against their checksums and the current configuration, so the FAISS index and
+the chunk list can never silently disagree. Because the index is searched
+straight from the mapped file, workers serving the same bundle share its
+pages through the OS page cache instead of each holding a copy.
+
+Every chunk has a stable id and a content hash, so a changed document can be
+re-indexed incrementally: unchanged chunks keep their ids and vectors, and
+only new or edited chunks are embedded.
+
+Each build goes into its own versioned directory, and a pointer file names
+the current one. Flipping the pointer is atomic, so readers always see a
+complete bundle.
+"""
+
+import os
+import json
+import mmap
+import fcntl
+import time
+import shutil
+import hashlib
+import logging
+import numpy as np
+import faiss
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+from utils.text_utils import split_chunks
+
+logger = logging.getLogger(__name__)
+
+# Bump when the files or their layout change
+FORMAT_VERSION = 3
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "offsets.npy"
+IDS_FILE = "ids.npy"
+HASHES_FILE = "hashes.npy"
+
+# Layout of the index directory: versions/<name>/ bundles and a pointer to the current one
+VERSIONS_DIR = "versions"
+POINTER_FILE = "CURRENT"
+BUILD_LOCK_FILE = ".build.lock"
+
+class IndexBundleError(ValueError):
+    """Raised when an index bundle is corrupt or was built differently."""
+
+def embedding_fingerprint(model_name: str, dimension: int) -> Dict[str, Any]:
+    """
+    Describe an embedding model, so vectors from another model are rejected.
+    
+    Args:
+        model_name: Embedding model name
+        dimension: Embedding dimension
+        
+    Returns:
+        Fingerprint dictionary stored in the bundle manifest
+    """
+    return {"model": model_name, "dimension": int(dimension)}
+
+def chunk_hash(text: str) -> bytes:
+    """
+    Hash a chunk's text for change detection.
+    
+    Args:
+        text: Chunk text
+        
+    Returns:
+        Hex digest as bytes
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest().encode('ascii')
+
+def file_sha256(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+    
+    Args:
+        path: File path
+        
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_source(path: str) -> str:
+    """
+    Read a knowledge base text file exactly as stored.
+    
+    Line endings are kept as they are, so the digest of the text matches
+    file_sha256 of the file and a CRLF file is not rebuilt on every start.
+    
+    Args:
+        path: File path
+        
+    Returns:
+        File text
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+class ChunkStore:
+    """Read-only sequence of chunk texts backed by a memory-mapped file."""
+    
+    def __init__(self, data, offsets: np.ndarray):
+        """
+        Initialize the chunk store.
+        
+        Args:
+            data: Buffer holding the UTF-8 chunk texts back to back
+            offsets: Array of (data start, data end, source start, source end) rows
+        """
+        self._data = data
+        self.offsets = offsets
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def __getitem__(self, i: int) -> str:
+        start, end = self.offsets[i, 0], self.offsets[i, 1]
+        return bytes(self._data[start:end]).decode('utf-8')
+    
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def span(self, i: int) -> Tuple[int, int]:
+        """
+        Get a chunk's character offsets in the source document.
+        
+        Args:
+            i: Chunk position
+            
+        Returns:
+            (start, end) offsets
+        """
+        return int(self.offsets[i, 2]), int(self.offsets[i, 3])
+
+class IndexBundle:
+    """Chunk vectors, texts and build parameters, stored and validated together."""
+    
+    def __init__(self, path: str, manifest: Dict[str, Any], vectors: np.ndarray, index: faiss.Index,
+                 chunks: ChunkStore, ids: np.ndarray, hashes: np.ndarray):
+        """
+        Initialize the bundle. Use IndexBundle.load or IndexBundle.build instead.
+        
+        Args:
+            path: Bundle directory
+            manifest: Parsed manifest
+            vectors: Chunk vectors, one row per chunk
+            index: FAISS index over the vectors, keyed by chunk id
+            chunks: Chunk texts
+            ids: Stable chunk ids, one per chunk
+            hashes: Chunk text hashes, one per chunk
+        """
+        self.path = path
+        self.manifest = manifest
+        self.vectors = vectors
+        self.index = index
+        self.chunks = chunks
+        self.ids = ids
+        self.hashes = hashes
+    
+    @property
+    def checksum(self) -> str:
+        """Digest covering every file in the bundle and its build parameters."""
+        return self.manifest["checksum"]
+    
+    @classmethod
+    def load(cls, path: str, chunker: Dict[str, Any], fingerprint: Dict[str, Any],
+             source_sha256: Optional[str] = None) -> "IndexBundle":
+        """
+        Memory-map a bundle and check that it matches the current configuration.
+        
+        Args:
+            path: Bundle directory
+            chunker: Chunker parameters the bundle must have been built with
+            fingerprint: Embedding model fingerprint the bundle must match
+            source_sha256: Digest of the current knowledge base text, if it
+                must match the text the bundle was built from
+                
+        Returns:
+            Loaded bundle
+            
+        Raises:
+            FileNotFoundError: If there is no bundle at path
+            IndexBundleError: If the bundle is corrupt or doesn't match
+        """
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            try:
+                manifest = json.load(f)
+            except ValueError as e:
+                raise IndexBundleError(f"Unreadable manifest {manifest_path}: {e}")
+                
+        if manifest.get("format") != FORMAT_VERSION:
+            raise IndexBundleError(f"Bundle format {manifest.get('format')} is not {FORMAT_VERSION}")
+        if manifest.get("chunker") != chunker:
+            raise IndexBundleError(f"Bundle was chunked with {manifest.get('chunker')}, expected {chunker}")
+        if manifest.get("embedding") != fingerprint:
+            raise IndexBundleError(f"Bundle was embedded with {manifest.get('embedding')}, expected {fingerprint}")
+        if source_sha256 is not None and manifest.get("source_sha256") != source_sha256:
+            raise IndexBundleError("Bundle was built from a different knowledge base text")
+            
+        for name, expected in manifest["files"].items():
+            if file_sha256(os.path.join(path, name)) != expected:
+                raise IndexBundleError(f"Checksum mismatch for {name} in {path}")
+                
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+        offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode='r')
+        ids = np.load(os.path.join(path, IDS_FILE))
+        hashes = np.load(os.path.join(path, HASHES_FILE))
+        # Searched in place from the mapped file; it is never modified
+        index = faiss.read_index(os.path.join(path, INDEX_FILE), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        
+        count = manifest["count"]
+        if (vectors.shape != (count, fingerprint["dimension"]) or offsets.shape != (count, 4)
+                or ids.shape != (count,) or hashes.shape != (count,) or index.ntotal != count):
+            raise IndexBundleError(f"Bundle holds {vectors.shape[0]} vectors and {offsets.shape[0]} chunks, "
+                                   f"expected {count}")
+                                   
+        chunks = ChunkStore(_map_file(os.path.join(path, CHUNKS_FILE)), offsets)
+        return cls(path, manifest, vectors, index, chunks, ids, hashes)
+    
+    @classmethod
+    def build(cls, path: str, text: str, model, chunker: Dict[str, Any],
+              fingerprint: Dict[str, Any]) -> "IndexBundle":
+        """
+        Chunk and embed a knowledge base text, write it as a bundle and load it.
+        
+        Args:
+            path: Bundle directory
+            text: Knowledge base text
+            model: SentenceTransformer used to embed the chunks
+            chunker: Chunker parameters (split_chunks keyword arguments)
+            fingerprint: Fingerprint of the embedding model
+            
+        Returns:
+            Loaded bundle
+        """
+        started = time.monotonic()
+        chunks = split_chunks(text, **chunker)
+        if chunks:
+            vectors = np.asarray(model.encode([chunk.text for chunk in chunks]), dtype='float32')
+        else:
+            vectors = np.zeros((0, fingerprint["dimension"]), dtype='float32')
+            
+        source_sha256 = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        ids = np.arange(len(chunks), dtype=np.int64)
+        write_bundle(path, chunks, vectors, ids, chunker, fingerprint, source_sha256)
+        logger.info(f"Built index bundle with {len(chunks)} chunks at {path} "
+                    f"in {time.monotonic() - started:.2f}s")
+        return cls.load(path, chunker, fingerprint, source_sha256)
+    
+    def update(self, text: str, model, path: Optional[str] = None) -> Tuple["IndexBundle", np.ndarray, np.ndarray]:
+        """
+        Re-index a changed knowledge base text, embedding only new or edited chunks.
+        
+        The text is chunked with this bundle's chunker. Chunks whose text is
+        unchanged keep their id and vector; the others get new ids.
+        
+        Args:
+            text: New knowledge base text
+            model: SentenceTransformer used to embed new chunks
+            path: Directory for the new bundle (defaults to this bundle's)
+            
+        Returns:
+            (new bundle, positions of added chunks in it, ids of removed chunks)
+        """
+        started = time.monotonic()
+        path = path or self.path
+        chunker = self.manifest["chunker"]
+        fingerprint = self.manifest["embedding"]
+        chunks = split_chunks(text, **chunker)
+        
+        # Old positions by content, so duplicate chunks are matched one to one
+        unchanged = {}
+        for position, digest in enumerate(self.hashes.tolist()):
+            unchanged.setdefault(digest, []).append(position)
+            
+        next_id = self.manifest["next_id"]
+        ids = np.empty(len(chunks), dtype=np.int64)
+        vectors = np.empty((len(chunks), fingerprint["dimension"]), dtype='float32')
+        added = []
+        for position, chunk in enumerate(chunks):
+            previous = unchanged.get(chunk_hash(chunk.text))
+            if previous:
+                old_position = previous.pop(0)
+                ids[position] = self.ids[old_position]
+                vectors[position] = self.vectors[old_position]
+            else:
+                ids[position] = next_id
+                next_id += 1
+                added.append(position)
+                
+        added = np.array(added, dtype=np.int64)
+        if len(added):
+            vectors[added] = np.asarray(model.encode([chunks[i].text for i in added]), dtype='float32')
+            
+        removed = np.setdiff1d(self.ids, ids).astype(np.int64)
+        
+        source_sha256 = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        write_bundle(path, chunks, vectors, ids, chunker, fingerprint, source_sha256, next_id)
+        logger.info(f"Re-indexed {len(chunks)} chunks at {path} in {time.monotonic() - started:.2f}s: "
+                    f"{len(added)} embedded, {len(removed)} removed, {len(chunks) - len(added)} reused")
+        return IndexBundle.load(path, chunker, fingerprint, source_sha256), added, removed
+    
+def _serialize_index(vectors: np.ndarray, ids: np.ndarray, dimension: int) -> bytes:
+    """
+    Build a FAISS index over chunk vectors and serialize it.
+        
+    Args:
+        vectors: Chunk vectors, one row per chunk
+        ids: Chunk ids, one per chunk
+        dimension: Embedding dimension
+        
+    Returns:
+        Flat L2 index keyed by chunk id, in FAISS's file format
+    """
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+    if len(vectors):
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), np.asarray(ids, dtype=np.int64))
+    return faiss.serialize_index(index).tobytes()
+
+def write_bundle(path: str, chunks: List, vectors: np.ndarray, ids: np.ndarray, chunker: Dict[str, Any],
+                 fingerprint: Dict[str, Any], source_sha256: str, next_id: Optional[int] = None) -> None:
+    """
+    Write a bundle's files, the manifest last.
+    
+    Readers verify file checksums, so a bundle interrupted halfway through a
+    write is refused rather than served.
+    
+    Args:
+        path: Bundle directory
+        chunks: TextChunk list in vector order
+        vectors: Chunk vectors, one row per chunk
+        ids: Stable chunk ids, one per chunk
+        chunker: Chunker parameters the chunks were made with
+        fingerprint: Fingerprint of the embedding model
+        source_sha256: Digest of the knowledge base text
+        next_id: First id not yet used (defaults to one past the largest id)
+    """
+    os.makedirs(path, exist_ok=True)
+    
+    encoded = [chunk.text.encode('utf-8') for chunk in chunks]
+    ends = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    offsets = np.zeros((len(chunks), 4), dtype=np.int64)
+    if len(chunks):
+        offsets[:, 0] = ends - [len(data) for data in encoded]
+        offsets[:, 1] = ends
+        offsets[:, 2] = [chunk.start for chunk in chunks]
+        offsets[:, 3] = [chunk.end for chunk in chunks]
+        
+    files = {
+        VECTORS_FILE: lambda f: np.save(f, np.ascontiguousarray(vectors, dtype='float32')),
+        INDEX_FILE: lambda f: f.write(_serialize_index(vectors, ids, fingerprint["dimension"])),
+        OFFSETS_FILE: lambda f: np.save(f, offsets),
+        IDS_FILE: lambda f: np.save(f, np.asarray(ids, dtype=np.int64)),
+        HASHES_FILE: lambda f: np.save(f, np.array([chunk_hash(chunk.text) for chunk in chunks], dtype='S40')),
+        CHUNKS_FILE: lambda f: f.write(b''.join(encoded))
+    }
+    checksums = {}
+    for name, write in files.items():
+        temp_path = os.path.join(path, f".{name}.{os.getpid()}.tmp")
+        with open(temp_path, 'wb') as f:
+            write(f)
+        checksums[name] = file_sha256(temp_path)
+        os.replace(temp_path, os.path.join(path, name))
+        
+    manifest = {
+        "format": FORMAT_VERSION,
+        "count": len(chunks),
+        # Ids are never reused, so a removed chunk's id can't come back with other text
+        "next_id": int(next_id if next_id is not None else (int(ids.max()) + 1 if len(ids) else 0)),
+        "chunker": chunker,
+        "embedding": fingerprint,
+        "source_sha256": source_sha256,
+        "files": checksums,
+        "created_at": time.time()
+    }
+    manifest["checksum"] = hashlib.sha256(json.dumps(
+        [checksums, chunker, fingerprint], sort_keys=True
+    ).encode()).hexdigest()
+    
+    temp_path = os.path.join(path, f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, os.path.join(path, MANIFEST_FILE))
+
+def _map_file(path: str):
+    """Memory-map a file read-only (empty files can't be mapped)."""
+    if os.path.getsize(path) == 0:
+        return b''
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def read_pointer(index_dir: str) -> Optional[str]:
+    """
+    Get the directory of the current bundle.
+    
+    Args:
+        index_dir: Index directory
+        
+    Returns:
+        Path of the bundle the pointer names, or None if there is no pointer
+    """
+    try:
+        with open(os.path.join(index_dir, POINTER_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(index_dir, VERSIONS_DIR, name) if name else None
+
+def write_pointer(index_dir: str, bundle_path: str) -> None:
+    """
+    Make a bundle the current one by atomically replacing the pointer file.
+    
+    Args:
+        index_dir: Index directory
+        bundle_path: Directory of the bundle, inside the versions directory
+    """
+    temp_path = os.path.join(index_dir, f".{POINTER_FILE}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(bundle_path))
+    os.replace(temp_path, os.path.join(index_dir, POINTER_FILE))
+
+def publish(index_dir: str, bundle: IndexBundle, keep: int = 2) -> None:
+    """
+    Make a bundle the current one and delete versions that are no longer needed.
+    
+    Args:
+        index_dir: Index directory
+        bundle: Bundle built in a new version directory
+        keep: Number of newest versions to keep; the current one is always kept
+    """
+    write_pointer(index_dir, bundle.path)
+    prune_versions(index_dir, keep)
+
+@contextmanager
+def build_lock(index_dir: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on an index directory across processes.
+    
+    Workers that start together with no usable bundle take this lock before
+    building one, so the first builds it and the others load its result.
+    
+    Args:
+        index_dir: Index directory
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, BUILD_LOCK_FILE), 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def new_version_path(index_dir: str) -> str:
+    """
+    Choose the directory for a new bundle version.
+    
+    Args:
+        index_dir: Index directory
+        
+    Returns:
+        Path of a directory that doesn't exist yet; names sort by creation time
+    """
+    return os.path.join(index_dir, VERSIONS_DIR, f"{time.time_ns()}-{os.getpid()}")
+
+def prune_versions(index_dir: str, keep: int = 2) -> None:
+    """
+    Delete old bundle versions, keeping the current one and the newest ones.
+    
+    Readers that still have an old version mapped keep working, since the
+    files are only unlinked. Versions still being built are the newest, so
+    they are never deleted.
+    
+    Args:
+        index_dir: Index directory
+        keep: Number of newest versions to keep; the current one is always kept
+    """
+    versions_dir = os.path.join(index_dir, VERSIONS_DIR)
+    current = read_pointer(index_dir)
+    try:
+        names = sorted(os.listdir(versions_dir))
+    except FileNotFoundError:
+        return
+        
+    for name in names[:-keep] if keep else names:
+        path = os.path.join(versions_dir, name)
+        if current is not None and name == os.path.basename(current):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed old index bundle {path}")
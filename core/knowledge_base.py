@@ -6,127 +6,252 @@ based on user queries.
 """
 
 import os
+import time
 import logging
+import threading
 import numpy as np
 import faiss
-import shutil
 from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer
+
+from core.embedding_cache import EmbeddingCache, normalize_query
+from core.model_registry import get_embedding_model, embedding_model_id
+from core.index_bundle import (IndexBundle, IndexBundleError, embedding_fingerprint, file_sha256,
+                               read_source, read_pointer, new_version_path, publish, build_lock)
+from utils.cache_utils import LRUCache
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+def chunker_settings() -> Dict[str, int]:
+    """
+    Get the chunker parameters from the settings.
+    
+    Returns:
+        Keyword arguments for split_chunks
+    """
+    return {
+        "min_size": settings.CHUNK_MIN_SIZE,
+        "max_size": settings.CHUNK_MAX_SIZE,
+        "overlap_lines": settings.CHUNK_OVERLAP_LINES
+    }
+
+class _LiveIndex:
+    """Index bundle and the FAISS index searched over it, swapped as one."""
+    
+    __slots__ = ("bundle", "index", "positions", "version")
+    
+    def __init__(self, bundle: IndexBundle):
+        self.bundle = bundle
+        self.index = bundle.index
+        # FAISS returns chunk ids; the bundle stores chunks by position
+        self.positions = {chunk_id: position for position, chunk_id in enumerate(bundle.ids.tolist())}
+        self.version = bundle.checksum[:12]
+
 class KnowledgeBase:
     """Class for knowledge base retrieval using FAISS."""
     
-    def __init__(self, index_path: str = None, kb_path: str = None):
+    def __init__(self, index_dir: str = None, kb_path: str = None,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 result_cache: Optional[LRUCache] = None):
         """
         Initialize the knowledge base.
         
         Args:
-            index_path: Path to the FAISS index file
+            index_dir: Directory of the index bundle (vectors and chunk texts)
             kb_path: Path to the knowledge base text file
+            embedding_cache: Query embedding cache, shared across rebuilds
+                (a private one is created if not provided)
+            result_cache: Cache of ranked search results for queries asked
+                without conversation history, keyed by knowledge base version
+                and normalized query (a private one is created if not provided)
         """
         # Set default paths if not provided
-        self.index_path = index_path or os.path.join('data', 'faiss_index', 'index.faiss')
-        self.kb_path = kb_path or os.path.join('data', 'knowledge_base.txt')
-        
-        # Check if we have the embeddings file in the root directory
-        root_embeddings_path = "embeddings#cs200#co50.faiss"
-        if os.path.exists(root_embeddings_path):
-            logger.info(f"Found embeddings file in root directory: {root_embeddings_path}")
-            
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-            
-            # Copy the embeddings file to the default location if it doesn't exist
-            if not os.path.exists(self.index_path):
-                try:
-                    shutil.copy(root_embeddings_path, self.index_path)
-                    logger.info(f"Copied embeddings from {root_embeddings_path} to {self.index_path}")
-                except Exception as e:
-                    logger.error(f"Error copying embeddings file: {e}")
+        self.index_dir = index_dir or settings.FAISS_INDEX_DIR
+        self.kb_path = kb_path or settings.KB_TEXT_PATH
+        if embedding_cache is None:
+            embedding_cache = EmbeddingCache(embedding_model_id(), maxsize=settings.EMBEDDING_CACHE_SIZE)
+        self.embedding_cache = embedding_cache
+        if result_cache is None:
+            result_cache = LRUCache(maxsize=settings.RESULT_CACHE_SIZE)
+        self.result_cache = result_cache
         
         # Ensure the knowledge base file exists with sample data if not present
         self._ensure_knowledge_base_exists()
         
-        # Load or create the FAISS index
-        try:
-            if os.path.exists(self.index_path):
-                self.index = faiss.read_index(self.index_path)
-                logger.info(f"FAISS index loaded from {self.index_path}")
-            else:
-                logger.warning(f"FAISS index not found at {self.index_path}, creating new index")
-                self._create_faiss_index()
-        except Exception as e:
-            logger.error(f"Error with FAISS index, creating new one: {e}")
-            self._create_faiss_index()
-        
-        # Load the embedding model
+        # Load the embedding model, or reuse the one this process already loaded
         try:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = get_embedding_model(settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND)
             logger.info("Sentence embedding model loaded")
         except Exception as e:
             logger.error(f"Error loading embedding model: {e}")
             raise
         
-        # Load text chunks
+        # Chunks and vectors are stored together, so the index ids always match the chunk list
+        self.chunker = chunker_settings()
+        self.fingerprint = embedding_fingerprint(embedding_model_id(),
+                                                 self.model.get_sentence_embedding_dimension())
         try:
-            self.chunks = self._load_text_chunks()
-            logger.info(f"Loaded {len(self.chunks)} text chunks from knowledge base")
-        except Exception as e:
-            logger.error(f"Error loading text chunks: {e}")
-            self._ensure_knowledge_base_exists()
-            self.chunks = self._load_text_chunks()
-            logger.info(f"Created and loaded {len(self.chunks)} sample text chunks")
+            bundle = self._load_current()
+        except (FileNotFoundError, IndexBundleError) as e:
+            logger.warning(f"Index bundle in {self.index_dir} not usable ({e}), rebuilding it")
+            # Workers starting together build it once; the others wait and load that build
+            with build_lock(self.index_dir):
+                try:
+                    bundle = self._load_current()
+                except (FileNotFoundError, IndexBundleError):
+                    bundle = self._create_bundle()
+            
+        # Searches read this once, so an update swaps chunks, index and version together
+        self._live = _LiveIndex(bundle)
+        self._update_lock = threading.Lock()
+        
+        # Other processes may publish a new bundle; check the pointer this often
+        # and load a new bundle in the background
+        self.refresh_interval = settings.INDEX_REFRESH_INTERVAL
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        self._refresher = None
+        self._refresher_lock = threading.Lock()
+        logger.info(f"Loaded {len(self.chunks)} text chunks from knowledge base")
+        
+        # Identify this knowledge base so cached results never outlive it
+        logger.info(f"Knowledge base version {self.version}")
+    
+    @property
+    def bundle(self) -> IndexBundle:
+        """Index bundle currently searched."""
+        return self._live.bundle
+    
+    @property
+    def chunks(self):
+        """Chunk texts currently searched."""
+        return self._live.bundle.chunks
+    
+    @property
+    def index(self) -> faiss.Index:
+        """FAISS index currently searched."""
+        return self._live.index
     
-    def _load_text_chunks(self) -> List[str]:
+    @property
+    def version(self) -> str:
+        """Version id that changes whenever the searchable content changes."""
+        return self._live.version
+    
+    def _load_current(self) -> IndexBundle:
         """
-        Load text chunks from the knowledge base file.
+        Load the current bundle, checking it was built from the knowledge base text.
         
         Returns:
-            List of text chunks
+            Loaded bundle
+            
+        Raises:
+            FileNotFoundError: If there is no current bundle
+            IndexBundleError: If the bundle is corrupt or doesn't match
         """
-        # Load and split the knowledge base into chunks
-        with open(self.kb_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        bundle_path = read_pointer(self.index_dir)
+        if bundle_path is None:
+            raise FileNotFoundError(f"No current index bundle in {self.index_dir}")
+        bundle = IndexBundle.load(bundle_path, self.chunker, self.fingerprint,
+                                  source_sha256=file_sha256(self.kb_path))
+        logger.info(f"Index bundle loaded from {bundle_path}")
+        return bundle
+    
+    def _create_bundle(self) -> IndexBundle:
+        """Chunk and embed the knowledge base text and save it as the index bundle."""
+        logger.info("Creating new index bundle")
         
-        # More sophisticated chunk splitting for better retrieval
-        # Split by sections based on headers and reasonable chunk sizes
-        lines = content.split('\n')
-        chunks = []
-        current_chunk = []
-        current_chunk_size = 0
+        content = read_source(self.kb_path)
         
-        for line in lines:
-            # If line is a potential header (short line with no ending punctuation)
-            is_header = len(line.strip()) < 80 and not line.strip().endswith(('.', '?', '!', ',', ';', ':'))
-            
-            # If we have a large enough chunk and this is a header, start a new chunk
-            if current_chunk_size > 300 and is_header:
-                chunks.append('\n'.join(current_chunk).strip())
-                current_chunk = []
-                current_chunk_size = 0
-            
-            # Add the line to the current chunk
-            current_chunk.append(line)
-            current_chunk_size += len(line)
-            
-            # If current chunk is very large, split it
-            if current_chunk_size > 1000:
-                chunks.append('\n'.join(current_chunk).strip())
-                current_chunk = []
-                current_chunk_size = 0
+        try:
+            bundle = IndexBundle.build(new_version_path(self.index_dir), content, self.model,
+                                       self.chunker, self.fingerprint)
+            publish(self.index_dir, bundle, keep=settings.INDEX_KEEP_VERSIONS)
+            return bundle
+        except Exception as e:
+            logger.error(f"Error creating index bundle: {e}")
+            raise
+    
+    def update(self, text: str) -> Dict[str, Any]:
+        """
+        Replace the knowledge base text, re-indexing only what changed.
         
-        # Add the last chunk if not empty
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk).strip())
+        Unchanged chunks keep their vectors and only edited and new chunks
+        are embedded. The result, including its FAISS index, is written as a
+        new bundle version and published by flipping the pointer file.
+        Searches keep using the old index until the new one is swapped in as
+        a whole.
         
-        # Filter out empty chunks
-        chunks = [chunk for chunk in chunks if chunk.strip()]
+        Args:
+            text: New knowledge base text
+            
+        Returns:
+            Dictionary with the new version, chunk counts and the time taken
+        """
+        started = time.monotonic()
         
-        logger.info(f"Split knowledge base into {len(chunks)} chunks")
-        return chunks
+        with self._update_lock:
+            live = self._live
+            try:
+                bundle, added, removed = live.bundle.update(text, self.model, path=new_version_path(self.index_dir))
+                
+                # The text first, so a process that follows the pointer finds matching text
+                _write_text(self.kb_path, text)
+                publish(self.index_dir, bundle, keep=settings.INDEX_KEEP_VERSIONS)
+            except Exception as e:
+                logger.error(f"Error updating knowledge base: {e}")
+                raise
+                
+            self._live = _LiveIndex(bundle)
+            
+        stats = {
+            "version": self.version,
+            "chunks": len(bundle.chunks),
+            "embedded": len(added),
+            "removed": len(removed),
+            "reused": len(bundle.chunks) - len(added),
+            "seconds": round(time.monotonic() - started, 3)
+        }
+        logger.info(f"Knowledge base updated to version {self.version}: {stats}")
+        return stats
+    
+    def refresh(self) -> bool:
+        """
+        Switch to the current bundle if another process has published a new one.
         
+        Returns:
+            True if a new bundle was loaded
+        """
+        bundle_path = read_pointer(self.index_dir)
+        if bundle_path is None or bundle_path == self._live.bundle.path:
+            return False
+            
+        # An update in this process will publish its own bundle
+        if not self._update_lock.acquire(blocking=False):
+            return False
+        try:
+            bundle = IndexBundle.load(bundle_path, self.chunker, self.fingerprint)
+            self._live = _LiveIndex(bundle)
+        except (FileNotFoundError, IndexBundleError) as e:
+            logger.warning(f"Could not load the published index bundle {bundle_path}: {e}")
+            return False
+        finally:
+            self._update_lock.release()
+            
+        logger.info(f"Switched to knowledge base version {self.version} from {bundle_path}")
+        return True
+        
+    def _refresh_in_background(self) -> None:
+        """Start loading a bundle published by another process, if the pointer has moved."""
+        # Reading the pointer is cheap; loading and verifying a bundle is not
+        bundle_path = read_pointer(self.index_dir)
+        if bundle_path is None or bundle_path == self._live.bundle.path:
+            return
+            
+        with self._refresher_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self.refresh, name="index-refresh", daemon=True)
+            self._refresher.start()
+    
     def _ensure_knowledge_base_exists(self):
         """
         Ensure the knowledge base file exists with sample data.
@@ -163,36 +288,18 @@ Fort Wise is open to visitors daily from 9am to 5pm from April through October,
             
             with open(self.kb_path, 'w', encoding='utf-8') as file:
                 file.write(sample_data)
-                
-    def _create_faiss_index(self):
-        """
-        Create a new FAISS index from the knowledge base text.
+    
+    def encode_query(self, text: str) -> np.ndarray:
         """
-        logger.info("Creating new FAISS index")
-        
-        # Load embedding model
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Load text chunks
-        self.chunks = self._load_text_chunks()
-        
-        # Create embeddings
-        embeddings = self.model.encode(self.chunks)
-        
-        # Set dimensions
-        dimension = embeddings.shape[1]
-        
-        # Create the index
-        self.index = faiss.IndexFlatL2(dimension)
-        
-        # Add the embeddings to the index
-        self.index.add(embeddings.astype('float32'))
+        Get the embedding vector for a query, using the embedding cache.
         
-        # Save the index
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        faiss.write_index(self.index, self.index_path)
+        Args:
+            text: Query text
         
-        logger.info(f"Created and saved FAISS index with {len(self.chunks)} chunks at {self.index_path}")
+        Returns:
+            Embedding vector (float32)
+        """
+        return self.embedding_cache.get_or_encode(self.model, text)
     
     def search(self, query: str, n_results: int = 5, 
                conversation_history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
@@ -221,19 +328,37 @@ Fort Wise is open to visitors daily from 9am to 5pm from April through October,
             else:
                 enhanced_query = query
             
+            # Pick up bundles published by other processes; this search still uses the current one
+            now = time.monotonic()
+            if now >= self._next_refresh:
+                self._next_refresh = now + self.refresh_interval
+                self._refresh_in_background()
+                
+            # Serve repeated queries against this knowledge base version from the cache.
+            # Follow-up queries carry their own conversation, so they would never
+            # repeat; only queries searched on their own are cached.
+            live = self._live
+            cache_key = None
+            if not conversation_history:
+                cache_key = (live.version, normalize_query(query), n_results)
+                cached_results = self.result_cache.get(cache_key)
+                if cached_results is not None:
+                    logger.info(f"Returning {len(cached_results)} cached chunks")
+                    return [dict(result) for result in cached_results]
+            
             # Create vector embedding for the query
-            query_vector = self.model.encode([enhanced_query])[0]
+            query_vector = self.encode_query(enhanced_query)
             query_vector = np.array([query_vector]).astype('float32')
             
             # Search the index - increase number of results for filtering
-            distances, indices = self.index.search(query_vector, k=n_results * 2)
+            distances, indices = live.index.search(query_vector, k=n_results * 2)
             
             # Collect results
             results = []
             for i, idx in enumerate(indices[0]):
                 if idx != -1:  # Valid index
                     results.append({
-                        "chunk": self.chunks[idx],
+                        "chunk": live.bundle.chunks[live.positions[int(idx)]],
                         "score": float(distances[0][i]),
                         "index": int(idx)
                     })
@@ -250,8 +375,18 @@ Fort Wise is open to visitors daily from 9am to 5pm from April through October,
             
             logger.info(f"Found {len(relevant_results)} relevant chunks out of {len(results)} total matches")
             
+            if cache_key is not None:
+                self.result_cache.put(cache_key, [dict(result) for result in relevant_results])
+            
             return relevant_results
             
         except Exception as e:
             logger.error(f"Error during knowledge base search: {e}")
-            raise
\ No newline at end of file
+            raise
+
+def _write_text(path: str, text: str) -> None:
+    """Replace a text file atomically."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+        file.write(text)
+    os.replace(temp_path, path)
@@ -6,8 +6,11 @@ This module handles generating responses using OpenAI's GPT models.
 
 import os
 import logging
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+
+from core.openai_client import get_client, get_async_client
+from config import settings
+from core.phrase_bank import ERROR_RESPONSE, EMPTY_RESPONSE
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +24,13 @@ class LanguageModel:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        openai.api_key = self.api_key
-        
         # Set the model to use
         self.model = "o4-mini-2025-04-16"  # As specified in requirements
         
+        # Per-call timeout (seconds) and retry budget on the shared client
+        self.timeout = settings.LLM_TIMEOUT
+        self.max_retries = settings.LLM_MAX_RETRIES
+        
         # System prompt template
         self.system_prompt = """
         You are the Fort Wise Voice AI Assistant, a helpful and knowledgeable assistant for Fort Wise AI agency.
@@ -48,6 +53,60 @@ class LanguageModel:
         
         logger.info(f"Language Model initialized with model: {self.model}")
     
+    def _build_messages(self, query: str, context: List[Dict[str, Any]],
+                        conversation_history: Optional[List[Dict[str, str]]] = None,
+                        user_info: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat messages sent to the OpenAI API.
+        
+        Args:
+            query: User query
+            context: Retrieved context chunks
+            conversation_history: Optional conversation history
+            user_info: Optional user information
+        
+        Returns:
+            List of chat messages
+        """
+        # Format context for prompt
+        formatted_context = "\n\n".join([item["chunk"] for item in context])
+        
+        # Check if any relevant context was found
+        context_found = len(context) > 0 and any(item["score"] < 1.0 for item in context)
+        
+        # Create messages for OpenAI API
+        system_prompt = self.system_prompt
+        
+        # Add user information to system prompt if available
+        if user_info and len(user_info) > 0:
+            user_info_str = "User Information:\n"
+            for key, value in user_info.items():
+                user_info_str += f"- {key.capitalize()}: {value}\n"
+            system_prompt += f"\n\n{user_info_str}"
+            system_prompt += "\nUse the user's name when appropriate to make the conversation more personalized."
+        
+        # Modify system prompt if no relevant context found
+        if not context_found:
+            system_prompt += "\n\nIf no relevant information is found in the context, provide a helpful answer based on your general knowledge. Remember that you should engage in natural conversation and acknowledge personal information the user has shared."
+        
+        messages = [
+            {"role": "system", "content": system_prompt}
+        ]
+        
+        # Add conversation history for context
+        if conversation_history:
+            # Only include the last few exchanges to keep context manageable
+            recent_history = conversation_history[-3:]  # Last 3 exchanges
+            for exchange in recent_history:
+                messages.append({"role": "user", "content": exchange["query"]})
+                messages.append({"role": "assistant", "content": exchange["response"]})
+        
+        # Add current query with context
+        user_message = f"Query: {query}\n\nContext from Fort Wise Knowledge Base:\n{formatted_context}"
+        messages.append({"role": "user", "content": user_message})
+        
+        return messages
+    
     def generate_response(self, query: str, context: List[Dict[str, Any]], 
                           conversation_history: Optional[List[Dict[str, str]]] = None,
                           user_info: Optional[Dict[str, Any]] = None) -> str:
@@ -66,49 +125,14 @@ class LanguageModel:
         logger.info(f"Generating response for query: {query}")
         
         try:
-            # Format context for prompt
-            formatted_context = "\n\n".join([item["chunk"] for item in context])
-            
-            # Check if any relevant context was found
-            context_found = len(context) > 0 and any(item["score"] < 1.0 for item in context)
-            
-            # Create messages for OpenAI API
-            system_prompt = self.system_prompt
-            
-            # Add user information to system prompt if available
-            if user_info and len(user_info) > 0:
-                user_info_str = "User Information:\n"
-                for key, value in user_info.items():
-                    user_info_str += f"- {key.capitalize()}: {value}\n"
-                system_prompt += f"\n\n{user_info_str}"
-                system_prompt += "\nUse the user's name when appropriate to make the conversation more personalized."
-            
-            # Modify system prompt if no relevant context found
-            if not context_found:
-                system_prompt += "\n\nIf no relevant information is found in the context, provide a helpful answer based on your general knowledge. Remember that you should engage in natural conversation and acknowledge personal information the user has shared."
-            
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Add conversation history for context
-            if conversation_history:
-                # Only include the last few exchanges to keep context manageable
-                recent_history = conversation_history[-3:]  # Last 3 exchanges
-                for exchange in recent_history:
-                    messages.append({"role": "user", "content": exchange["query"]})
-                    messages.append({"role": "assistant", "content": exchange["response"]})
-            
-            # Add current query with context
-            user_message = f"Query: {query}\n\nContext from Fort Wise Knowledge Base:\n{formatted_context}"
-            messages.append({"role": "user", "content": user_message})
+            messages = self._build_messages(query, context, conversation_history, user_info)
             
             # Call OpenAI API
             logger.info(f"Sending request to OpenAI API with {len(messages)} messages")
             for idx, msg in enumerate(messages):
                 logger.debug(f"Message {idx}: {msg['role']} - {msg['content'][:50]}...")
                 
-            response = openai.chat.completions.create(
+            response = get_client(self.timeout, self.max_retries).chat.completions.create(
                 model=self.model,
                 messages=messages,
                 max_completion_tokens=500,
@@ -123,26 +147,256 @@ class LanguageModel:
             response_text = response.choices[0].message.content
             logger.debug(f"Raw response text: '{response_text}'")
             
-            # Check for empty response
-            if not response_text or response_text.strip() == "":
-                logger.warning("Empty response from OpenAI API, using fallback")
-                if user_info and "name" in user_info:
-                    response_text = f"I'm sorry {user_info['name']}, I couldn't generate a proper response to your question. Could you please try asking in a different way?"
-                else:
-                    response_text = "I'm sorry, I couldn't generate a proper response to your question. Could you please try asking in a different way?"
+            return self._finalize_response(response_text, query, user_info)
+            
+        except Exception as e:
+            logger.error(f"Error during response generation: {e}")
+            
+            # Fallback response in case of API failure
+            fallback_response = ERROR_RESPONSE
+            return fallback_response
+    
+    def generate_response_stream(self, query: str, context: List[Dict[str, Any]],
+                                 conversation_history: Optional[List[Dict[str, str]]] = None,
+                                 user_info: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generate a response using the language model, yielding text as it is produced.
+        
+        Args:
+            query: User query
+            context: Retrieved context chunks
+            conversation_history: Optional conversation history
+            user_info: Optional user information
+        
+        Yields:
+            Fragments of the generated response text
+            
+        Raises:
+            Exception: If the API call fails after part of the response was yielded
+        """
+        logger.info(f"Generating streamed response for query: {query}")
+        
+        produced_text = False
+        name = self._name_to_confirm(query, user_info)
+        held = []
+        try:
+            messages = self._build_messages(query, context, conversation_history, user_info)
+            
+            # Call OpenAI API with streaming enabled
+            logger.info(f"Sending streaming request to OpenAI API with {len(messages)} messages")
+            stream = get_client(self.timeout, self.max_retries).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_completion_tokens=500,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    produced_text = produced_text or bool(delta.strip())
+                    
+                    # Hold the text back until it mentions the name, see _finalize_response
+                    if name is not None:
+                        held.append(delta)
+                        if name.lower() in "".join(held).lower():
+                            name = None
+                            yield "".join(held)
+                        continue
+                    yield delta
+                    
+            if name is not None and produced_text:
+                yield f"Your name is {name}. " + "".join(held)
+        
+        except Exception as e:
+            logger.error(f"Error during streamed response generation: {e}")
+            
+            # The caller already has partial text, so it must not be taken for a complete answer
+            if produced_text and name is None:
+                raise
+                
+            # Fallback response in case of API failure
+            produced_text = True
+            yield ERROR_RESPONSE
+        
+        # Check for empty response
+        if not produced_text:
+            logger.warning("Empty streamed response from OpenAI API, using fallback")
+            yield self._empty_response(user_info)
+
+    async def agenerate_response(self, query: str, context: List[Dict[str, Any]],
+                                 conversation_history: Optional[List[Dict[str, str]]] = None,
+                                 user_info: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate a response using the language model without blocking the event loop.
+        
+        Args:
+            query: User query
+            context: Retrieved context chunks
+            conversation_history: Optional conversation history
+            user_info: Optional user information
+            
+        Returns:
+            Generated response text
+        """
+        logger.info(f"Generating response for query: {query}")
+        
+        try:
+            messages = self._build_messages(query, context, conversation_history, user_info)
+            
+            # Call OpenAI API
+            logger.info(f"Sending async request to OpenAI API with {len(messages)} messages")
+            response = await get_async_client(self.timeout, self.max_retries).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_completion_tokens=500,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0
+            )
             
-            # If we have user info but the response ignores the user's name,
-            # and the query is conversational, add a personalized touch
-            if user_info and "name" in user_info and "what's my name" in query.lower():
-                if user_info["name"].lower() not in response_text.lower():
-                    response_text = f"Your name is {user_info['name']}. {response_text}"
+            response_text = response.choices[0].message.content
+            logger.debug(f"Raw response text: '{response_text}'")
             
-            logger.info(f"Generated response: {response_text[:50]}...")
-            return response_text
+            return self._finalize_response(response_text, query, user_info)
             
         except Exception as e:
             logger.error(f"Error during response generation: {e}")
             
             # Fallback response in case of API failure
-            fallback_response = "I'm sorry, I encountered an error while processing your request. Please try again."
-            return fallback_response
\ No newline at end of file
+            return ERROR_RESPONSE
+    
+    async def agenerate_response_stream(self, query: str, context: List[Dict[str, Any]],
+                                        conversation_history: Optional[List[Dict[str, str]]] = None,
+                                        user_info: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Generate a response using the language model, yielding text as it is
+        produced without blocking the event loop.
+        
+        Args:
+            query: User query
+            context: Retrieved context chunks
+            conversation_history: Optional conversation history
+            user_info: Optional user information
+            
+        Yields:
+            Fragments of the generated response text
+            
+        Raises:
+            Exception: If the API call fails after part of the response was yielded
+        """
+        logger.info(f"Generating streamed response for query: {query}")
+        
+        produced_text = False
+        name = self._name_to_confirm(query, user_info)
+        held = []
+        try:
+            messages = self._build_messages(query, context, conversation_history, user_info)
+            
+            # Call OpenAI API with streaming enabled
+            logger.info(f"Sending async streaming request to OpenAI API with {len(messages)} messages")
+            stream = await get_async_client(self.timeout, self.max_retries).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_completion_tokens=500,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0,
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    produced_text = produced_text or bool(delta.strip())
+                    
+                    # Hold the text back until it mentions the name, see _finalize_response
+                    if name is not None:
+                        held.append(delta)
+                        if name.lower() in "".join(held).lower():
+                            name = None
+                            yield "".join(held)
+                        continue
+                    yield delta
+                    
+            if name is not None and produced_text:
+                yield f"Your name is {name}. " + "".join(held)
+                    
+        except Exception as e:
+            logger.error(f"Error during streamed response generation: {e}")
+            
+            # The caller already has partial text, so it must not be taken for a complete answer
+            if produced_text and name is None:
+                raise
+                
+            # Fallback response in case of API failure
+            produced_text = True
+            yield ERROR_RESPONSE
+                
+        # Check for empty response
+        if not produced_text:
+            logger.warning("Empty streamed response from OpenAI API, using fallback")
+            yield self._empty_response(user_info)
+    
+    def _finalize_response(self, response_text: Optional[str], query: str,
+                           user_info: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Apply fallbacks and personalization to a complete response.
+        
+        Args:
+            response_text: Raw response text from the API
+            query: User query
+            user_info: Optional user information
+            
+        Returns:
+            Final response text
+        """
+        # Check for empty response
+        if not response_text or response_text.strip() == "":
+            logger.warning("Empty response from OpenAI API, using fallback")
+            response_text = self._empty_response(user_info)
+            
+        # If we have user info but the response ignores the user's name,
+        # and the query is conversational, add a personalized touch
+        name = self._name_to_confirm(query, user_info)
+        if name is not None and name.lower() not in response_text.lower():
+            response_text = f"Your name is {name}. {response_text}"
+                
+        logger.info(f"Generated response: {response_text[:50]}...")
+        return response_text
+    
+    def _name_to_confirm(self, query: str, user_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Get the name a response must mention when the user asked for it.
+        
+        Args:
+            query: User query
+            user_info: Optional user information
+            
+        Returns:
+            The user's name, or None if the query doesn't ask for it
+        """
+        if user_info and "name" in user_info and "what's my name" in query.lower():
+            return user_info["name"]
+        return None
+    
+    def _empty_response(self, user_info: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Get the fallback used when the API returns no text.
+        
+        Args:
+            user_info: Optional user information
+            
+        Returns:
+            Fallback response text
+        """
+        if user_info and "name" in user_info:
+            return f"I'm sorry {user_info['name']}, I couldn't generate a proper response to your question. Could you please try asking in a different way?"
+        return EMPTY_RESPONSE
@@ -0,0 +1,207 @@
+"""
+Model Registry Module
+
+This module loads the models used by the application once per process and
+hands the same instance to every component that asks for it, so rebuilding
+the knowledge base never loads the embedding model again. Models that are
+safe to use after a fork are kept when gunicorn forks its workers from a
+preloaded app (preload_app), so all workers share their memory
+copy-on-write; the others are reloaded in each worker.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class _ModelEntry:
+    """Loaded model with its load cost."""
+    
+    __slots__ = ("model", "fork_safe", "load_seconds", "rss_delta", "pid")
+    
+    def __init__(self, model: Any, fork_safe: bool, load_seconds: float, rss_delta: Optional[int], pid: int):
+        self.model = model
+        self.fork_safe = fork_safe
+        self.load_seconds = load_seconds
+        self.rss_delta = rss_delta
+        self.pid = pid
+
+_models: Dict[Tuple, _ModelEntry] = {}
+_lock = threading.Lock()
+
+def get_model(kind: str, name: str, loader: Callable[[], Any], fork_safe: bool = True,
+              options: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Get a model, loading it on first use in this process.
+    
+    Args:
+        kind: Model kind, e.g. 'embedding' or 'stt'
+        name: Model name or path
+        loader: Function that loads the model
+        fork_safe: Whether a forked worker may keep using a model loaded by
+            its parent; otherwise each worker loads its own
+        options: Load options that make a different instance (part of the key)
+        
+    Returns:
+        The shared model instance
+    """
+    key = (kind, name, tuple(sorted((options or {}).items())))
+    entry = _models.get(key)
+    if entry is not None:
+        return entry.model
+        
+    with _lock:
+        entry = _models.get(key)
+        if entry is None:
+            rss_before = process_memory().get("rss_bytes")
+            started = time.monotonic()
+            try:
+                model = loader()
+            except Exception as e:
+                logger.error(f"Error loading {kind} model {name}: {str(e)}")
+                raise
+            load_seconds = time.monotonic() - started
+            rss_after = process_memory().get("rss_bytes")
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            
+            entry = _ModelEntry(model, fork_safe, load_seconds, rss_delta, os.getpid())
+            _models[key] = entry
+            logger.info(f"Loaded {kind} model {name} in {load_seconds:.2f}s"
+                        + (f", RSS +{rss_delta / 1024 / 1024:.1f} MB" if rss_delta is not None else ""))
+        return entry.model
+
+# CPU inference backends for the embedding model
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+
+def embedding_model_id(name: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """
+    Identify an embedding model and backend for caches and index bundles.
+    
+    Vectors from different backends differ slightly, so each backend gets its
+    own id; the PyTorch backend keeps the bare model name.
+    
+    Args:
+        name: SentenceTransformer model name (defaults to EMBEDDING_MODEL)
+        backend: Embedding backend (defaults to EMBEDDING_BACKEND)
+        
+    Returns:
+        Model id
+    """
+    name = name or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    return name if backend == "torch" else f"{name}:{backend}"
+
+def get_embedding_model(name: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Get the sentence embedding model shared by this process.
+    
+    Args:
+        name: SentenceTransformer model name (defaults to EMBEDDING_MODEL)
+        backend: 'torch' (full precision PyTorch), 'int8' (PyTorch with
+            dynamically quantized linear layers) or 'onnx' (ONNX Runtime,
+            needs optimum[onnxruntime]); defaults to EMBEDDING_BACKEND
+        
+    Returns:
+        Shared SentenceTransformer instance
+    """
+    name = name or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Invalid embedding backend '{backend}'. Must be one of {list(EMBEDDING_BACKENDS)}")
+    
+    def load():
+        from sentence_transformers import SentenceTransformer
+        
+        if backend == "onnx":
+            # A pre-exported (optionally quantized) ONNX file from the model repository, or an export
+            model_kwargs = {"file_name": settings.EMBEDDING_ONNX_FILE} if settings.EMBEDDING_ONNX_FILE else None
+            try:
+                return SentenceTransformer(name, backend="onnx", model_kwargs=model_kwargs)
+            except ImportError:
+                raise ImportError("The optimum[onnxruntime] package is required for EMBEDDING_BACKEND=onnx")
+                
+        model = SentenceTransformer(name)
+        if backend == "int8":
+            import torch
+            # Weights of the linear layers, where nearly all the time goes, become int8
+            torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+        
+    return get_model("embedding", name, load, options={"backend": backend})
+
+def _after_fork() -> None:
+    """Drop models a forked worker can't use and apply the worker's thread settings."""
+    global _lock
+    _lock = threading.Lock()
+    
+    for key in [key for key, entry in _models.items() if not entry.fork_safe]:
+        del _models[key]
+        
+    # Workers share the CPU, so each one gets only a few intra-op threads
+    if settings.EMBEDDING_THREADS and any(key[0] == "embedding" for key in _models):
+        import torch
+        torch.set_num_threads(settings.EMBEDDING_THREADS)
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """
+    Measure this process's memory use.
+    
+    RSS counts pages shared with other workers in full; PSS divides them
+    among the processes sharing them, so it shows what copy-on-write saves.
+    
+    Returns:
+        Dictionary with rss_bytes, pss_bytes and shared_bytes (None where the
+        platform doesn't report them)
+    """
+    memory = {"rss_bytes": None, "pss_bytes": None, "shared_bytes": None}
+    try:
+        # Linux: summed over all mappings
+        with open("/proc/self/smaps_rollup", "r") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+        memory["rss_bytes"] = fields.get("Rss")
+        memory["pss_bytes"] = fields.get("Pss")
+        memory["shared_bytes"] = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    except OSError:
+        try:
+            import resource
+            import sys
+            # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            memory["rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            pass
+    return memory
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Get loaded models and this process's memory use.
+    
+    Returns:
+        Dictionary with per-model load time, RSS growth and whether the model
+        was inherited from the parent process, plus process memory
+    """
+    pid = os.getpid()
+    return {
+        "pid": pid,
+        "models": {
+            ":".join([kind, name] + [str(value) for _, value in options]): {
+                "load_seconds": round(entry.load_seconds, 3),
+                "rss_delta_bytes": entry.rss_delta,
+                # Loaded before the fork and shared copy-on-write with the other workers
+                "inherited": entry.pid != pid
+            }
+            for (kind, name, options), entry in list(_models.items())
+        },
+        "memory": process_memory()
+    }
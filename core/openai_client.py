@@ -0,0 +1,259 @@
+"""
+OpenAI Client Module
+
+This module provides the OpenAI clients shared by the speech, language model
+and TTS modules. Each process holds one synchronous and one asynchronous
+client with a tuned, keep-alive connection pool, so calls reuse warm
+connections instead of paying for a TCP and TLS handshake every time.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+import openai
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# One client of each kind per process; connection pools must not be shared across a fork
+_client = None
+_async_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+class PoolMetrics:
+    """Counters for requests and connections made through a shared client."""
+    
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Zero the counters."""
+        self.requests = 0
+        self.responses = 0
+        self.error_responses = 0
+        self.tcp_connects = 0
+        self.tls_handshakes = 0
+        self.time_to_headers = 0.0
+    
+    def incr(self, name: str, amount: float = 1) -> None:
+        """
+        Increment a counter.
+        
+        Args:
+            name: Counter name
+            amount: Amount to add
+        """
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+    
+    def on_request(self, request: httpx.Request) -> None:
+        """
+        Count an outgoing request and trace its connection setup.
+        
+        Args:
+            request: Outgoing HTTP request
+        """
+        self.incr("requests")
+        request.extensions["trace"] = self.trace
+        request.extensions["fw_start"] = time.monotonic()
+    
+    def on_response(self, response: httpx.Response) -> None:
+        """
+        Record the time until a response's headers arrived.
+        
+        Args:
+            response: HTTP response, before its body is read
+        """
+        started = response.request.extensions.get("fw_start")
+        with self._lock:
+            self.responses += 1
+            if started is not None:
+                self.time_to_headers += time.monotonic() - started
+            if response.status_code >= 400:
+                self.error_responses += 1
+    
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """
+        Count new connections from httpcore trace events.
+        
+        Args:
+            event_name: Trace event name
+            info: Trace event details
+        """
+        if event_name == "connection.connect_tcp.complete":
+            self.incr("tcp_connects")
+        elif event_name == "connection.start_tls.complete":
+            self.incr("tls_handshakes")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the counters.
+        
+        Returns:
+            Dictionary of request and connection counters
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "error_responses": self.error_responses,
+                "tcp_connects": self.tcp_connects,
+                "tls_handshakes": self.tls_handshakes,
+                # Share of requests that went out on an already open connection
+                "connection_reuse": round(1 - self.tcp_connects / self.requests, 4) if self.requests else 0.0,
+                "avg_time_to_headers": round(self.time_to_headers / self.responses, 4) if self.responses else 0.0
+            }
+
+class AsyncPoolMetrics(PoolMetrics):
+    """Pool metrics with the coroutine hooks an async HTTP client expects."""
+    
+    async def on_request(self, request: httpx.Request) -> None:
+        self.incr("requests")
+        request.extensions["trace"] = self.atrace
+        request.extensions["fw_start"] = time.monotonic()
+    
+    async def on_response(self, response: httpx.Response) -> None:
+        PoolMetrics.on_response(self, response)
+    
+    async def atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.trace(event_name, info)
+
+metrics = PoolMetrics()
+async_metrics = AsyncPoolMetrics()
+
+def _http_options() -> Dict[str, Any]:
+    """Build the connection pool options shared by both HTTP clients."""
+    http2 = settings.OPENAI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("OPENAI_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+            
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+    }
+
+def _create_clients() -> None:
+    """Create this process's clients. Caller must hold the lock."""
+    global _client, _async_client, _client_pid
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable not set")
+        
+    options = _http_options()
+    
+    # Counters inherited from a parent process describe its connections, not ours
+    metrics.reset()
+    async_metrics.reset()
+    
+    _client = openai.OpenAI(
+        api_key=api_key,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.Client(
+            event_hooks={"request": [metrics.on_request], "response": [metrics.on_response]}, **options
+        )
+    )
+    _async_client = openai.AsyncOpenAI(
+        api_key=api_key,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            event_hooks={"request": [async_metrics.on_request], "response": [async_metrics.on_response]}, **options
+        )
+    )
+    _client_pid = os.getpid()
+    
+    logger.info(f"OpenAI clients initialized with max_connections={settings.OPENAI_MAX_CONNECTIONS}, "
+                f"http2={options['http2']}")
+
+def _ensure_clients() -> None:
+    """Create the clients in this process if they don't exist yet."""
+    if _client is not None and _client_pid == os.getpid():
+        return
+        
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _create_clients()
+
+def get_client(timeout: Optional[float] = None, max_retries: Optional[int] = None) -> openai.OpenAI:
+    """
+    Get the process-wide OpenAI client.
+    
+    Args:
+        timeout: Optional read timeout for calls made through the returned client
+        max_retries: Optional retry budget for calls made through the returned client
+    
+    Returns:
+        Shared OpenAI client, or a copy with the given options that uses the
+        same connection pool
+    """
+    _ensure_clients()
+    return _with_options(_client, timeout, max_retries)
+    
+def get_async_client(timeout: Optional[float] = None, max_retries: Optional[int] = None) -> openai.AsyncOpenAI:
+    """
+    Get the process-wide asynchronous OpenAI client.
+            
+    Args:
+        timeout: Optional read timeout for calls made through the returned client
+        max_retries: Optional retry budget for calls made through the returned client
+        
+    Returns:
+        Shared AsyncOpenAI client, or a copy with the given options that uses
+        the same connection pool
+    """
+    _ensure_clients()
+    return _with_options(_async_client, timeout, max_retries)
+
+def _with_options(client, timeout: Optional[float], max_retries: Optional[int]):
+    """Apply per-call options to a client without creating a new connection pool."""
+    options = {}
+    if timeout is not None:
+        options["timeout"] = httpx.Timeout(timeout, connect=settings.OPENAI_CONNECT_TIMEOUT)
+    if max_retries is not None:
+        options["max_retries"] = max_retries
+    return client.with_options(**options) if options else client
+
+def _pool_connections(client) -> Dict[str, int]:
+    """Count open and idle connections in a client's pool."""
+    # httpx doesn't expose its pool, so look it up defensively
+    pool = getattr(getattr(client._client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return {
+        "open_connections": len(connections),
+        "idle_connections": sum(1 for connection in connections if connection.is_idle())
+    }
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool statistics for this process's clients.
+    
+    Returns:
+        Dictionary with pool limits and per-client request and connection counters
+    """
+    stats = {
+        "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE,
+        "keepalive_expiry": settings.OPENAI_KEEPALIVE_EXPIRY,
+        "sync": metrics.get_stats(),
+        "async": async_metrics.get_stats()
+    }
+    if _client is not None and _client_pid == os.getpid():
+        stats["sync"].update(_pool_connections(_client))
+        stats["async"].update(_pool_connections(_async_client))
+    return stats
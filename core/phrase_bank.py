@@ -0,0 +1,88 @@
+"""
+Phrase Bank Module
+
+This module holds the fixed phrases the assistant speaks (errors and
+fallbacks) and pre-renders their audio into the TTS cache, so those paths
+don't wait on a TTS request. Rendering runs in the background at startup;
+a process that hasn't rendered a phrase itself (a forked worker, say) picks
+up the audio another one left in the cache.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Canned phrases
+NO_SPEECH_RESPONSE = "I couldn't understand your question. Please try again."
+FALLBACK_RESPONSE = "I'm sorry, I couldn't generate a proper response. Please try asking again."
+ERROR_RESPONSE = "I'm sorry, I encountered an error while processing your request. Please try again."
+EMPTY_RESPONSE = "I'm sorry, I couldn't generate a proper response to your question. Could you please try asking in a different way?"
+
+CANNED_PHRASES = {
+    "no_speech": NO_SPEECH_RESPONSE,
+    "fallback": FALLBACK_RESPONSE,
+    "error": ERROR_RESPONSE,
+    "empty": EMPTY_RESPONSE,
+}
+
+class PhraseBank:
+    """Class for serving pre-rendered audio of canned phrases."""
+    
+    def __init__(self, tts, voices: Optional[List[str]] = None):
+        """
+        Initialize the phrase bank.
+        
+        Args:
+            tts: TextToSpeech instance with a cache, used to render the phrases
+            voices: Voices to pre-render (defaults to the TTS default voice)
+        """
+        self.tts = tts
+        self.voices = voices or [tts.voice]
+        
+        # (text, voice) -> path of the rendered audio
+        self._audio: Dict[Tuple[str, str], str] = {}
+    
+    def prerender(self) -> int:
+        """
+        Render every canned phrase for every configured voice.
+        
+        Phrases already in the TTS cache are picked up from disk; only missing
+        ones are synthesized. Failures are logged and skipped, so a TTS outage
+        doesn't prevent startup.
+        
+        Returns:
+            Number of phrases available
+        """
+        for voice in self.voices:
+            for name, text in CANNED_PHRASES.items():
+                try:
+                    path = self.tts.synthesize_cached(text, voice=voice)
+                    self.tts.cache.pin(path)
+                    self._audio[(text, voice)] = path
+                except Exception as e:
+                    logger.error(f"Error pre-rendering phrase '{name}' for voice {voice}: {e}")
+                    
+        logger.info(f"Phrase bank ready with {len(self._audio)} phrases for voices {self.voices}")
+        return len(self._audio)
+    
+    def get(self, text: str, voice: Optional[str] = None) -> Optional[str]:
+        """
+        Get the pre-rendered audio for a phrase.
+        
+        Args:
+            text: Phrase text
+            voice: Voice (defaults to the TTS default voice)
+            
+        Returns:
+            Path to the audio file, or None if the phrase isn't pre-rendered
+        """
+        voice = voice or self.tts.voice
+        path = self._audio.get((text, voice))
+        if path is None and text in CANNED_PHRASES.values() and voice in self.voices:
+            # Rendered by another process, or by this one's startup render in progress
+            path = self.tts.cached_path(text, voice=voice)
+            if path is not None:
+                self.tts.cache.pin(path)
+                self._audio[(text, voice)] = path
+        return path
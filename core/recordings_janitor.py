@@ -0,0 +1,212 @@
+"""
+Recordings Janitor Module
+
+This module keeps the recordings directory bounded. A background thread
+periodically deletes recordings that are too old and, oldest first, as many
+more as needed to stay under the size and file count limits.
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.tts_cache import TTSCache
+
+logger = logging.getLogger(__name__)
+
+class RecordingsJanitor:
+    """Class for enforcing retention limits on the recordings directory."""
+    
+    def __init__(self, recordings_dir: str, max_bytes: int = 500 * 1024 * 1024,
+                 max_age: float = 86400, max_files: int = 10000, min_age: float = 300,
+                 interval: float = 60, tts_cache: Optional[TTSCache] = None):
+        """
+        Initialize the recordings janitor.
+        
+        Args:
+            recordings_dir: Directory to clean, including its subdirectories
+            max_bytes: Maximum total size of the recordings
+            max_age: Seconds after its last modification when a recording is deleted
+            max_files: Maximum number of recordings
+            min_age: Recordings modified more recently than this are never deleted,
+                so uploads and turns still being processed are left alone
+            interval: Seconds between cleanup runs
+            tts_cache: TTS cache whose files must be left to its own eviction
+        """
+        self.recordings_dir = recordings_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_files = max_files
+        self.min_age = min_age
+        self.interval = interval
+        self.tts_cache = tts_cache
+        
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        
+        # Totals as of the last run
+        self.files = 0
+        self.bytes = 0
+        self.oldest_age = 0.0
+        self.runs = 0
+        self.deleted_files = 0
+        self.deleted_bytes = 0
+        self.last_run_seconds = 0.0
+        
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        
+        # Threads don't survive a fork, so forked workers restart the janitor
+        os.register_at_fork(after_in_child=self._after_fork)
+        
+        logger.info(f"Recordings janitor initialized for {recordings_dir} with max_bytes={max_bytes}, "
+                    f"max_age={max_age}s, max_files={max_files}")
+    
+    def start(self) -> None:
+        """Start the background cleanup thread in this process if it isn't running."""
+        # Threads don't survive a fork, so check the pid as well
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="recordings-janitor", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+    
+    def _after_fork(self) -> None:
+        """Restart the cleanup thread in a forked worker if the parent was running one."""
+        self._lock = threading.Lock()
+        if self._thread is not None and not self._stop.is_set():
+            self._thread = None
+            self.start()
+    
+    def stop(self) -> None:
+        """Stop the background cleanup thread."""
+        self._stop.set()
+    
+    def _run_loop(self) -> None:
+        """Clean up immediately, then every interval seconds."""
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                logger.error(f"Error cleaning up recordings: {e}")
+            if self._stop.wait(self.interval):
+                return
+    
+    def run(self) -> int:
+        """
+        Delete recordings that break the retention limits.
+        
+        Returns:
+            Number of files deleted
+        """
+        started = time.monotonic()
+        now = time.time()
+        
+        # Oldest first, so the size and count limits drop the oldest recordings
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        total_files = len(entries)
+        deleted = 0
+        deleted_bytes = 0
+        oldest_kept = None
+        
+        for path, size, mtime in entries:
+            age = now - mtime
+            expired = age > self.max_age
+            over_limit = total_bytes > self.max_bytes or total_files > self.max_files
+            # Everything after a recording that is too recent is newer still
+            if (not expired and not over_limit) or age < self.min_age:
+                oldest_kept = oldest_kept or mtime
+                break
+                
+            try:
+                os.remove(path)
+                deleted += 1
+                deleted_bytes += size
+            except FileNotFoundError:
+                # Already removed by the request that owned it, or by another worker
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete recording {path}: {e}")
+                oldest_kept = oldest_kept or mtime
+                continue
+            total_bytes -= size
+            total_files -= 1
+            
+        with self._lock:
+            self.files = total_files
+            self.bytes = total_bytes
+            self.oldest_age = now - oldest_kept if oldest_kept else 0.0
+            self.runs += 1
+            self.deleted_files += deleted
+            self.deleted_bytes += deleted_bytes
+            self.last_run_seconds = time.monotonic() - started
+            
+        if deleted:
+            logger.info(f"Deleted {deleted} recordings ({deleted_bytes / 1e6:.1f} MB), "
+                        f"{total_files} left ({total_bytes / 1e6:.1f} MB)")
+        return deleted
+    
+    def _scan(self) -> List[Tuple[str, int, float]]:
+        """
+        List the recordings, skipping any TTS cache directory inside them.
+        
+        Returns:
+            List of (path, size, mtime) tuples
+        """
+        skip_dir = os.path.abspath(self.tts_cache.cache_dir) if self.tts_cache is not None else None
+        pinned = self.tts_cache.pinned if self.tts_cache is not None else set()
+        
+        entries = []
+        pending = [self.recordings_dir]
+        while pending:
+            directory = pending.pop()
+            try:
+                iterator = os.scandir(directory)
+            except FileNotFoundError:
+                continue
+            with iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if os.path.abspath(entry.path) != skip_dir:
+                                pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if os.path.abspath(entry.path) in pinned:
+                                continue
+                            stat = entry.stat()
+                            entries.append((entry.path, stat.st_size, stat.st_mtime))
+                    except FileNotFoundError:
+                        continue
+        return entries
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get recordings and disk usage statistics.
+        
+        Returns:
+            Dictionary with recording totals as of the last run, limits,
+            deletions and free space on the recordings disk
+        """
+        usage = shutil.disk_usage(self.recordings_dir)
+        with self._lock:
+            return {
+                "files": self.files,
+                "bytes": self.bytes,
+                "oldest_age": round(self.oldest_age, 1),
+                "max_files": self.max_files,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "runs": self.runs,
+                "deleted_files": self.deleted_files,
+                "deleted_bytes": self.deleted_bytes,
+                "last_run_seconds": round(self.last_run_seconds, 4),
+                "disk_free_bytes": usage.free,
+                "disk_used_ratio": round(usage.used / usage.total, 3) if usage.total else 0.0
+            }
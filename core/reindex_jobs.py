@@ -0,0 +1,155 @@
+"""
+Re-index Jobs Module
+
+This module runs knowledge base re-indexing in the background, so an upload
+returns at once and questions keep being answered from the current index
+while the new one is built. Job status is kept in small JSON files, so any
+worker can report on a job started by another one.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job ids are generated here; anything else is rejected before touching the filesystem
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class ReindexJobs:
+    """Class for running knowledge base re-index jobs in a background thread."""
+    
+    def __init__(self, reindex: Callable[[str], Dict[str, Any]], jobs_dir: str, keep: int = 20):
+        """
+        Initialize the job runner.
+        
+        Args:
+            reindex: Function that re-indexes the knowledge base from a text and
+                returns its statistics
+            jobs_dir: Directory for job status files
+            keep: Number of job records kept
+        """
+        self.reindex = reindex
+        self.jobs_dir = jobs_dir
+        self.keep = keep
+        os.makedirs(jobs_dir, exist_ok=True)
+        
+        # One job at a time, in submission order, so the last upload wins
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reindex")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+    
+    def submit(self, text: str, filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a re-index of the knowledge base.
+        
+        Args:
+            text: New knowledge base text
+            filename: Name of the uploaded file, for the job record
+            
+        Returns:
+            The queued job's record
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "filename": filename,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "stats": None,
+            "error": None
+        }
+        self._save(job)
+        
+        with self._lock:
+            self.pending += 1
+        self.executor.submit(self._run, job, text)
+        
+        logger.info(f"Queued knowledge base re-index job {job['id']}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's record.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            Job record, or None if there is no such job
+        """
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _run(self, job: Dict[str, Any], text: str) -> None:
+        """Run a queued job and record its outcome."""
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        self._save(job)
+        
+        try:
+            job["stats"] = self.reindex(text)
+            job["status"] = "done"
+        except Exception as e:
+            logger.error(f"Error in re-index job {job['id']}: {e}", exc_info=True)
+            job["status"] = "failed"
+            job["error"] = str(e)
+            
+        job["finished_at"] = time.time()
+        self._save(job)
+        
+        with self._lock:
+            self.pending -= 1
+            if job["status"] == "done":
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._prune()
+    
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+    
+    def _save(self, job: Dict[str, Any]) -> None:
+        """Write a job record atomically."""
+        temp_path = f"{self._path(job['id'])}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+        os.replace(temp_path, self._path(job['id']))
+    
+    def _prune(self) -> None:
+        """Delete the oldest job records beyond the number kept."""
+        try:
+            paths = [entry.path for entry in os.scandir(self.jobs_dir) if entry.name.endswith('.json')]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:-self.keep]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Error pruning re-index job records: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get job statistics for this process.
+        
+        Returns:
+            Dictionary with pending, completed and failed job counts
+        """
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed
+            }
@@ -0,0 +1,177 @@
+"""
+Response Cache Module
+
+This module caches LLM answers and their synthesized audio, so that a question
+semantically identical to one answered recently, with the same retrieved
+context, is answered without calling the LLM or TTS again.
+"""
+
+import os
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _CachedResponse:
+    """A cached answer with the context it was generated from."""
+    
+    __slots__ = ("vector", "chunk_ids", "kb_version", "response", "audio_path", "created_at")
+    
+    def __init__(self, vector: np.ndarray, chunk_ids: Tuple[int, ...], kb_version: str, response: str):
+        self.vector = vector
+        self.chunk_ids = chunk_ids
+        self.kb_version = kb_version
+        self.response = response
+        self.audio_path = None
+        self.created_at = time.monotonic()
+
+class SemanticResponseCache:
+    """Class for reusing answers to near-duplicate questions."""
+    
+    def __init__(self, threshold: float = 0.95, maxsize: int = 512, ttl: float = 86400):
+        """
+        Initialize the response cache.
+        
+        Args:
+            threshold: Minimum cosine similarity between query embeddings for a hit
+            maxsize: Maximum number of cached answers
+            ttl: Seconds after which a cached answer is no longer reused
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        
+        self._entries = OrderedDict()
+        self._by_response = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        
+        logger.info(f"Semantic response cache initialized with threshold={threshold}, maxsize={maxsize}")
+    
+    def lookup(self, query_vector: np.ndarray, chunk_ids: Tuple[int, ...],
+               kb_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically identical query.
+        
+        Args:
+            query_vector: Embedding of the query
+            chunk_ids: Indices of the retrieved chunks, in rank order
+            kb_version: Version of the knowledge base the chunks came from
+            
+        Returns:
+            Dictionary with "response" and "audio_path" (may be None), or None on a miss
+        """
+        query_vector = self._normalize(query_vector)
+        now = time.monotonic()
+        
+        with self._lock:
+            # Only answers generated from exactly the same context are candidates
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry.chunk_ids == chunk_ids and entry.kb_version == kb_version
+                and now - entry.created_at <= self.ttl
+            ]
+            
+            if candidates:
+                vectors = np.stack([entry.vector for _, entry in candidates])
+                similarities = vectors @ query_vector
+                best = int(np.argmax(similarities))
+                
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    logger.info(f"Response cache hit (similarity {similarities[best]:.3f})")
+                    return {"response": entry.response, "audio_path": entry.audio_path}
+                    
+            self.misses += 1
+            return None
+    
+    def store(self, query_vector: np.ndarray, chunk_ids: Tuple[int, ...],
+              kb_version: str, response: str) -> None:
+        """
+        Cache an answer.
+        
+        Args:
+            query_vector: Embedding of the query
+            chunk_ids: Indices of the retrieved chunks, in rank order
+            kb_version: Version of the knowledge base the chunks came from
+            response: Generated answer
+        """
+        entry = _CachedResponse(self._normalize(query_vector), tuple(chunk_ids), kb_version, response)
+        
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._by_response[response] = entry_id
+            
+            while len(self._entries) > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                if self._entries.get(self._by_response.get(evicted.response)) is None:
+                    self._by_response.pop(evicted.response, None)
+    
+    def attach_audio(self, response: str, audio_path: str) -> None:
+        """
+        Remember the synthesized audio for a cached answer.
+        
+        Args:
+            response: Cached answer text
+            audio_path: Path to its audio file
+        """
+        with self._lock:
+            entry = self._entries.get(self._by_response.get(response))
+            if entry is not None:
+                entry.audio_path = audio_path
+    
+    def audio_for(self, response: str) -> Optional[str]:
+        """
+        Get the already synthesized audio for a cached answer.
+        
+        Args:
+            response: Answer text
+            
+        Returns:
+            Path to an existing audio file, or None
+        """
+        with self._lock:
+            entry = self._entries.get(self._by_response.get(response))
+            audio_path = entry.audio_path if entry is not None else None
+            
+        if audio_path and os.path.exists(audio_path):
+            return audio_path
+        return None
+    
+    def clear(self) -> None:
+        """Remove all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            self._by_response.clear()
+    
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        """Scale a vector to unit length so dot products are cosine similarities."""
+        vector = np.asarray(vector, dtype='float32')
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with size, capacity, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,262 @@
+"""
+Session Backends Module
+
+This module provides storage backends for conversation sessions, so that a
+follow-up question answered by a different gunicorn worker still sees the
+conversation history.
+
+Sessions expire in the backend once they haven't been written for the
+session TTL. Writes are versioned: a write is rejected if the backend already
+holds the same or a newer version of the session, so when two workers answer
+the same session concurrently the first write wins and the other worker
+reloads the stored conversation instead of overwriting it.
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class SessionBackend:
+    """Base class for session storage backends."""
+    
+    # Whether other processes can see the stored sessions
+    shared = False
+    
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a stored session.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Dictionary with "data" and "version", or None if not stored
+        """
+        return None
+    
+    def get_version(self, session_id: str) -> Optional[int]:
+        """
+        Get the stored version of a session without loading it.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Stored version, or None if not stored
+        """
+        return None
+    
+    def save_many(self, sessions: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """
+        Store a batch of sessions.
+        
+        Args:
+            sessions: Mapping of session id to {"data": ..., "version": ...}
+            
+        Returns:
+            Ids of the sessions not written because the backend already holds
+            the same or a newer version of them
+        """
+        return set()
+    
+    def delete(self, session_id: str) -> None:
+        """
+        Delete a stored session.
+        
+        Args:
+            session_id: Session identifier
+        """
+    
+    def purge(self, ttl: float) -> None:
+        """
+        Delete sessions that have not been written for longer than ttl.
+        
+        Args:
+            ttl: Maximum session age in seconds
+        """
+
+class InProcessBackend(SessionBackend):
+    """Backend that keeps sessions only in the worker's own memory."""
+
+class SQLiteBackend(SessionBackend):
+    """Backend storing sessions in a SQLite database in WAL mode."""
+    
+    shared = True
+    
+    def __init__(self, db_path: str, ttl: float = 1800):
+        """
+        Initialize the SQLite backend.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            ttl: Seconds after the last write when a session expires
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        
+        # One connection per thread and per process (connections must not cross a fork)
+        self._local = threading.local()
+        
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        
+        logger.info(f"SQLite session backend initialized at {db_path}")
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            # WAL lets workers read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        # Expired rows stay until the next purge, so filter them here
+        row = self._connection().execute(
+            "SELECT data, version FROM sessions WHERE session_id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"data": json.loads(row[0]), "version": row[1]}
+    
+    def get_version(self, session_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT version FROM sessions WHERE session_id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def save_many(self, sessions: Dict[str, Dict[str, Any]]) -> Set[str]:
+        now = time.time()
+        rejected = set()
+        # A single transaction for the whole batch; an expired row is replaced whatever its version
+        with self._connection() as conn:
+            for session_id, record in sessions.items():
+                written = conn.execute(
+                    "INSERT INTO sessions (session_id, data, version, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET "
+                    "data = excluded.data, version = excluded.version, updated_at = excluded.updated_at "
+                    "WHERE sessions.version < excluded.version OR sessions.updated_at < ?",
+                    (session_id, json.dumps(record["data"]), record["version"], now, now - self.ttl)
+                ).rowcount
+                if not written:
+                    rejected.add(session_id)
+        return rejected
+    
+    def delete(self, session_id: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def purge(self, ttl: float) -> None:
+        with self._connection() as conn:
+            deleted = conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl,)
+            ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} expired sessions from {self.db_path}")
+
+# Write a session unless the stored version is the same or newer, and (re)start its expiry
+SAVE_IF_NEWER_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'version')
+if version and tonumber(version) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'data', ARGV[1], 'version', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+class RedisBackend(SessionBackend):
+    """Backend storing sessions in a Redis-compatible server (Redis, Valkey, KeyDB)."""
+    
+    shared = True
+    
+    def __init__(self, url: str, ttl: float, key_prefix: str = "fortwise:session:"):
+        """
+        Initialize the Redis backend.
+        
+        Args:
+            url: Server URL, e.g. redis://localhost:6379/0
+            ttl: Seconds after the last write when the server expires a session
+            key_prefix: Prefix for session keys
+        """
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for SESSION_BACKEND=redis")
+        
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.key_prefix = key_prefix
+        self._save_script = self.client.register_script(SAVE_IF_NEWER_SCRIPT)
+        
+        logger.info(f"Redis session backend initialized at {url}")
+    
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+    
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data, version = self.client.hmget(self._key(session_id), "data", "version")
+        if data is None:
+            return None
+        return {"data": json.loads(data), "version": int(version)}
+    
+    def get_version(self, session_id: str) -> Optional[int]:
+        version = self.client.hget(self._key(session_id), "version")
+        return int(version) if version is not None else None
+    
+    def save_many(self, sessions: Dict[str, Dict[str, Any]]) -> Set[str]:
+        # One round trip for the whole batch; each write checks the version atomically
+        pipeline = self.client.pipeline(transaction=False)
+        for session_id, record in sessions.items():
+            self._save_script(
+                keys=[self._key(session_id)],
+                args=[json.dumps(record["data"]), record["version"], self.ttl],
+                client=pipeline
+            )
+        results = pipeline.execute()
+        return {session_id for session_id, written in zip(sessions, results) if not written}
+    
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self._key(session_id))
+    
+    # Expiry is handled by the server, so purge is a no-op
+
+def create_session_backend(name: str, db_path: str = None, redis_url: str = None,
+                           ttl: float = 1800) -> SessionBackend:
+    """
+    Create a session backend by name.
+    
+    Args:
+        name: 'memory', 'sqlite' or 'redis'
+        db_path: SQLite database path (for 'sqlite')
+        redis_url: Server URL (for 'redis')
+        ttl: Session time-to-live in seconds
+    
+    Returns:
+        Session backend instance
+    """
+    if name == "memory":
+        return InProcessBackend()
+    if name == "sqlite":
+        return SQLiteBackend(db_path, ttl)
+    if name == "redis":
+        return RedisBackend(redis_url, ttl)
+    raise ValueError(f"Invalid session backend '{name}'. Must be one of ['memory', 'sqlite', 'redis']")
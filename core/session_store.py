@@ -0,0 +1,295 @@
+"""
+Session Store Module
+
+This module keeps a separate conversation context for every caller session,
+with a cap on live sessions and LRU/TTL eviction. Contexts can be persisted
+to a shared session backend so that other workers see them too.
+
+If two workers update the same session concurrently, the backend keeps the
+first write; the other worker's update is dropped and its cached copy is
+discarded, so its next request reloads the stored conversation. Clients
+normally wait for each answer before asking the next question, so this only
+loses an exchange when a caller has several requests in flight at once.
+
+A cached session is checked against the backend version at most once per
+version_check_interval, so a worker may start an answer from a copy that
+is that old; the versioned write then fails and the session is reloaded.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from core.context_manager import ContextManager
+from core.session_backends import SessionBackend, InProcessBackend
+
+logger = logging.getLogger(__name__)
+
+# Session used by callers that don't identify themselves
+DEFAULT_SESSION_ID = "default"
+
+# How often expired sessions are purged from a shared backend (seconds)
+PURGE_INTERVAL = 300
+
+class _SessionEntry:
+    """Cached session context with its bookkeeping."""
+    
+    __slots__ = ("context_manager", "last_access", "version", "checked_at")
+    
+    def __init__(self, context_manager: ContextManager, last_access: float, version: int):
+        self.context_manager = context_manager
+        self.last_access = last_access
+        self.version = version
+        # When the version was last known to match the backend
+        self.checked_at = last_access
+
+class SessionStore:
+    """Class for managing per-session conversation contexts."""
+    
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800, max_history: int = 10,
+                 backend: Optional[SessionBackend] = None, flush_interval: float = 0.1,
+                 batch_size: int = 64, version_check_interval: float = 1.0):
+        """
+        Initialize the session store.
+        
+        Args:
+            max_sessions: Maximum number of live sessions; the least recently
+                used session is evicted when a new one would exceed it
+            ttl: Seconds of inactivity after which a session is discarded
+            max_history: Maximum number of exchanges kept per session
+            backend: Session backend (defaults to in-process only)
+            flush_interval: Seconds between batched writes to a shared backend
+            batch_size: Number of pending writes that triggers an immediate flush
+            version_check_interval: Seconds a cached session is used before
+                checking a shared backend for updates from other workers
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_history = max_history
+        self.backend = backend or InProcessBackend()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.version_check_interval = version_check_interval
+        
+        # Read-through cache of session contexts, least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        
+        # Write-behind state for shared backends
+        self._pending = {}
+        self._inflight = {}
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+        self._stop = threading.Event()
+        self._last_purge = time.monotonic()
+        self.flushes = 0
+        self.conflicts = 0
+        
+        if self.backend.shared:
+            atexit.register(self.close)
+        
+        logger.info(f"Session Store initialized with max_sessions={max_sessions}, ttl={ttl}s, "
+                    f"backend={type(self.backend).__name__}")
+    
+    def get(self, session_id: str) -> ContextManager:
+        """
+        Get the context manager for a session, loading or creating it if needed.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The session's context manager
+        """
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and now - entry.last_access > self.ttl:
+                logger.info(f"Session {session_id} expired, starting a new context")
+                del self._sessions[session_id]
+                entry = None
+            unflushed = self._pending.get(session_id) or self._inflight.get(session_id)
+        
+        # Another worker may have updated the session since we last checked
+        if (entry is not None and self.backend.shared and unflushed is None
+                and now - entry.checked_at >= self.version_check_interval):
+            stored_version = self.backend.get_version(session_id)
+            if stored_version is not None and stored_version != entry.version:
+                entry = None
+            else:
+                entry.checked_at = now
+        
+        if entry is None:
+            # Evicted sessions with unwritten updates are newer than the backend copy
+            record = unflushed
+            if record is None and self.backend.shared:
+                record = self.backend.load(session_id)
+            if record is not None:
+                context_manager = ContextManager.from_dict(record["data"], max_history=self.max_history)
+                entry = _SessionEntry(context_manager, now, record["version"])
+            else:
+                entry = _SessionEntry(ContextManager(max_history=self.max_history), now, 0)
+        
+        with self._lock:
+            entry.last_access = now
+            self._sessions[session_id] = entry
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        
+        return entry.context_manager
+    
+    def commit(self, session_id: str) -> None:
+        """
+        Queue a session's current context for writing to the backend.
+        
+        Writes are batched: the latest state of each session is written on the
+        next flush, which happens every flush_interval seconds or as soon as
+        batch_size sessions are pending.
+        
+        Args:
+            session_id: Session identifier
+        """
+        if not self.backend.shared:
+            return
+        
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            entry.version += 1
+            self._pending[session_id] = {
+                "data": entry.context_manager.to_dict(),
+                "version": entry.version
+            }
+            flush_now = len(self._pending) >= self.batch_size
+        
+        self._ensure_flusher()
+        if flush_now:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write all pending session updates to the backend."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._inflight, self._pending = self._pending, {}
+            
+            try:
+                rejected = self.backend.save_many(self._inflight)
+                self.flushes += 1
+                logger.debug(f"Flushed {len(self._inflight)} sessions to the session backend")
+                if rejected:
+                    self._drop_conflicts(rejected)
+            except Exception as e:
+                logger.error(f"Error flushing sessions: {e}")
+                # Re-queue failed writes unless a newer update has arrived meanwhile
+                with self._lock:
+                    for session_id, record in self._inflight.items():
+                        self._pending.setdefault(session_id, record)
+            finally:
+                with self._lock:
+                    self._inflight = {}
+    
+    def _drop_conflicts(self, rejected) -> None:
+        """
+        Discard cached sessions whose write lost to another worker's update.
+        
+        Args:
+            rejected: Ids of the sessions the backend refused to overwrite
+        """
+        with self._lock:
+            for session_id in rejected:
+                self.conflicts += 1
+                # Later updates build on the rejected one, so they are dropped as well
+                self._sessions.pop(session_id, None)
+                self._pending.pop(session_id, None)
+                logger.warning(f"Session {session_id} was updated by another worker, reloading it")
+    
+    def _ensure_flusher(self) -> None:
+        """Start the background flush thread in this process if it isn't running."""
+        # Threads don't survive a fork, so check the pid as well
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            return
+        
+        with self._flush_lock:
+            if self._flusher is None or self._flusher_pid != os.getpid():
+                self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+                self._flusher_pid = os.getpid()
+                self._flusher.start()
+    
+    def _flush_loop(self) -> None:
+        """Periodically flush pending writes and purge expired sessions."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            
+            if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+                self._last_purge = time.monotonic()
+                try:
+                    self.backend.purge(self.ttl)
+                except Exception as e:
+                    logger.error(f"Error purging expired sessions: {e}")
+    
+    def close(self) -> None:
+        """Stop the flush thread and write any pending updates."""
+        self._stop.set()
+        self.flush()
+    
+    def remove(self, session_id: str) -> None:
+        """
+        Discard a session and its context.
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._pending.pop(session_id, None)
+        
+        if self.backend.shared:
+            self.backend.delete(session_id)
+    
+    def _evict(self, now: float) -> None:
+        """
+        Drop expired sessions and enforce the session cap. Caller must hold the lock.
+        
+        Evicted sessions stay in a shared backend and are reloaded on next use.
+        
+        Args:
+            now: Current monotonic time
+        """
+        # Oldest sessions come first, so stop at the first one still alive
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry.last_access <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+            logger.debug(f"Evicted session {session_id}")
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get session store statistics.
+        
+        Returns:
+            Dictionary with live session count, cap, eviction, flush and conflict counts
+        """
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "backend": type(self.backend).__name__,
+            "pending_writes": len(self._pending),
+            "flushes": self.flushes,
+            "conflicts": self.conflicts
+        }
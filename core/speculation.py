@@ -0,0 +1,201 @@
+"""
+Speculative Retrieval Module
+
+This module keeps the state of voice turns whose audio arrives in segments
+while the caller is still speaking. Each new segment triggers a transcription
+of the audio so far and a knowledge base search on that partial transcript,
+so that by the time the caller stops, retrieval has usually already been done.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Turn ids supplied by clients must be safe to use in file names
+TURN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def transcript_similarity(partial: str, final: str) -> float:
+    """
+    Compare a partial transcript with the final one, word by word.
+    
+    Args:
+        partial: Transcript of the audio received so far
+        final: Transcript of the complete audio
+        
+    Returns:
+        Similarity between 0 and 1
+    """
+    partial_words = re.findall(r"[\w']+", partial.lower())
+    final_words = re.findall(r"[\w']+", final.lower())
+    if not partial_words or not final_words:
+        return 0.0
+    return SequenceMatcher(None, partial_words, final_words, autojunk=False).ratio()
+
+class SpeculativeTurn:
+    """Audio and speculative retrieval state of a turn being recorded."""
+    
+    __slots__ = ("audio_path", "segments", "size", "error", "future", "speculation", "last_update", "lock")
+    
+    def __init__(self, audio_path: str):
+        self.audio_path = audio_path
+        self.segments = 0
+        self.size = 0
+        self.error = None
+        self.future = None
+        self.speculation = None
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def snapshot(self) -> bytes:
+        """
+        Read the audio received so far, so it can be transcribed while more is appended.
+        
+        Returns:
+            Encoded audio bytes
+        """
+        with self.lock:
+            with open(self.audio_path, "rb") as f:
+                return f.read()
+
+class TurnStore:
+    """Class for tracking turns whose audio is uploaded in segments."""
+    
+    def __init__(self, turns_dir: str, ttl: float = 120, max_bytes: int = 10 * 1024 * 1024):
+        """
+        Initialize the turn store.
+        
+        Args:
+            turns_dir: Directory holding the audio of turns in progress
+            ttl: Seconds without a new segment after which a turn is abandoned
+            max_bytes: Maximum size of a turn's recording
+        """
+        self.turns_dir = turns_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(turns_dir, exist_ok=True)
+        
+        self._turns = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def audio_path(self, session_id: str, turn_id: str, extension: str) -> str:
+        """
+        Get the file a turn's audio is collected in.
+        
+        The path only depends on the ids, so a segment handled by another
+        worker appends to the same file.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            extension: Audio file extension, e.g. '.webm'
+            
+        Returns:
+            Path to the turn's audio file
+        """
+        if not TURN_ID_PATTERN.match(turn_id):
+            raise ValueError(f"Invalid turn id '{turn_id}'")
+        return os.path.join(self.turns_dir, f"{session_id}-{turn_id}{extension}")
+    
+    def append(self, session_id: str, turn_id: str, data: bytes, extension: str) -> SpeculativeTurn:
+        """
+        Append an audio segment to a turn, starting the turn if needed.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            data: Encoded audio bytes of the segment
+            extension: Audio file extension, e.g. '.webm'
+            
+        Returns:
+            The updated turn
+        """
+        audio_path = self.audio_path(session_id, turn_id, extension)
+            
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            turn = self._turns.get((session_id, turn_id))
+            if turn is None:
+                turn = SpeculativeTurn(audio_path)
+                self._turns[(session_id, turn_id)] = turn
+            self._turns.move_to_end((session_id, turn_id))
+            turn.last_update = now
+            
+        with turn.lock:
+            # Checks on earlier segments can reject the recording before it is complete
+            if turn.error:
+                raise ValueError(turn.error)
+                
+            # Earlier segments may have been written by another worker
+            if turn.segments == 0 and os.path.exists(turn.audio_path):
+                turn.size = os.path.getsize(turn.audio_path)
+            if turn.size + len(data) > self.max_bytes:
+                turn.error = f"Recording exceeds maximum size of {self.max_bytes} bytes"
+                raise ValueError(turn.error)
+                
+            with open(turn.audio_path, "ab") as f:
+                f.write(data)
+            turn.segments += 1
+            turn.size += len(data)
+            
+        return turn
+    
+    def pop(self, session_id: str, turn_id: str) -> Optional[SpeculativeTurn]:
+        """
+        Stop tracking a turn.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            
+        Returns:
+            The turn, or None if this worker wasn't tracking it
+        """
+        with self._lock:
+            return self._turns.pop((session_id, turn_id), None)
+    
+    def discard(self, session_id: str, turn_id: str, extension: str) -> None:
+        """
+        Stop tracking a turn and delete its audio.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            extension: Audio file extension, e.g. '.webm'
+        """
+        self.pop(session_id, turn_id)
+        try:
+            os.remove(self.audio_path(session_id, turn_id, extension))
+        except (OSError, ValueError):
+            pass
+    
+    def _expire(self, now: float) -> None:
+        """
+        Drop abandoned turns and their audio. Caller must hold the lock.
+        
+        Args:
+            now: Current monotonic time
+        """
+        # Least recently updated turns come first
+        while self._turns:
+            key, turn = next(iter(self._turns.items()))
+            if now - turn.last_update <= self.ttl:
+                break
+            self._turns.popitem(last=False)
+            if turn.future is not None:
+                turn.future.cancel()
+            try:
+                os.remove(turn.audio_path)
+            except OSError:
+                pass
+            logger.info(f"Discarded abandoned turn {key[1]} of session {key[0]}")
+    
+    def __len__(self) -> int:
+        return len(self._turns)
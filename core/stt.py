@@ -1,69 +1,220 @@
 """
 Speech-to-Text Module
 
-This module handles converting speech audio to text using OpenAI's Whisper API.
+This module handles converting speech audio to text using OpenAI's Whisper API,
+or a local Whisper model when STT_BACKEND=local.
 """
 
 import os
+import asyncio
 import logging
-from typing import Optional
-import openai
-from utils.audio_utils import validate_audio_duration
+import numpy as np
+from typing import Optional, Tuple, Dict, Any
+from utils.audio_utils import (validate_audio_duration, encode_audio, AudioPipeline, VoiceActivity,
+                               AudioInput, AUDIO_ENCODINGS)
+from core.stt_backends import create_stt_backend, STTInput
+from config import settings
 
 logger = logging.getLogger(__name__)
 
 class SpeechToText:
-    """Class for speech-to-text conversion using OpenAI's Whisper API."""
+    """Class for speech-to-text conversion using OpenAI's Whisper API or a local Whisper model."""
     
     def __init__(self):
         """Initialize the STT module."""
-        # Get API key from environment
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-        openai.api_key = self.api_key
-        
         # Maximum duration for audio in seconds (safety check)
         self.max_duration = 30
         
-        logger.info("Speech-to-Text module initialized")
+        # Recognition engine, selected per deployment
+        self.backend = create_stt_backend(
+            settings.STT_BACKEND,
+            model=settings.STT_MODEL,
+            timeout=settings.STT_TIMEOUT,
+            max_retries=settings.STT_MAX_RETRIES,
+            local_model=settings.LOCAL_STT_MODEL,
+            compute_type=settings.LOCAL_STT_COMPUTE_TYPE,
+            cpu_threads=settings.LOCAL_STT_THREADS,
+            num_workers=settings.LOCAL_STT_WORKERS,
+            beam_size=settings.LOCAL_STT_BEAM_SIZE,
+            download_root=settings.LOCAL_STT_MODEL_DIR
+        )
+        
+        # Silence trimming and downsampling before upload
+        self.vad_enabled = settings.VAD_ENABLED
+        self.sample_rate = settings.STT_SAMPLE_RATE
+        self.upload_encoding = settings.STT_UPLOAD_ENCODING
+        if self.upload_encoding not in AUDIO_ENCODINGS:
+            raise ValueError(f"Invalid STT upload encoding '{self.upload_encoding}'. Must be one of {list(AUDIO_ENCODINGS)}")
+        self.skipped = 0
+        
+        # Decode once at the STT sample rate, then keep only the speech
+        self.preprocessor = AudioPipeline([
+            VoiceActivity(
+                top_db=settings.VAD_TOP_DB,
+                min_level_db=settings.VAD_MIN_LEVEL_DB,
+                noise_margin_db=settings.VAD_NOISE_MARGIN_DB,
+                min_speech=settings.VAD_MIN_SPEECH,
+                padding=settings.VAD_PADDING
+            )
+        ], sample_rate=self.sample_rate)
+        if self.vad_enabled:
+            self._warm_up()
+        if settings.STT_WARMUP:
+            self.backend.warm_up()
+            
+        logger.info(f"Speech-to-Text module initialized with the {self.backend.name} backend")
     
-    def transcribe(self, audio_path: str, language: Optional[str] = None) -> str:
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None,
+                   filename: Optional[str] = None) -> str:
         """
         Transcribe speech to text.
         
         Args:
-            audio_path: Path to the audio file
+            audio: Path to the audio file, or its encoded bytes
             language: Optional language code (e.g., 'en', 'fr')
+            filename: Name of the file the audio bytes came from
             
         Returns:
             Transcribed text
         """
-        logger.info(f"Transcribing audio from {audio_path}")
+        logger.info(f"Transcribing audio from {_describe(audio, filename)}")
         
         # Validate audio duration
-        if not validate_audio_duration(audio_path, self.max_duration):
-            error_msg = f"Audio exceeds maximum duration of {self.max_duration} seconds"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        self._validate_duration(audio)
+        
+        prepared = self._preprocess(audio, filename)
+        if prepared is None:
+            return ""
+        audio, filename = prepared
+        
+        try:
+            transcribed_text = self.backend.transcribe(
+                audio,
+                filename=filename,
+                language="en"  # Force English language
+            )
+            
+            logger.info(f"Transcription successful: {transcribed_text[:50]}...")
+            return transcribed_text
+            
+        except Exception as e:
+            logger.error(f"Error during transcription: {str(e)}")
+            raise
+    
+    async def atranscribe(self, audio: AudioInput, language: Optional[str] = None,
+                          filename: Optional[str] = None) -> str:
+        """
+        Transcribe speech to text without blocking the event loop.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            language: Optional language code (e.g., 'en', 'fr')
+            filename: Name of the file the audio bytes came from
+            
+        Returns:
+            Transcribed text
+        """
+        logger.info(f"Transcribing audio from {_describe(audio, filename)}")
+        
+        # Reading the header, or decoding when it has none, may block
+        await asyncio.to_thread(self._validate_duration, audio)
+        
+        # Decoding for voice activity detection is CPU-bound
+        prepared = await asyncio.to_thread(self._preprocess, audio, filename)
+        if prepared is None:
+            return ""
+        audio, filename = prepared
         
         try:
-            # Open audio file
-            with open(audio_path, "rb") as audio_file:
-                # Call OpenAI Whisper API - force English
-                response = openai.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="en",  # Force English language
-                    response_format="text"
-                )
-                
-            transcribed_text = response
+            transcribed_text = await self.backend.atranscribe(
+                audio,
+                filename=filename,
+                language="en"  # Force English language
+            )
             
             logger.info(f"Transcription successful: {transcribed_text[:50]}...")
             return transcribed_text
             
         except Exception as e:
             logger.error(f"Error during transcription: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _warm_up(self) -> None:
+        """Load the audio decoding and resampling code now rather than on the first request."""
+        silence = encode_audio(np.zeros(800, dtype=np.float32), 8000, "wav")
+        self.preprocessor.decode(silence)
+    
+    def _preprocess(self, audio: AudioInput, filename: Optional[str] = None) -> Optional[Tuple[STTInput, Optional[str]]]:
+        """
+        Trim silence from a recording and downsample it before upload.
+        
+        The audio is decoded once at the STT sample rate. Recordings without
+        speech are rejected here instead of being transcribed, and backends
+        that take decoded samples get the speech without re-encoding it.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            filename: Name of the file the audio bytes came from
+            
+        Returns:
+            (audio, filename) to transcribe, or None if there is no speech
+        """
+        if not self.vad_enabled:
+            return audio, filename
+            
+        try:
+            y, sample_rate = self.preprocessor.decode(audio)
+        except Exception as e:
+            # Without a decoder for this format, upload the recording as it is
+            logger.warning(f"Could not decode audio for voice activity detection: {e}")
+            return audio, filename
+            
+        speech = self.preprocessor.apply(y, sample_rate)
+        if speech is None:
+            self.skipped += 1
+            logger.info("No speech detected, skipping transcription")
+            return None
+            
+        if self.backend.sample_rate == sample_rate:
+            return speech[0], filename
+            
+        trimmed = (len(y) - len(speech[0])) / sample_rate
+        encoded = encode_audio(speech[0], sample_rate, self.upload_encoding)
+        original_size = len(audio) if isinstance(audio, bytes) else os.path.getsize(audio)
+        
+        # Keep the original when re-encoding neither shortens nor shrinks it
+        if trimmed < settings.VAD_MIN_TRIM and len(encoded) >= original_size:
+            return audio, filename
+            
+        logger.info(f"Trimmed {trimmed:.2f}s of silence, uploading {len(encoded)} bytes instead of {original_size}")
+        return encoded, f"speech{AUDIO_ENCODINGS[self.upload_encoding][2]}"
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get speech-to-text statistics.
+        
+        Returns:
+            Dictionary with backend statistics and the number of recordings
+            skipped for having no speech
+        """
+        stats = self.backend.get_stats()
+        stats["skipped_without_speech"] = self.skipped
+        return stats
+    
+    def _validate_duration(self, audio: AudioInput) -> None:
+        """
+        Reject audio longer than the maximum duration.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+        """
+        if not validate_audio_duration(audio, self.max_duration):
+            error_msg = f"Audio exceeds maximum duration of {self.max_duration} seconds"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+def _describe(audio: AudioInput, filename: Optional[str] = None) -> str:
+    """Describe audio input for log messages."""
+    if isinstance(audio, bytes):
+        return f"memory ({filename or 'upload'}, {len(audio)} bytes)"
+    return audio
@@ -0,0 +1,273 @@
+"""
+STT Backends Module
+
+This module provides the speech recognition engines behind SpeechToText:
+OpenAI's Whisper API, or a quantized Whisper model run locally on the CPU
+with faster-whisper, which needs no network round trip and keeps working
+when the API is slow or unreachable.
+"""
+
+import io
+import os
+import time
+import asyncio
+import logging
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Union
+
+from utils.audio_utils import AudioInput
+from core.openai_client import get_client, get_async_client
+from core.model_registry import get_model
+
+logger = logging.getLogger(__name__)
+
+# Encoded audio (path or bytes), or decoded mono float32 samples
+STTInput = Union[AudioInput, np.ndarray]
+
+# Name sent with audio bytes of unknown origin; Whisper detects the actual encoding
+DEFAULT_AUDIO_FILENAME = "audio.webm"
+
+class STTBackend(ABC):
+    """Base class for speech-to-text backends."""
+    
+    name = "base"
+    
+    # Rate of decoded samples the backend accepts directly; None if it needs encoded audio
+    sample_rate = None
+    
+    @abstractmethod
+    def transcribe(self, audio: STTInput, filename: Optional[str] = None, language: Optional[str] = None) -> str:
+        """
+        Transcribe speech to text.
+        
+        Args:
+            audio: Path to the audio file, its encoded bytes, or decoded samples
+                at the backend's sample rate
+            filename: Name of the file the audio bytes came from
+            language: Optional language code (e.g., 'en', 'fr')
+            
+        Returns:
+            Transcribed text
+        """
+    
+    async def atranscribe(self, audio: STTInput, filename: Optional[str] = None,
+                          language: Optional[str] = None) -> str:
+        """
+        Transcribe speech to text without blocking the event loop.
+        
+        Args:
+            audio: Path to the audio file, its encoded bytes, or decoded samples
+                at the backend's sample rate
+            filename: Name of the file the audio bytes came from
+            language: Optional language code (e.g., 'en', 'fr')
+            
+        Returns:
+            Transcribed text
+        """
+        return await asyncio.to_thread(self.transcribe, audio, filename, language)
+    
+    def warm_up(self) -> None:
+        """Prepare the backend so the first request doesn't pay for it."""
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics.
+        
+        Returns:
+            Dictionary with the backend name and its settings
+        """
+        return {"backend": self.name}
+
+class OpenAIBackend(STTBackend):
+    """Backend using OpenAI's Whisper API."""
+    
+    name = "openai"
+    
+    def __init__(self, model: str, timeout: float, max_retries: int):
+        """
+        Initialize the OpenAI backend.
+        
+        Args:
+            model: OpenAI transcription model
+            timeout: Per-call timeout in seconds
+            max_retries: Retry budget per call
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+            
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+    
+    def transcribe(self, audio: STTInput, filename: Optional[str] = None, language: Optional[str] = None) -> str:
+        if isinstance(audio, bytes):
+            # Upload straight from memory
+            audio_file = (filename or DEFAULT_AUDIO_FILENAME, audio)
+        else:
+            with open(audio, "rb") as f:
+                audio_file = (os.path.basename(audio), f.read())
+                
+        return get_client(self.timeout, self.max_retries).audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            language=language,
+            response_format="text"
+        )
+    
+    async def atranscribe(self, audio: STTInput, filename: Optional[str] = None,
+                          language: Optional[str] = None) -> str:
+        if isinstance(audio, bytes):
+            audio_file = (filename or DEFAULT_AUDIO_FILENAME, audio)
+        else:
+            audio_file = (os.path.basename(audio), await asyncio.to_thread(_read_file, audio))
+            
+        return await get_async_client(self.timeout, self.max_retries).audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            language=language,
+            response_format="text"
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model}
+
+class LocalWhisperBackend(STTBackend):
+    """Backend running a quantized Whisper model on the CPU with faster-whisper."""
+    
+    name = "local"
+    
+    # Whisper models work on 16 kHz mono samples
+    sample_rate = 16000
+    
+    def __init__(self, model: str, compute_type: str = "int8", cpu_threads: int = 4,
+                 num_workers: int = 1, beam_size: int = 1, download_root: Optional[str] = None):
+        """
+        Initialize the local backend, loading the model if this process hasn't yet.
+        
+        Args:
+            model: faster-whisper model size (e.g. 'small.en') or path to a
+                converted CTranslate2 model
+            compute_type: Weight quantization ('int8', 'int8_float32', 'float32')
+            cpu_threads: CPU threads used by each transcription
+            num_workers: Transcriptions that can run in parallel
+            beam_size: Beam search width; 1 decodes greedily, which is fastest
+            download_root: Directory where downloaded models are kept
+        """
+        self.model_name = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.beam_size = beam_size
+        self.download_root = download_root
+        
+        self.model = _load_model(model, compute_type, cpu_threads, num_workers, download_root)
+        
+        self._lock = threading.Lock()
+        self.transcriptions = 0
+        self.audio_seconds = 0.0
+        self.busy_seconds = 0.0
+    
+    def transcribe(self, audio: STTInput, filename: Optional[str] = None, language: Optional[str] = None) -> str:
+        if isinstance(audio, bytes):
+            # faster-whisper decodes file-like objects itself
+            audio = io.BytesIO(audio)
+            
+        started = time.monotonic()
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=self.beam_size,
+            # Utterances are short; previous text only helps on long recordings
+            condition_on_previous_text=False
+        )
+        # Segments are decoded lazily while iterating
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        elapsed = time.monotonic() - started
+        
+        with self._lock:
+            self.transcriptions += 1
+            self.audio_seconds += info.duration
+            self.busy_seconds += elapsed
+            
+        logger.debug(f"Transcribed {info.duration:.2f}s of audio locally in {elapsed:.2f}s")
+        return text
+    
+    def warm_up(self) -> None:
+        """Run one transcription so the first request doesn't pay for lazy initialization."""
+        started = time.monotonic()
+        segments, _ = self.model.transcribe(np.zeros(self.sample_rate, dtype=np.float32),
+                                            language="en", beam_size=1)
+        list(segments)
+        logger.info(f"Local STT model warmed up in {time.monotonic() - started:.2f}s")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "model": self.model_name,
+                "compute_type": self.compute_type,
+                "cpu_threads": self.cpu_threads,
+                "num_workers": self.num_workers,
+                "transcriptions": self.transcriptions,
+                # Seconds of compute per second of audio; below 1 is faster than real time
+                "real_time_factor": round(self.busy_seconds / self.audio_seconds, 4) if self.audio_seconds else 0.0
+            }
+
+def _load_model(model: str, compute_type: str, cpu_threads: int, num_workers: int,
+                download_root: Optional[str] = None):
+    """Get this process's instance of a faster-whisper model, loading it once."""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise ImportError("The faster-whisper package is required for STT_BACKEND=local")
+        
+    def load():
+        return WhisperModel(
+            model,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+            download_root=download_root
+        )
+            
+    # The model's worker threads don't survive a fork, so each process loads its own
+    return get_model("stt", model, load, fork_safe=False, options={
+        "compute_type": compute_type,
+        "cpu_threads": cpu_threads,
+        "num_workers": num_workers
+    })
+
+def create_stt_backend(name: str, model: str = "whisper-1", timeout: float = 30, max_retries: int = 1,
+                       local_model: str = "small.en", compute_type: str = "int8", cpu_threads: int = 4,
+                       num_workers: int = 1, beam_size: int = 1, download_root: Optional[str] = None) -> STTBackend:
+    """
+    Create a speech-to-text backend by name.
+    
+    Args:
+        name: 'openai' or 'local'
+        model: OpenAI transcription model (for 'openai')
+        timeout: Per-call timeout in seconds (for 'openai')
+        max_retries: Retry budget per call (for 'openai')
+        local_model: faster-whisper model size or path (for 'local')
+        compute_type: Weight quantization (for 'local')
+        cpu_threads: CPU threads per transcription (for 'local')
+        num_workers: Parallel transcriptions (for 'local')
+        beam_size: Beam search width (for 'local')
+        download_root: Directory where downloaded models are kept (for 'local')
+        
+    Returns:
+        STT backend instance
+    """
+    if name == "openai":
+        return OpenAIBackend(model, timeout, max_retries)
+    if name == "local":
+        return LocalWhisperBackend(local_model, compute_type, cpu_threads, num_workers, beam_size, download_root)
+    raise ValueError(f"Invalid STT backend '{name}'. Must be one of ['openai', 'local']")
+
+def _read_file(path: str) -> bytes:
+    """Read a whole file."""
+    with open(path, "rb") as f:
+        return f.read()
@@ -5,27 +5,60 @@ This module handles converting text to speech using OpenAI's TTS API.
 """
 
 import os
+import uuid
+import asyncio
 import logging
-import openai
+from typing import Optional, Iterator, AsyncIterator
+
+from core.tts_cache import TTSCache
+from core.openai_client import get_client, get_async_client
+from config import settings
+from core.phrase_bank import FALLBACK_RESPONSE
 
 logger = logging.getLogger(__name__)
 
+# Audio formats the TTS API can return, with their MIME types
+AUDIO_MIMETYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav"
+}
+
+# Size of the pieces streamed audio is relayed in
+STREAM_CHUNK_SIZE = 8192
+
 class TextToSpeech:
     """Class for text-to-speech conversion using OpenAI's TTS API."""
     
-    def __init__(self):
-        """Initialize the TTS module."""
+    def __init__(self, cache: Optional[TTSCache] = None):
+        """
+        Initialize the TTS module.
+        
+        Args:
+            cache: Optional on-disk cache of synthesized audio
+        """
         # Get API key from environment
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        openai.api_key = self.api_key
-        
         # TTS settings
         self.model = "tts-1"  # Default model
         self.voice = "ash"  # Default voice: options are 'alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer'
         self.speed = 1.0      # Default speed (0.25 to 4.0)
+        self.format = settings.TTS_FORMAT  # Compressed formats are a fraction of the size of WAV
+        self.cache = cache
+        
+        if self.format not in AUDIO_MIMETYPES:
+            raise ValueError(f"Invalid TTS format '{self.format}'. Must be one of {list(AUDIO_MIMETYPES)}")
+        if cache is not None and cache.extension != self.format:
+            raise ValueError(f"TTS cache extension '{cache.extension}' does not match TTS format '{self.format}'")
+        
+        # Per-call timeout (seconds) and retry budget on the shared client
+        self.timeout = settings.TTS_TIMEOUT
+        self.max_retries = settings.TTS_MAX_RETRIES
         
         logger.info("Text-to-Speech module initialized")
     
@@ -50,18 +83,19 @@ class TextToSpeech:
         # Validate text is not empty
         if not text or text.strip() == "":
             logger.error("Empty text provided to TTS, using fallback message")
-            text = "I'm sorry, I couldn't generate a proper response. Please try asking again."
+            text = FALLBACK_RESPONSE
         
         logger.info(f"Converting text to speech using voice: {voice}, speed: {speed}")
         logger.debug(f"Text to convert: '{text[:100]}...'")
         
         try:
             # Call OpenAI TTS API
-            response = openai.audio.speech.create(
+            response = get_client(self.timeout, self.max_retries).audio.speech.create(
                 model=self.model,
                 voice=voice,
                 input=text,
-                speed=speed
+                speed=speed,
+                response_format=self.format
             )
             
             # Ensure directory exists
@@ -77,6 +111,290 @@ class TextToSpeech:
             logger.error(f"Error during speech synthesis: {str(e)}")
             raise
     
+    def synthesize_cached(self, text: str, voice: str = None, speed: float = None) -> str:
+        """
+        Convert text to speech, reusing cached audio for identical requests.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Returns:
+            Path to the audio file in the cache
+        """
+        if self.cache is None:
+            raise ValueError("No TTS cache configured")
+            
+        voice = voice or self.voice
+        speed = speed or self.speed
+        
+        key = self.cache.key(text, voice, speed, self.model)
+        cached_path = self.cache.get(key)
+        if cached_path:
+            logger.info(f"Serving cached speech from {cached_path}")
+            return cached_path
+            
+        # Synthesize next to the final location, then move it into the cache
+        tmp_path = f"{self.cache.path_for(key)}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.synthesize(text, tmp_path, voice=voice, speed=speed)
+            return self.cache.add(key, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    async def asynthesize(self, text: str, output_path: str,
+                          voice: str = None, speed: float = None) -> str:
+        """
+        Convert text to speech without blocking the event loop.
+        
+        Args:
+            text: Text to convert to speech
+            output_path: Path to save the audio file
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Returns:
+            Path to the generated audio file
+        """
+        # Use default values if not specified
+        voice = voice or self.voice
+        speed = speed or self.speed
+        
+        # Validate text is not empty
+        if not text or text.strip() == "":
+            logger.error("Empty text provided to TTS, using fallback message")
+            text = FALLBACK_RESPONSE
+            
+        logger.info(f"Converting text to speech using voice: {voice}, speed: {speed}")
+        
+        try:
+            # Call OpenAI TTS API
+            response = await get_async_client(self.timeout, self.max_retries).audio.speech.create(
+                model=self.model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                response_format=self.format
+            )
+            
+            # Save to file
+            await asyncio.to_thread(_write_audio, output_path, response.content)
+            
+            logger.info(f"Speech synthesis successful, saved to {output_path}")
+            return output_path
+            
+        except Exception as e:
+            logger.error(f"Error during speech synthesis: {str(e)}")
+            raise
+    
+    async def asynthesize_cached(self, text: str, voice: str = None, speed: float = None) -> str:
+        """
+        Convert text to speech without blocking the event loop, reusing cached
+        audio for identical requests.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Returns:
+            Path to the audio file in the cache
+        """
+        if self.cache is None:
+            raise ValueError("No TTS cache configured")
+            
+        voice = voice or self.voice
+        speed = speed or self.speed
+        
+        key = self.cache.key(text, voice, speed, self.model)
+        cached_path = await asyncio.to_thread(self.cache.get, key)
+        if cached_path:
+            logger.info(f"Serving cached speech from {cached_path}")
+            return cached_path
+            
+        tmp_path = f"{self.cache.path_for(key)}.{uuid.uuid4().hex}.tmp"
+        try:
+            await self.asynthesize(text, tmp_path, voice=voice, speed=speed)
+            # Adding may evict older entries, which touches the disk
+            return await asyncio.to_thread(self.cache.add, key, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @property
+    def mimetype(self) -> str:
+        """MIME type of the synthesized audio."""
+        return AUDIO_MIMETYPES[self.format]
+    
+    def stream(self, text: str, voice: str = None, speed: float = None) -> Iterator[bytes]:
+        """
+        Convert text to speech, yielding the audio as it arrives from the API.
+        
+        Cached audio is read from disk. Otherwise the audio is relayed without
+        waiting for the whole file, and copied into the cache on the side.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Yields:
+            Chunks of encoded audio
+        """
+        voice = voice or self.voice
+        speed = speed or self.speed
+        
+        # Validate text is not empty
+        if not text or text.strip() == "":
+            logger.error("Empty text provided to TTS, using fallback message")
+            text = FALLBACK_RESPONSE
+            
+        key = self.cache.key(text, voice, speed, self.model) if self.cache is not None else None
+        cached_path = self.cache.get(key) if key else None
+        if cached_path:
+            logger.info(f"Streaming cached speech from {cached_path}")
+            with open(cached_path, "rb") as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+                    
+        logger.info(f"Streaming text to speech using voice: {voice}, speed: {speed}")
+        tmp_path = f"{self.cache.path_for(key)}.{uuid.uuid4().hex}.tmp" if key else None
+        try:
+            with get_client(self.timeout, self.max_retries).audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                response_format=self.format
+            ) as response:
+                tmp_file = open(tmp_path, "wb") if tmp_path else None
+                try:
+                    for chunk in response.iter_bytes(STREAM_CHUNK_SIZE):
+                        if tmp_file:
+                            tmp_file.write(chunk)
+                        yield chunk
+                finally:
+                    if tmp_file:
+                        tmp_file.close()
+                        
+            # Only complete audio goes into the cache
+            if tmp_path:
+                self.cache.add(key, tmp_path)
+        except Exception as e:
+            logger.error(f"Error during speech streaming: {str(e)}")
+            raise
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    async def astream(self, text: str, voice: str = None, speed: float = None) -> AsyncIterator[bytes]:
+        """
+        Convert text to speech without blocking the event loop, yielding the
+        audio as it arrives from the API.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Yields:
+            Chunks of encoded audio
+        """
+        voice = voice or self.voice
+        speed = speed or self.speed
+        
+        # Validate text is not empty
+        if not text or text.strip() == "":
+            logger.error("Empty text provided to TTS, using fallback message")
+            text = FALLBACK_RESPONSE
+            
+        key = self.cache.key(text, voice, speed, self.model) if self.cache is not None else None
+        cached_path = await asyncio.to_thread(self.cache.get, key) if key else None
+        if cached_path:
+            logger.info(f"Streaming cached speech from {cached_path}")
+            with open(cached_path, "rb") as f:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+                    
+        logger.info(f"Streaming text to speech using voice: {voice}, speed: {speed}")
+        chunks = []
+        try:
+            async with get_async_client(self.timeout, self.max_retries).audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                response_format=self.format
+            ) as response:
+                async for chunk in response.iter_bytes(STREAM_CHUNK_SIZE):
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            logger.error(f"Error during speech streaming: {str(e)}")
+            raise
+            
+        # Only complete audio goes into the cache, written off the event loop
+        if key:
+            tmp_path = f"{self.cache.path_for(key)}.{uuid.uuid4().hex}.tmp"
+            try:
+                await asyncio.to_thread(_write_audio, tmp_path, b"".join(chunks))
+                await asyncio.to_thread(self.cache.add, key, tmp_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def save_request(self, text: str) -> str:
+        """
+        Save a request to synthesize text with the default voice later.
+        
+        Args:
+            text: Text to convert to speech
+            
+        Returns:
+            Key identifying the request (the cache key of its audio)
+        """
+        if self.cache is None:
+            raise ValueError("No TTS cache configured")
+        key = self.cache.key(text, self.voice, self.speed, self.model)
+        self.cache.save_request(key, text)
+        return key
+    
+    def load_request(self, key: str) -> Optional[str]:
+        """
+        Get the text of a saved synthesis request.
+        
+        Args:
+            key: Key returned by save_request
+            
+        Returns:
+            Text to convert to speech, or None if the request is unknown or expired
+        """
+        return self.cache.load_request(key) if self.cache is not None else None
+    
+    def cached_path(self, text: str, voice: str = None, speed: float = None) -> Optional[str]:
+        """
+        Look up cached audio for a synthesis request.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (defaults to self.voice)
+            speed: Speech speed (defaults to self.speed)
+            
+        Returns:
+            Path to the cached audio file, or None if it isn't cached
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache.key(text, voice or self.voice, speed or self.speed, self.model))
+    
     def set_voice(self, voice: str) -> None:
         """
         Set the voice to use for TTS.
@@ -102,4 +420,10 @@ class TextToSpeech:
             raise ValueError(f"Invalid speed '{speed}'. Must be between 0.25 and 4.0")
         
         self.speed = speed
-        logger.info(f"Speed set to {speed}")
\ No newline at end of file
+        logger.info(f"Speed set to {speed}")
+
+def _write_audio(output_path: str, data: bytes) -> None:
+    """Write synthesized audio to a file, creating its directory if needed."""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(data)
\ No newline at end of file
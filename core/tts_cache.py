@@ -0,0 +1,249 @@
+"""
+TTS Cache Module
+
+This module stores synthesized speech on disk under a hash of everything that
+determines the audio (text, voice, speed, model), so repeated phrases are
+served from disk instead of being synthesized again. It also keeps the text
+of speech requests that are synthesized later, when their audio URL is
+fetched, so that URL only has to carry the cache key.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cache file names are a sha256 hex digest plus the audio extension
+CACHE_FILENAME_PATTERN = re.compile(r'^([0-9a-f]{64})\.\w+$')
+CACHE_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Subdirectory holding the text of pending speech requests
+REQUESTS_DIR = "requests"
+
+class TTSCache:
+    """Content-addressed, size-bounded cache of synthesized audio files."""
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, extension: str = "wav",
+                 request_ttl: float = 3600):
+        """
+        Initialize the TTS cache.
+        
+        Args:
+            cache_dir: Directory holding the cached audio files
+            max_bytes: Maximum total size of the cache; least recently used
+                files are deleted when it is exceeded
+            extension: File extension of the cached audio
+            request_ttl: Seconds a saved speech request is kept
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.request_ttl = request_ttl
+        self.requests_dir = os.path.join(cache_dir, REQUESTS_DIR)
+        self._last_request_prune = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        # Files that eviction must keep, e.g. pre-rendered canned phrases
+        self.pinned = set()
+        
+        os.makedirs(self.requests_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self._scan())
+        
+        logger.info(f"TTS cache initialized at {cache_dir} ({self.total_bytes / 1e6:.1f} MB used)")
+    
+    def key(self, text: str, voice: str, speed: float, model: str) -> str:
+        """
+        Compute the cache key for a synthesis request.
+        
+        Args:
+            text: Text to synthesize
+            voice: Voice name
+            speed: Speech speed
+            model: TTS model name
+            
+        Returns:
+            Hex digest identifying the audio
+        """
+        payload = json.dumps([text, voice, float(speed), model, self.extension], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def path_for(self, key: str) -> str:
+        """
+        Get the file path for a cache key.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Path of the cached audio file (which may not exist yet)
+        """
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up cached audio, marking it as recently used.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Path to the cached audio file, or None on a miss
+        """
+        path = self.path_for(key)
+        try:
+            # The modification time doubles as the LRU timestamp
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+            
+        self.hits += 1
+        return path
+    
+    def add(self, key: str, tmp_path: str) -> str:
+        """
+        Move a freshly synthesized file into the cache.
+        
+        Args:
+            key: Cache key
+            tmp_path: Path of the synthesized audio file
+            
+        Returns:
+            Path of the cached audio file
+        """
+        path = self.path_for(key)
+        size = os.path.getsize(tmp_path)
+        
+        # Atomic rename, so readers never see a partially written file
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+                
+        return path
+    
+    def save_request(self, key: str, text: str) -> None:
+        """
+        Keep the text of a speech request until it is synthesized.
+        
+        Args:
+            key: Cache key of the request
+            text: Text to synthesize
+        """
+        path = os.path.join(self.requests_dir, f"{key}.txt")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        
+        # Requests are tiny, so expired ones are only swept now and then
+        if time.monotonic() - self._last_request_prune > self.request_ttl / 10:
+            self._last_request_prune = time.monotonic()
+            self._prune_requests()
+    
+    def load_request(self, key: str) -> Optional[str]:
+        """
+        Get the text of a saved speech request.
+        
+        Args:
+            key: Cache key of the request
+            
+        Returns:
+            Text to synthesize, or None if the request is unknown or expired
+        """
+        if not CACHE_KEY_PATTERN.match(key):
+            return None
+        path = os.path.join(self.requests_dir, f"{key}.txt")
+        try:
+            if time.time() - os.path.getmtime(path) > self.request_ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def _prune_requests(self) -> None:
+        """Delete speech requests older than the request TTL."""
+        cutoff = time.time() - self.request_ttl
+        for entry in os.scandir(self.requests_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete speech request {entry.path}: {e}")
+    
+    def pin(self, path: str) -> None:
+        """
+        Protect a cached file from eviction.
+        
+        Args:
+            path: Path of the cached audio file
+        """
+        self.pinned.add(os.path.abspath(path))
+    
+    def _scan(self):
+        """
+        List the cached files.
+        
+        Returns:
+            List of (path, size, mtime) tuples
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and CACHE_FILENAME_PATTERN.match(entry.name):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits. Caller must hold the lock."""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self.total_bytes = sum(size for _, size, _ in entries)
+        
+        # Evict down to 90% of the limit so we don't rescan on every insert
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self.total_bytes <= target:
+                break
+            if os.path.abspath(path) in self.pinned:
+                continue
+            try:
+                os.remove(path)
+                self.total_bytes -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                self.total_bytes -= size
+            except Exception as e:
+                logger.warning(f"Failed to evict cached audio {path}: {e}")
+                
+        logger.info(f"TTS cache evicted down to {self.total_bytes / 1e6:.1f} MB")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with size, limit, hits, misses and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
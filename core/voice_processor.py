@@ -10,19 +10,99 @@ This module orchestrates the entire voice processing pipeline:
 
 import os
 import logging
-import uuid
-import time
-from typing import List, Dict, Any, Optional
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
 
 from core.stt import SpeechToText
 from core.tts import TextToSpeech
+from core.tts_cache import TTSCache
 from core.knowledge_base import KnowledgeBase
+from core.index_bundle import read_source
+from core.embedding_cache import EmbeddingCache
+from utils.cache_utils import LRUCache
 from core.llm import LanguageModel
-from core.context_manager import ContextManager
-from utils.audio_utils import validate_audio_duration
+from core.phrase_bank import PhraseBank, FALLBACK_RESPONSE, ERROR_RESPONSE, EMPTY_RESPONSE, NO_SPEECH_RESPONSE
+from core.context_manager import ContextManager, extract_user_info
+from core.response_cache import SemanticResponseCache
+from core.session_store import SessionStore, DEFAULT_SESSION_ID
+from core.session_backends import create_session_backend
+from core.speculation import TurnStore, SpeculativeTurn, transcript_similarity
+from core.recordings_janitor import RecordingsJanitor
+from core.reindex_jobs import ReindexJobs
+from core import openai_client, model_registry
+from utils.audio_utils import AudioInput
+from utils.text_utils import SentenceSplitter
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+class SentenceQueue:
+    """Sentences of a streamed response, each with the pending synthesis of its audio."""
+    
+    def __init__(self, synthesize: Callable[[str], Any]):
+        """
+        Initialize the sentence queue.
+        
+        Args:
+            synthesize: Starts synthesizing a sentence and returns a future or
+                task resolving to its audio path
+        """
+        self.synthesize = synthesize
+        self.splitter = SentenceSplitter(min_length=settings.SENTENCE_MIN_LENGTH)
+        self.pending = deque()
+        self.parts = []
+        self.index = 0
+    
+    def feed(self, fragment: str) -> None:
+        """
+        Add a fragment of LLM output, starting synthesis of every sentence it completes.
+        
+        Args:
+            fragment: Text fragment
+        """
+        self.parts.append(fragment)
+        for sentence in self.splitter.feed(fragment):
+            self._add(sentence)
+    
+    def _add(self, sentence: str) -> None:
+        self.pending.append((self.index, sentence, self.synthesize(sentence)))
+        self.index += 1
+    
+    def ready(self) -> Iterator[Tuple[int, str, Any]]:
+        """
+        Take the leading sentences whose audio is already done, preserving order.
+        
+        Yields:
+            (index, sentence, future) tuples
+        """
+        while self.pending and self.pending[0][2].done():
+            yield self.pending.popleft()
+    
+    def drain(self) -> Iterator[Tuple[int, str, Any]]:
+        """
+        Synthesize the text left after the stream ended and take every sentence.
+        
+        Yields:
+            (index, sentence, future) tuples, which may still be running
+        """
+        remainder = self.splitter.flush()
+        if remainder:
+            self._add(remainder)
+        while self.pending:
+            yield self.pending.popleft()
+    
+    def cancel(self) -> None:
+        """Cancel synthesis of every sentence not taken yet."""
+        for _, _, future in self.pending:
+            future.cancel()
+    
+    @property
+    def text(self) -> str:
+        """Full response text fed so far."""
+        return "".join(self.parts).strip()
+
 class VoiceProcessor:
     """Main class for voice processing pipeline."""
     
@@ -32,44 +112,160 @@ class VoiceProcessor:
         
         # Initialize components
         self.stt = SpeechToText()
-        self.tts = TextToSpeech()
-        self.knowledge_base = KnowledgeBase()
+        self.tts_cache = TTSCache(
+            settings.TTS_CACHE_DIR,
+            max_bytes=settings.TTS_CACHE_MAX_BYTES,
+            extension=settings.TTS_FORMAT,
+            request_ttl=settings.SPEECH_URL_MAX_AGE
+        )
+        self.tts = TextToSpeech(cache=self.tts_cache)
+        self.phrase_bank = PhraseBank(self.tts, voices=settings.PHRASE_BANK_VOICES or None)
+        self.embedding_cache = EmbeddingCache(
+            model_registry.embedding_model_id(),
+            maxsize=settings.EMBEDDING_CACHE_SIZE,
+            path=settings.EMBEDDING_CACHE_PATH or None
+        )
+        self.result_cache = LRUCache(maxsize=settings.RESULT_CACHE_SIZE)
+        self.knowledge_base = KnowledgeBase(
+            embedding_cache=self.embedding_cache,
+            result_cache=self.result_cache
+        )
         self.llm = LanguageModel()
-        self.context_manager = ContextManager()
+        self.response_cache = SemanticResponseCache(
+            threshold=settings.RESPONSE_CACHE_THRESHOLD,
+            maxsize=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL
+        )
+        self.sessions = SessionStore(
+            max_sessions=settings.MAX_SESSIONS,
+            ttl=settings.SESSION_TTL,
+            max_history=settings.MAX_HISTORY,
+            backend=create_session_backend(
+                settings.SESSION_BACKEND,
+                db_path=settings.SESSION_DB_PATH,
+                redis_url=settings.SESSION_REDIS_URL,
+                ttl=settings.SESSION_TTL
+            ),
+            flush_interval=settings.SESSION_FLUSH_INTERVAL,
+            batch_size=settings.SESSION_BATCH_SIZE,
+            version_check_interval=settings.SESSION_VERSION_CHECK_INTERVAL
+        )
+        
+        # Worker pool for synthesizing sentences while the LLM is still streaming
+        self.tts_executor = ThreadPoolExecutor(
+            max_workers=settings.STREAM_TTS_WORKERS,
+            thread_name_prefix="stream-tts"
+        )
         
-        # Set maximum audio duration (in seconds)
-        self.max_audio_duration = 30  # 30 seconds as specified
+        # Turns uploaded in segments, with retrieval run on their partial transcripts
+        self.turns = TurnStore(settings.TURNS_DIR, ttl=settings.TURN_TTL, max_bytes=settings.MAX_TURN_BYTES)
+        self.speculation_executor = ThreadPoolExecutor(
+            max_workers=settings.SPECULATION_WORKERS,
+            thread_name_prefix="speculate"
+        )
+        self.speculation_hits = 0
+        self.speculation_misses = 0
+        self._speculation_lock = threading.Lock()
+        
+        # Keep leftover uploads and abandoned turns from filling the disk
+        self.recordings_janitor = RecordingsJanitor(
+            settings.RECORDINGS_DIR,
+            max_bytes=settings.RECORDINGS_MAX_BYTES,
+            max_age=settings.RECORDINGS_MAX_AGE,
+            max_files=settings.RECORDINGS_MAX_FILES,
+            min_age=settings.RECORDINGS_MIN_AGE,
+            interval=settings.RECORDINGS_CLEANUP_INTERVAL,
+            tts_cache=self.tts_cache
+        )
+        self.recordings_janitor.start()
+        
+        # Knowledge base uploads are re-indexed in the background
+        self.reindex_jobs = ReindexJobs(
+            self.update_knowledge_base,
+            settings.INDEX_JOBS_DIR,
+            keep=settings.INDEX_JOBS_KEEP
+        )
         
         logger.info("Voice Processor initialized successfully")
     
-    def speech_to_text(self, audio_path: str) -> str:
+    def get_context_manager(self, session_id: str = DEFAULT_SESSION_ID) -> ContextManager:
+        """
+        Get the conversation context for a session.
+        
+        Args:
+            session_id: Caller session identifier
+        
+        Returns:
+            The session's context manager
+        """
+        return self.sessions.get(session_id)
+    
+    def record_exchange(self, query: str, response: str, session_id: str = DEFAULT_SESSION_ID) -> None:
+        """
+        Add an exchange to a session's conversation context and persist it.
+        
+        Args:
+            query: User query text
+            response: Response text
+            session_id: Caller session identifier
+        """
+        self.get_context_manager(session_id).add_exchange(query, response)
+        self.sessions.commit(session_id)
+    
+    def quick_response(self, text_input: str, session_id: str = DEFAULT_SESSION_ID) -> Optional[str]:
+        """
+        Answer queries that don't need the knowledge base or the LLM.
+        
+        Args:
+            text_input: Transcribed user query
+            session_id: Caller session identifier
+            
+        Returns:
+            Response text, or None if the query should go through the LLM
+        """
+        if not text_input or text_input.strip() == "":
+            return NO_SPEECH_RESPONSE
+            
+        lowered = text_input.lower()
+        if "what is my name" in lowered or "what's my name" in lowered or "who am i" in lowered:
+            # Direct response for name-related queries
+            user_info = self.get_context_manager(session_id).get_user_info()
+            if user_info and "name" in user_info:
+                text_response = f"Your name is {user_info['name']}. How can I help you today?"
+                self.record_exchange(text_input, text_response, session_id)
+                return text_response
+        return None
+    
+    def speech_to_text(self, audio: AudioInput, filename: Optional[str] = None) -> str:
         """
         Convert speech to text.
         
         Args:
-            audio_path: Path to the audio file
+            audio: Path to the audio file, or its encoded bytes
+            filename: Name of the file the audio bytes came from
             
         Returns:
             Transcribed text
         """
-        logger.info(f"Converting speech to text from {audio_path}")
+        logger.info("Converting speech to text")
         
         # Validate audio file length
         # Implementation in audio_utils to check duration
         
         try:
-            transcribed_text = self.stt.transcribe(audio_path)
+            transcribed_text = self.stt.transcribe(audio, filename=filename)
             return transcribed_text
         except Exception as e:
             logger.error(f"Error in speech-to-text conversion: {e}")
             raise
     
-    def retrieve_context(self, query: str) -> List[Dict[str, Any]]:
+    def retrieve_context(self, query: str, session_id: str = DEFAULT_SESSION_ID) -> List[Dict[str, Any]]:
         """
         Retrieve relevant context from knowledge base.
         
         Args:
             query: User query text
+            session_id: Caller session identifier
             
         Returns:
             List of relevant context chunks
@@ -78,12 +274,12 @@ class VoiceProcessor:
         
         try:
             # Get conversation history from context manager
-            conversation_history = self.context_manager.get_history()
+            conversation_history = self.get_context_manager(session_id).get_history()
             
             # Retrieve relevant information from knowledge base
             context_chunks = self.knowledge_base.search(
                 query, 
-                n_results=5,
+                n_results=settings.TOP_K_RESULTS,
                 conversation_history=conversation_history
             )
             
@@ -92,13 +288,128 @@ class VoiceProcessor:
             logger.error(f"Error retrieving context: {e}")
             raise
     
-    def generate_response(self, query: str, context: List[Dict[str, Any]]) -> str:
+    def add_audio_segment(self, session_id: str, turn_id: str, data: bytes,
+                          extension: str = ".webm") -> int:
+        """
+        Add a segment of a turn that is still being recorded.
+        
+        The audio received so far is transcribed and searched in the
+        background, so the final answer can reuse the retrieved context.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            data: Encoded audio bytes of the segment
+            extension: Audio file extension, e.g. '.webm'
+            
+        Returns:
+            Number of segments received for the turn
+        """
+        turn = self.turns.append(session_id, turn_id, data, extension)
+        
+        # One speculation per turn at a time; the next segment picks up what it missed
+        with turn.lock:
+            if turn.future is None or turn.future.done():
+                turn.future = self.speculation_executor.submit(self._speculate, turn, session_id)
+            return turn.segments
+    
+    def _speculate(self, turn: SpeculativeTurn, session_id: str) -> None:
+        """
+        Transcribe a turn's audio so far and retrieve context for it.
+        
+        Args:
+            turn: Turn being recorded
+            session_id: Caller session identifier
+        """
+        try:
+            transcript = self.stt.transcribe(turn.snapshot(), filename=os.path.basename(turn.audio_path))
+            if transcript and transcript.strip():
+                context = self.retrieve_context(transcript, session_id)
+                turn.speculation = {"transcript": transcript, "context": context}
+                logger.info(f"Speculative retrieval done for partial transcript: {transcript[:50]}...")
+        except ValueError as e:
+            # The audio so far already fails validation (e.g. it is too long),
+            # so reject the rest of the turn without waiting for it
+            turn.error = str(e)
+        except Exception as e:
+            # Speculation is only an optimization; the final turn retrieves again
+            logger.warning(f"Speculative retrieval failed: {e}")
+    
+    def finish_turn(self, session_id: str, turn_id: str, data: Optional[bytes] = None,
+                    extension: str = ".webm") -> Tuple[str, Optional[SpeculativeTurn]]:
+        """
+        Complete a turn uploaded in segments.
+        
+        Args:
+            session_id: Caller session identifier
+            turn_id: Client-chosen turn identifier
+            data: Optional last audio segment
+            extension: Audio file extension, e.g. '.webm'
+            
+        Returns:
+            (path to the turn's complete audio, the turn if this worker tracked it)
+        """
+        try:
+            if data:
+                self.turns.append(session_id, turn_id, data, extension)
+            
+            turn = self.turns.pop(session_id, turn_id)
+            if turn is not None and turn.error:
+                raise ValueError(turn.error)
+        except ValueError:
+            # Rejected turns are not transcribed, so drop their audio right away
+            self.turns.discard(session_id, turn_id, extension)
+            raise
+            
+        if turn is not None:
+            # The final transcription supersedes any speculation that hasn't started
+            if turn.future is not None:
+                turn.future.cancel()
+            return turn.audio_path, turn
+            
+        # Earlier segments may have been handled by another worker
+        audio_path = self.turns.audio_path(session_id, turn_id, extension)
+        if not os.path.exists(audio_path):
+            raise ValueError(f"Unknown turn '{turn_id}'")
+        return audio_path, None
+    
+    def retrieve_context_for_turn(self, query: str, session_id: str = DEFAULT_SESSION_ID,
+                                  turn: Optional[SpeculativeTurn] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve context for a final transcript, reusing the speculative search
+        unless the final transcript diverges materially from the partial one.
+        
+        Args:
+            query: Final transcript
+            session_id: Caller session identifier
+            turn: The finished turn, if this worker tracked it
+            
+        Returns:
+            List of relevant context chunks
+        """
+        speculation = turn.speculation if turn is not None else None
+        if speculation is not None:
+            similarity = transcript_similarity(speculation["transcript"], query)
+            if similarity >= settings.SPECULATION_THRESHOLD:
+                with self._speculation_lock:
+                    self.speculation_hits += 1
+                logger.info(f"Reusing speculative retrieval (transcript similarity {similarity:.2f})")
+                return speculation["context"]
+                
+        if turn is not None:
+            with self._speculation_lock:
+                self.speculation_misses += 1
+        return self.retrieve_context(query, session_id)
+    
+    def generate_response(self, query: str, context: List[Dict[str, Any]],
+                          session_id: str = DEFAULT_SESSION_ID) -> str:
         """
         Generate response using LLM.
         
         Args:
             query: User query text
             context: Retrieved context chunks
+            session_id: Caller session identifier
             
         Returns:
             Generated response text
@@ -106,32 +417,203 @@ class VoiceProcessor:
         logger.info("Generating response with LLM")
         
         try:
-            # Get conversation history
-            conversation_history = self.context_manager.get_history()
+            prepared = self.prepare_response(query, context, session_id)
             
-            # Get user information
-            user_info = self.context_manager.get_user_info()
+            if prepared["cached"] is not None:
+                response = prepared["cached"]
+            else:
+                # Generate response
+                response = self.llm.generate_response(
+                    query=query,
+                    context=context,
+                    conversation_history=prepared["conversation_history"],
+                    user_info=prepared["user_info"]
+                )
+                
+            self.finish_response(query, response, prepared, session_id)
             
-            # Generate response
-            response = self.llm.generate_response(
+            return response
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise
+    
+    def stream_response(self, query: str, context: List[Dict[str, Any]],
+                        session_id: str = DEFAULT_SESSION_ID) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a response and synthesize it sentence by sentence.
+        
+        The LLM reply is consumed as a token stream and cut at sentence
+        boundaries; each sentence is handed to TTS as soon as it is complete,
+        so audio for the first sentence is ready while later ones are still
+        being generated.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            session_id: Caller session identifier
+        
+        Yields:
+            Event dictionaries: one {"type": "sentence", "index", "text", "audio_path"}
+            per sentence in order, then {"type": "done", "text"} with the full response
+        """
+        logger.info("Generating streamed response with LLM")
+        
+        prepared = self.prepare_response(query, context, session_id)
+        
+        # A cached answer is emitted as a single sentence with its existing audio
+        if prepared["cached"] is not None:
+            response = prepared["cached"]
+            yield {"type": "sentence", "index": 0, "text": response, "audio_path": self.text_to_speech(response)}
+            
+            self.finish_response(query, response, prepared, session_id)
+            
+            yield {"type": "done", "text": response}
+            return
+            
+        sentences = SentenceQueue(lambda sentence: self.tts_executor.submit(self.text_to_speech, sentence))
+        
+        try:
+            for fragment in self.llm.generate_response_stream(
                 query=query,
                 context=context,
-                conversation_history=conversation_history,
-                user_info=user_info
-            )
+                conversation_history=prepared["conversation_history"],
+                user_info=prepared["user_info"]
+            ):
+                sentences.feed(fragment)
+                
+                # Emit sentences whose audio is already ready, preserving order
+                for item in sentences.ready():
+                    yield self._sentence_event(*item)
             
-            # Update conversation context
-            self.context_manager.add_exchange(query, response)
+            # Synthesize whatever is left after the stream ends
+            for item in sentences.drain():
+                yield self._sentence_event(*item)
             
-            return response
+            # Only a stream that ended normally is a complete answer
+            response = sentences.text
+            self.finish_response(query, response, prepared, session_id)
+            
+            yield {"type": "done", "text": response}
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
+            logger.error(f"Error generating streamed response: {e}")
             raise
+        finally:
+            # Don't synthesize audio nobody will fetch if the client went away
+            sentences.cancel()
+    
+    def prepare_response(self, query: str, context: List[Dict[str, Any]],
+                         session_id: str = DEFAULT_SESSION_ID) -> Dict[str, Any]:
+        """
+        Gather what generating an answer needs and look for a cached answer.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            session_id: Caller session identifier
+            
+        Returns:
+            Dictionary with the session's conversation_history and user_info,
+            the cached answer text or None, and the response cache key
+        """
+        context_manager = self.get_context_manager(session_id)
+        user_info = context_manager.get_user_info()
+        
+        # Reuse the answer to a near-identical question asked with the same context
+        cached, cache_key = self.lookup_response(query, context, user_info)
+        
+        return {
+            "conversation_history": context_manager.get_history(),
+            "user_info": user_info,
+            "cached": cached["response"] if cached is not None else None,
+            "cache_key": cache_key
+        }
     
-    def reset_context(self):
-        """Reset the conversation context."""
-        logger.info("Resetting conversation context")
-        self.context_manager.reset()
+    def finish_response(self, query: str, response: str, prepared: Dict[str, Any],
+                        session_id: str = DEFAULT_SESSION_ID) -> None:
+        """
+        Cache a complete answer and add the exchange to the conversation.
+        
+        Must only be called once the answer has been generated in full.
+        
+        Args:
+            query: User query text
+            response: Complete response text
+            prepared: Result of prepare_response for the query
+            session_id: Caller session identifier
+        """
+        cache_key = prepared["cache_key"]
+        if prepared["cached"] is None and cache_key and response not in (ERROR_RESPONSE, EMPTY_RESPONSE):
+            self.response_cache.store(*cache_key, response)
+            
+        # Update conversation context
+        self.record_exchange(query, response, session_id)
+    
+    def lookup_response(self, query: str, context: List[Dict[str, Any]],
+                        user_info: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[tuple]]:
+        """
+        Look up a cached answer to a query.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            user_info: The session's user information
+            
+        Returns:
+            (cached entry or None, cache key for storing a new answer or None)
+        """
+        cache_key = self._response_cache_key(query, context, user_info)
+        cached = self.response_cache.lookup(*cache_key) if cache_key else None
+        return cached, cache_key
+    
+    def _response_cache_key(self, query: str, context: List[Dict[str, Any]],
+                            user_info: Dict[str, Any]) -> Optional[Tuple[Any, Tuple[int, ...], str]]:
+        """
+        Build the response cache lookup arguments for a query.
+        
+        Args:
+            query: User query text
+            context: Retrieved context chunks
+            user_info: The session's user information
+            
+        Returns:
+            (query embedding, chunk ids, knowledge base version), or None if the
+            answer may be personal and must not be shared between callers
+        """
+        if user_info or extract_user_info(query):
+            return None
+            
+        chunk_ids = tuple(item["index"] for item in context)
+        return self.knowledge_base.encode_query(query), chunk_ids, self.knowledge_base.version
+    
+    def _sentence_event(self, index: int, sentence: str, future) -> Dict[str, Any]:
+        """
+        Build a sentence event once its audio has been synthesized.
+        
+        Args:
+            index: Position of the sentence in the response
+            sentence: Sentence text
+            future: Future resolving to the sentence's audio path
+        
+        Returns:
+            Sentence event dictionary
+        """
+        return {
+            "type": "sentence",
+            "index": index,
+            "text": sentence,
+            "audio_path": future.result()
+        }
+    
+    def reset_context(self, session_id: str = DEFAULT_SESSION_ID):
+        """
+        Reset the conversation context.
+        
+        Args:
+            session_id: Caller session identifier
+        """
+        logger.info(f"Resetting conversation context for session {session_id}")
+        self.get_context_manager(session_id).reset()
+        self.sessions.commit(session_id)
 
     def text_to_speech(self, text: str) -> str:
         """
@@ -146,51 +628,134 @@ class VoiceProcessor:
         logger.info("Converting text to speech")
         
         try:
-            # Validate text is not empty
-            if not text or text.strip() == "":
-                logger.warning("Empty text received for TTS, using fallback message")
-                text = "I'm sorry, I couldn't generate a proper response. Please try asking again."
-            
-            # Generate a unique filename
-            filename = f"{uuid.uuid4()}.wav"
-            output_path = os.path.join('data', 'recordings', filename)
-            
-            # Make sure directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # Convert text to speech
-            self.tts.synthesize(text, output_path)
+            text, existing_audio = self.prepare_speech(text)
+            if existing_audio:
+                return existing_audio
+                
+            # Convert text to speech, reusing audio for text we've synthesized before
+            output_path = self.tts.synthesize_cached(text)
+            self.response_cache.attach_audio(text, output_path)
             
             return output_path
         except Exception as e:
             logger.error(f"Error in text-to-speech conversion: {e}")
             raise
-        logger.info("Converting text to speech")
+    
+    def prepare_speech(self, text: str) -> Tuple[str, Optional[str]]:
+        """
+        Get the text to speak for a response and any audio it already has.
         
-        try:
-            # Generate a unique filename
-            filename = f"{uuid.uuid4()}.wav"
-            output_path = os.path.join('data', 'recordings', filename)
+        Args:
+            text: Text to convert to speech
             
-            # Make sure directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        Returns:
+            (text to synthesize, path to existing audio of it or None)
+        """
+        # Validate text is not empty
+        if not text or text.strip() == "":
+            logger.warning("Empty text received for TTS, using fallback message")
+            text = FALLBACK_RESPONSE
             
-            # Convert text to speech
-            self.tts.synthesize(text, output_path)
+        # Reuse audio of canned phrases and cached answers
+        return text, self._existing_audio(text)
+    
+    def find_audio(self, text: str) -> Optional[str]:
+        """
+        Find already synthesized audio for a text without calling the TTS API.
+        
+        Args:
+            text: Text spoken in the audio
             
-            return output_path
-        except Exception as e:
-            logger.error(f"Error in text-to-speech conversion: {e}")
-            raise
+        Returns:
+            Path to the audio file, or None if it has to be synthesized
+        """
+        return self._existing_audio(text) or self.tts.cached_path(text)
     
-    def reinitialize_knowledge_base(self):
-        """Reinitialize the knowledge base after file upload."""
-        logger.info("Reinitializing knowledge base")
+    def _existing_audio(self, text: str) -> Optional[str]:
+        """
+        Find audio of a canned phrase or a cached answer.
+        
+        Args:
+            text: Text spoken in the audio
+            
+        Returns:
+            Path to the audio file, or None
+        """
+        # Canned phrases are pre-rendered at startup
+        phrase_audio = self.phrase_bank.get(text)
+        if phrase_audio:
+            return phrase_audio
+            
+        # Answers served from the response cache usually have audio already
+        cached_audio = self.response_cache.audio_for(text)
+        if cached_audio:
+            logger.info(f"Reusing cached audio {cached_audio}")
+            return cached_audio
+            
+        return None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get runtime statistics for the pipeline's caches and stores.
+        
+        Returns:
+            Dictionary of statistics per component
+        """
+        return {
+            "sessions": self.sessions.get_stats(),
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "result_cache": self.result_cache.get_stats(),
+            "response_cache": self.response_cache.get_stats(),
+            "tts_cache": self.tts_cache.get_stats(),
+            "recordings": self.recordings_janitor.get_stats(),
+            "openai_pool": openai_client.get_pool_stats(),
+            "stt": self.stt.get_stats(),
+            "models": model_registry.get_stats(),
+            "speculation": self._speculation_stats(),
+            "knowledge_base_version": self.knowledge_base.version,
+            "reindex_jobs": self.reindex_jobs.get_stats()
+        }
+    
+    def _speculation_stats(self) -> Dict[str, int]:
+        """Get the speculative retrieval counters."""
+        with self._speculation_lock:
+            return {
+                "turns_in_progress": len(self.turns),
+                "hits": self.speculation_hits,
+                "misses": self.speculation_misses
+            }
+    
+    def update_knowledge_base(self, text: str) -> Dict[str, Any]:
+        """
+        Replace the knowledge base text, re-embedding only the chunks that changed.
+        
+        Args:
+            text: New knowledge base text
+            
+        Returns:
+            Dictionary with chunk counts and the time taken
+        """
+        logger.info("Updating knowledge base")
         
         try:
-            # Recreate knowledge base
-            self.knowledge_base = KnowledgeBase()
-            logger.info("Knowledge base reinitialized successfully")
+            # The embedding model and unchanged vectors are kept; the live index is swapped at the end
+            stats = self.knowledge_base.update(text)
+            
+            # Cached results are keyed by version, so swapping the index is
+            # enough to stop serving old results; clearing just frees the memory
+            self.result_cache.clear()
+            self.response_cache.clear()
+            logger.info("Knowledge base updated successfully")
+            return stats
         except Exception as e:
-            logger.error(f"Error reinitializing knowledge base: {e}")
-            raise
\ No newline at end of file
+            logger.error(f"Error updating knowledge base: {e}")
+            raise
+    
+    def reinitialize_knowledge_base(self) -> Dict[str, Any]:
+        """
+        Re-index the knowledge base file after it was changed on disk.
+        
+        Returns:
+            Dictionary with chunk counts and the time taken
+        """
+        return self.update_knowledge_base(read_source(self.knowledge_base.kb_path))
\ No newline at end of file
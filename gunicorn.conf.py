@@ -0,0 +1,21 @@
+"""
+Gunicorn Configuration
+
+Gunicorn reads this file from the working directory. With GUNICORN_PRELOAD
+enabled the app, including the embedding model, is loaded once in the master
+process and the workers share that memory copy-on-write, so more workers fit
+on one machine. Connection pools, background threads and models that can't
+cross a fork are recreated in each worker.
+"""
+
+import gc
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+def when_ready(server):
+    """Freeze the objects loaded by the master before the workers are forked."""
+    if preload_app:
+        # The garbage collector would otherwise touch every object and unshare its page
+        gc.freeze()
+        server.log.info("Preloaded app objects frozen for copy-on-write sharing")
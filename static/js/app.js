@@ -53,13 +53,29 @@ document.addEventListener('DOMContentLoaded', () => {
     let audioChunks = [];
     let isRecording = false;
     let stream;
+    let turnId = null;
+    let segmentUpload = Promise.resolve(true);
     
+    // Recordings are uploaded in segments of this length while the user speaks
+    const SEGMENT_INTERVAL_MS = 1000;
+    
+    // Voice session websocket (only served by the async server); null when unavailable
+    let voiceSocket = null;
+    let socketTurn = false;
+    let pendingAudio = null;
+    let partialMessage = null;
+    let audioQueue = [];
+    let isPlaying = false;
+
     // Event Listeners
     recordButton.addEventListener('click', startRecording);
     stopButton.addEventListener('click', stopRecording);
     resetButton.addEventListener('click', resetConversation);
     uploadButton.addEventListener('click', uploadKnowledgeBase);
     
+    // Use a persistent voice session when the server supports it
+    connectVoiceSocket();
+
     // Upload knowledge base file
     function uploadKnowledgeBase() {
         // Check if file is selected
@@ -90,10 +106,9 @@ document.addEventListener('DOMContentLoaded', () => {
         })
         .then(response => response.json())
         .then(data => {
-            if (data.status === 'success') {
-                uploadStatus.innerHTML = `<span class="text-success">File "${data.filename}" uploaded successfully!</span>`;
-                // Add system message
-                showMessage('Knowledge base updated. You can now ask questions about the new content.', 'system');
+            if (data.status === 'accepted') {
+                uploadStatus.innerHTML = `<span class="text-info">File "${data.filename}" uploaded, indexing...</span>`;
+                return waitForIndexing(data.status_url, data.filename);
             } else {
                 uploadStatus.innerHTML = `<span class="text-danger">Error: ${data.error}</span>`;
             }
@@ -104,6 +119,27 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
     
+    // Poll a knowledge base re-index job until it finishes
+    async function waitForIndexing(statusUrl, filename) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+            
+            if (job.status === 'done') {
+                uploadStatus.innerHTML = `<span class="text-success">File "${filename}" uploaded successfully!</span>`;
+                // Add system message
+                showMessage('Knowledge base updated. You can now ask questions about the new content.', 'system');
+                return;
+            }
+            if (job.status === 'failed' || !response.ok) {
+                uploadStatus.innerHTML = `<span class="text-danger">Error: ${job.error}</span>`;
+                return;
+            }
+        }
+    }
+    
     // Check for microphone permissions
     async function checkMicrophonePermission() {
         try {
@@ -131,9 +167,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         
         try {
-            // Reset audio chunks
+            // Reset audio chunks and start a new segmented upload
             audioChunks = [];
+            turnId = newTurnId();
+            segmentUpload = Promise.resolve(true);
             
+            // Speaking over a response interrupts it (the server cancels it on 'start')
+            socketTurn = voiceSocket !== null && voiceSocket.readyState === WebSocket.OPEN;
+            stopPlayback();
+
             // Get media stream
             stream = await navigator.mediaDevices.getUserMedia({ audio: true });
             
@@ -144,9 +186,22 @@ document.addEventListener('DOMContentLoaded', () => {
             mediaRecorder.ondataavailable = (event) => {
                 if (event.data.size > 0) {
                     audioChunks.push(event.data);
+                    
+                    if (socketTurn) {
+                        if (voiceSocket) {
+                            voiceSocket.send(event.data);
+                        }
+                        return;
+                    }
+
+                    // Upload segments in order; after a failure, stop and fall back to a single upload
+                    const chunk = event.data;
+                    segmentUpload = segmentUpload.then(ok => ok && uploadSegment(chunk, false)
+                        .then(response => response.ok)
+                        .catch(() => false));
                 }
             };
-            
+
             mediaRecorder.onstart = () => {
                 // Update UI
                 recordButton.classList.add('d-none');
@@ -178,9 +233,12 @@ document.addEventListener('DOMContentLoaded', () => {
                 await processRecording();
             };
             
-            // Start recording
-            mediaRecorder.start();
-            
+            // Start recording, emitting a chunk every segment interval
+            if (socketTurn) {
+                voiceSocket.send(JSON.stringify({ type: 'start', format: recordingExtension() }));
+            }
+            mediaRecorder.start(SEGMENT_INTERVAL_MS);
+
         } catch (err) {
             console.error('Error starting recording:', err);
             showMessage('Error starting recording: ' + err.message, 'system');
@@ -194,21 +252,72 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    // Create an identifier for a recording uploaded in segments
+    function newTurnId() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+    
+    // File extension matching the recorder's container format
+    function recordingExtension() {
+        const mimeType = (mediaRecorder && mediaRecorder.mimeType) || '';
+        if (mimeType.includes('ogg')) return '.ogg';
+        if (mimeType.includes('mp4')) return '.m4a';
+        return '.webm';
+    }
+    
+    // Upload one segment of the current recording, or finish it
+    function uploadSegment(chunk, final) {
+        const formData = new FormData();
+        formData.append('turn_id', turnId);
+        if (chunk) {
+            formData.append('audio', chunk, 'segment' + recordingExtension());
+        }
+        if (final) {
+            formData.append('final', 'true');
+        }
+        
+        return fetch('/process_audio_segment', {
+            method: 'POST',
+            body: formData
+        });
+    }
+    
     // Process the recording
     async function processRecording() {
+        // Over the websocket the answer arrives as messages
+        if (socketTurn) {
+            if (voiceSocket) {
+                voiceSocket.send(JSON.stringify({ type: 'end' }));
+                return;
+            }
+            // The connection dropped mid-turn, so upload the whole recording instead
+            segmentUpload = Promise.resolve(false);
+        }
+
         try {
-            // Create blob from audio chunks
-            const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
-            
-            // Create form data
-            const formData = new FormData();
-            formData.append('audio', audioBlob, 'recording.wav');
-            
-            // Send to backend
-            const response = await fetch('/process_audio', {
-                method: 'POST',
-                body: formData
-            });
+            let response;
+
+            // Segments are already on the server, so only the end of the turn is sent
+            const segmentsUploaded = await segmentUpload;
+            if (segmentsUploaded) {
+                response = await uploadSegment(null, true);
+            } else {
+                // Create blob from audio chunks, labelled with the recorder's actual format
+                const audioBlob = new Blob(audioChunks, { type: mediaRecorder.mimeType || 'audio/webm' });
+                
+                // Create form data
+                const formData = new FormData();
+                formData.append('audio', audioBlob, 'recording' + recordingExtension());
+                
+                // Send to backend
+                response = await fetch('/process_audio', {
+                    method: 'POST',
+                    body: formData
+                });
+            }
             
             if (!response.ok) {
                 throw new Error(`Server error: ${response.status}`);
@@ -254,6 +363,115 @@ document.addEventListener('DOMContentLoaded', () => {
         };
     }
     
+    // Open the voice session websocket
+    function connectVoiceSocket() {
+        if (!window.WebSocket) {
+            return;
+        }
+        
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${window.location.host}/ws`);
+        socket.binaryType = 'blob';
+        
+        socket.onopen = () => {
+            voiceSocket = socket;
+        };
+        
+        // Fall back to HTTP uploads if the server has no websocket endpoint or the connection drops
+        socket.onclose = () => {
+            voiceSocket = null;
+        };
+        
+        socket.onmessage = handleSocketMessage;
+    }
+    
+    // Handle a message from the voice session
+    function handleSocketMessage(event) {
+        // Binary messages carry the audio announced by the preceding 'audio' message
+        if (event.data instanceof Blob) {
+            if (pendingAudio) {
+                const audioBlob = new Blob([event.data], { type: 'audio/' + pendingAudio.format });
+                queueAudio(URL.createObjectURL(audioBlob));
+                pendingAudio = null;
+            }
+            return;
+        }
+        
+        const message = JSON.parse(event.data);
+        switch (message.type) {
+            case 'transcript':
+                showMessage(message.text, 'user');
+                partialMessage = null;
+                break;
+            case 'text':
+                // Show the response as it is generated
+                if (!partialMessage) {
+                    partialMessage = showMessage('', 'system');
+                }
+                partialMessage.textContent += message.text;
+                break;
+            case 'audio':
+                pendingAudio = message;
+                break;
+            case 'done':
+                if (partialMessage) {
+                    partialMessage.textContent = message.text;
+                } else {
+                    showMessage(message.text, 'system');
+                }
+                partialMessage = null;
+                break;
+            case 'error':
+                showMessage('Error processing your request: ' + message.error, 'system');
+                statusText.textContent = 'Ready';
+                break;
+        }
+    }
+    
+    // Queue a sentence of the response for playback
+    function queueAudio(audioUrl) {
+        audioQueue.push(audioUrl);
+        if (!isPlaying) {
+            playNextAudio();
+        }
+    }
+    
+    // Play queued sentences one after another
+    function playNextAudio() {
+        const audioUrl = audioQueue.shift();
+        if (!audioUrl) {
+            isPlaying = false;
+            statusText.textContent = 'Ready to listen';
+            return;
+        }
+        
+        isPlaying = true;
+        statusText.textContent = 'Playing response...';
+        audioPlayer.src = audioUrl;
+        audioPlayerContainer.classList.remove('d-none');
+        
+        audioPlayer.onended = () => {
+            URL.revokeObjectURL(audioUrl);
+            playNextAudio();
+        };
+        
+        audioPlayer.onerror = () => {
+            console.error('Error playing audio response');
+            playNextAudio();
+        };
+        
+        audioPlayer.play();
+    }
+    
+    // Stop playing the current response
+    function stopPlayback() {
+        audioQueue.forEach(audioUrl => URL.revokeObjectURL(audioUrl));
+        audioQueue = [];
+        pendingAudio = null;
+        isPlaying = false;
+        audioPlayer.pause();
+    }
+    
     // Show message in conversation
     function showMessage(text, type) {
         // Create message elements
@@ -283,8 +501,10 @@ document.addEventListener('DOMContentLoaded', () => {
         
         // Scroll to bottom
         conversationContainer.scrollTop = conversationContainer.scrollHeight;
+        
+        return paragraph;
     }
-    
+
     // Reset conversation
     async function resetConversation() {
         try {
@@ -0,0 +1,12 @@
+"""
+Test configuration
+
+Puts the repository root on the import path and provides the environment
+the core modules expect at import time.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
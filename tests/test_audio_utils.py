@@ -0,0 +1,111 @@
+"""
+Tests for reading audio durations from container headers, finding speech and
+the in-memory preprocessing pipeline.
+"""
+
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from utils.audio_utils import (probe_duration, get_audio_duration, detect_speech, VoiceActivity,
+                               AudioPipeline, Normalize)
+
+def _encode(seconds: float, format: str, subtype: str = None, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(int(seconds * sample_rate), dtype="float32"), sample_rate, format=format, subtype=subtype)
+    return buffer.getvalue()
+
+def _tone(seconds: float, level: float, sample_rate: int = 16000) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (level * np.sin(2 * np.pi * 220 * t)).astype("float32")
+
+def _mp3_frames() -> bytes:
+    return _encode(1.0, "MP3", "MPEG_LAYER_III")
+
+def _flac_with_embedded_mp3() -> bytes:
+    """A valid FLAC file with MP3 frames in an APPLICATION metadata block."""
+    flac = _encode(3.0, "FLAC")
+    streaminfo_end = 4 + 4 + 34
+    last = flac[4] & 0x80
+    payload = b"test" + _mp3_frames()
+    block = bytes([2 | last]) + len(payload).to_bytes(3, "big") + payload
+    return flac[:4] + bytes([flac[4] & 0x7F]) + flac[5:streaminfo_end] + block + flac[streaminfo_end:]
+
+def _mp4_with_mp3_payload() -> bytes:
+    """An ftyp box followed by an mdat box holding MP3 frames."""
+    ftyp = b"ftypM4A " + (0x200).to_bytes(4, "big") + b"M4A isomiso2"
+    mdat = _mp3_frames()
+    return (len(ftyp) + 4).to_bytes(4, "big") + ftyp + (len(mdat) + 8).to_bytes(4, "big") + b"mdat" + mdat
+
+def test_probe_reads_known_containers():
+    assert probe_duration(_encode(3.0, "WAV")) == 3.0
+    assert probe_duration(_encode(3.0, "OGG", "VORBIS")) == 3.0
+    assert abs(probe_duration(_mp3_frames()) - 1.0) < 0.1
+
+def test_probe_rejects_flac():
+    data = _flac_with_embedded_mp3()
+    assert sf.info(io.BytesIO(data)).duration == 3.0
+    assert probe_duration(data) is None
+    assert probe_duration(_encode(3.0, "FLAC")) is None
+
+def test_probe_rejects_mp4():
+    assert probe_duration(_mp4_with_mp3_payload()) is None
+
+def test_unrecognized_containers_are_decoded():
+    assert get_audio_duration(_flac_with_embedded_mp3()) == 3.0
+
+def test_probe_handles_truncated_ogg():
+    data = _encode(3.0, "OGG", "VORBIS")
+    for length in (4, 20, 27, 28, 60):
+        assert probe_duration(data[:length]) is None
+
+def test_speech_span_is_found_between_silences():
+    rng = np.random.default_rng(0)
+    y = np.concatenate([np.zeros(16000), _tone(1.0, 0.5), np.zeros(16000)]).astype("float32")
+    y += rng.normal(0, 0.001, len(y)).astype("float32")
+    
+    start, end = detect_speech(y, 16000, padding=0.2)
+    
+    assert abs(start - 16000 * 0.8) < 16000 * 0.05
+    assert abs(end - 16000 * 2.2) < 16000 * 0.05
+
+def test_silence_noise_and_clicks_are_not_speech():
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 0.05, 48000).astype("float32")
+    click = np.concatenate([np.zeros(16000), _tone(0.05, 0.5), np.zeros(16000)]).astype("float32")
+    
+    assert detect_speech(np.zeros(48000, dtype="float32"), 16000) is None
+    assert detect_speech(noise, 16000) is None
+    assert detect_speech(click, 16000) is None
+    assert VoiceActivity()(click, 16000) is None
+
+def test_pipeline_decodes_once_at_the_target_rate():
+    data = _encode(1.0, "WAV", sample_rate=44100)
+    seen = []
+    
+    def record(y, sample_rate):
+        seen.append((len(y), sample_rate))
+        return y, sample_rate
+    record.name = "record"
+    timings = {}
+    
+    encoded = AudioPipeline([record, Normalize(0.5)], sample_rate=16000).encode(data, "wav", timings)
+    
+    y, sample_rate = sf.read(io.BytesIO(encoded), dtype="float32")
+    assert seen == [(16000, 16000)]
+    assert sample_rate == 16000
+    assert set(timings) == {"decode", "record", "normalize", "encode"}
+
+def test_pipeline_normalizes_speech_and_drops_silence(tmp_path):
+    speech = np.concatenate([np.zeros(8000), _tone(1.0, 0.1), np.zeros(8000)]).astype("float32")
+    pipeline = AudioPipeline([VoiceActivity(), Normalize(0.9)], sample_rate=16000)
+    
+    y, _ = pipeline.apply(speech, 16000)
+    
+    assert abs(np.max(np.abs(y)) - 0.9) < 1e-3
+    assert len(y) < len(speech)
+    assert pipeline.apply(np.zeros(16000, dtype="float32"), 16000) is None
+    with pytest.raises(ValueError):
+        pipeline.save(_encode(1.0, "WAV"), str(tmp_path / "silent.wav"))
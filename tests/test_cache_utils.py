@@ -0,0 +1,25 @@
+"""
+Tests for the LRU cache used for search results.
+"""
+
+from utils.cache_utils import LRUCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.put("plans", 1)
+    cache.put("prices", 2)
+    
+    cache.get("plans")
+    cache.put("support", 3)
+    
+    assert "plans" in cache
+    assert "prices" not in cache
+    assert len(cache) == 2
+
+def test_hits_and_misses_are_counted():
+    cache = LRUCache(maxsize=2)
+    cache.put("plans", 1)
+    
+    assert cache.get("plans") == 1
+    assert cache.get("prices", "missing") == "missing"
+    assert cache.get_stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "hit_rate": 0.5}
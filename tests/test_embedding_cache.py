@@ -0,0 +1,65 @@
+"""
+Tests for caching and persisting query embeddings.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from core.embedding_cache import EmbeddingCache, normalize_query
+
+class _Model:
+    """Embedding model counting the texts it encodes."""
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.full((len(texts), 4), len(self.encoded), dtype='float32')
+
+def test_normalized_queries_share_an_embedding():
+    cache = EmbeddingCache("test-model")
+    model = _Model()
+    
+    first = cache.get_or_encode(model, "What plans are there?")
+    second = cache.get_or_encode(model, "  what plans are THERE ")
+    
+    assert model.encoded == [normalize_query("What plans are there?")]
+    assert np.array_equal(first, second)
+
+def test_embeddings_are_saved_in_the_background(tmp_path):
+    path = str(tmp_path / "embeddings.npz")
+    cache = EmbeddingCache("test-model", path=path, save_every=2, save_interval=60)
+    model = _Model()
+    
+    cache.get_or_encode(model, "first question")
+    cache.get_or_encode(model, "second question")
+    deadline = time.monotonic() + 2
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    assert len(EmbeddingCache("test-model", path=path)) == 2
+    cache.close()
+
+def test_unsaved_embeddings_are_written_on_close(tmp_path):
+    path = str(tmp_path / "embeddings.npz")
+    cache = EmbeddingCache("test-model", path=path, save_every=100, save_interval=60)
+    cache.get_or_encode(_Model(), "first question")
+    
+    cache.close()
+    
+    reloaded = EmbeddingCache("test-model", path=path)
+    assert "first question" in reloaded
+    assert EmbeddingCache("other-model", path=path).items() == []
+
+def test_failed_save_is_retried(tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    cache = EmbeddingCache("test-model", path=str(blocker / "embeddings.npz"), save_interval=60)
+    cache.get_or_encode(_Model(), "first question")
+    
+    cache.save()
+    
+    assert cache._unsaved == 1
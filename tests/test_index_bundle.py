@@ -0,0 +1,59 @@
+"""
+Tests for incrementally re-indexing a knowledge base bundle.
+"""
+
+import numpy as np
+
+from core.index_bundle import IndexBundle, embedding_fingerprint
+
+CHUNKER = {"min_size": 10, "max_size": 200, "overlap_lines": 0}
+FINGERPRINT = embedding_fingerprint("test-model", 8)
+
+PLANS = "Plans\nThe Pro plan includes 2 TB of storage."
+SUPPORT = "Support\nSupport is available by email."
+REFUNDS = "Refunds\nRefunds are issued within 30 days."
+
+class _Model:
+    """Embedding model recording the texts it is asked to encode."""
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 8), dtype='float32')
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % 8] = 1.0
+        return vectors
+
+def _text(*sections):
+    return "\n\n".join(sections) + "\n"
+
+def test_update_embeds_only_new_chunks(tmp_path):
+    model = _Model()
+    bundle = IndexBundle.build(str(tmp_path / "v1"), _text(PLANS, SUPPORT), model, CHUNKER, FINGERPRINT)
+    model.encoded.clear()
+    
+    updated, added, removed = bundle.update(_text(PLANS, SUPPORT, REFUNDS), model, path=str(tmp_path / "v2"))
+    
+    assert model.encoded == [REFUNDS]
+    assert added.tolist() == [2]
+    assert len(removed) == 0
+    assert updated.ids[:2].tolist() == bundle.ids.tolist()
+    assert updated.ids[2] not in bundle.ids
+    np.testing.assert_array_equal(updated.vectors[:2], bundle.vectors)
+    assert updated.index.ntotal == 3
+
+def test_update_reports_removed_and_edited_chunks(tmp_path):
+    model = _Model()
+    bundle = IndexBundle.build(str(tmp_path / "v1"), _text(PLANS, SUPPORT, REFUNDS), model, CHUNKER, FINGERPRINT)
+    edited = "Support\nSupport is available by phone."
+    
+    updated, added, removed = bundle.update(_text(PLANS, edited), model, path=str(tmp_path / "v2"))
+    
+    assert list(updated.chunks) == [PLANS, edited]
+    assert added.tolist() == [1]
+    assert sorted(removed.tolist()) == bundle.ids[1:].tolist()
+    assert updated.ids[0] == bundle.ids[0]
+    assert updated.ids[1] not in bundle.ids
+    assert updated.index.ntotal == 2
@@ -0,0 +1,137 @@
+"""
+Tests for loading and searching the knowledge base index bundle.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import core.knowledge_base
+from core.knowledge_base import KnowledgeBase
+from core.embedding_cache import EmbeddingCache
+from core.index_bundle import INDEX_FILE
+from utils.cache_utils import LRUCache
+
+KB_LINES = [
+    "Fort Wise is a cloud storage service.",
+    "",
+    "The Pro plan includes 2 TB of storage and priority support.",
+    "",
+    "Support is available by email around the clock.",
+]
+
+class _Model:
+    """Embedding model returning fixed vectors derived from the text."""
+    
+    def get_sentence_embedding_dimension(self):
+        return 8
+    
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), 8), dtype='float32')
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % 8] = 1.0
+        return vectors
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(core.knowledge_base, "get_embedding_model", lambda *args: _Model())
+    monkeypatch.setattr(core.knowledge_base, "embedding_model_id", lambda: "test-model")
+
+def _knowledge_base(tmp_path, kb_path):
+    return KnowledgeBase(index_dir=str(tmp_path / "index"), kb_path=str(kb_path),
+                         embedding_cache=EmbeddingCache("test-model"), result_cache=LRUCache(maxsize=8))
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_bundle_is_reused_on_restart(tmp_path, newline):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_bytes(newline.join(KB_LINES).encode('utf-8'))
+    
+    first = _knowledge_base(tmp_path, kb_path)
+    second = _knowledge_base(tmp_path, kb_path)
+    
+    assert second._live.bundle.path == first._live.bundle.path
+    assert not second.refresh()
+
+def test_repeated_query_is_served_from_the_result_cache(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    knowledge_base = _knowledge_base(tmp_path, kb_path)
+    
+    first = knowledge_base.search("What does the Pro plan include?", n_results=2)
+    second = knowledge_base.search("what does the pro plan include", n_results=2)
+    
+    assert second == first
+    assert knowledge_base.result_cache.get_stats()["hits"] == 1
+
+def test_follow_up_query_is_not_cached(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    knowledge_base = _knowledge_base(tmp_path, kb_path)
+    history = [{"query": "What plans are there?", "response": "Basic and Pro."}]
+    
+    knowledge_base.search("How much is it?", n_results=2, conversation_history=history)
+    
+    assert len(knowledge_base.result_cache) == 0
+
+def test_workers_starting_together_build_the_bundle_once(tmp_path, monkeypatch):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    builds = []
+    create_bundle = KnowledgeBase._create_bundle
+    
+    def counting_create_bundle(self):
+        builds.append(self)
+        return create_bundle(self)
+    monkeypatch.setattr(KnowledgeBase, "_create_bundle", counting_create_bundle)
+    
+    workers = [threading.Thread(target=_knowledge_base, args=(tmp_path, kb_path)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        
+    assert len(builds) == 1
+
+def test_corrupt_index_file_is_rebuilt(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    first = _knowledge_base(tmp_path, kb_path)
+    with open(os.path.join(first.bundle.path, INDEX_FILE), 'r+b') as index_file:
+        index_file.seek(-4, os.SEEK_END)
+        index_file.write(b"\xff\xff\xff\xff")
+        
+    second = _knowledge_base(tmp_path, kb_path)
+    
+    assert second.bundle.path != first.bundle.path
+    assert second.index.ntotal == len(second.chunks)
+
+def test_search_loads_a_published_bundle_in_the_background(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    first = _knowledge_base(tmp_path, kb_path)
+    second = _knowledge_base(tmp_path, kb_path)
+    second.refresh_interval = second._next_refresh = 0
+    
+    first.update("\n".join(KB_LINES + ["", "Refunds are issued within 30 days."]))
+    old_version = second.version
+    second.search("How do refunds work?")
+    
+    assert second.version == old_version
+    second._refresher.join(timeout=5)
+    assert second.version == first.version
+
+def test_update_publishes_a_new_version(tmp_path):
+    kb_path = tmp_path / "kb.txt"
+    kb_path.write_text("\n".join(KB_LINES))
+    knowledge_base = _knowledge_base(tmp_path, kb_path)
+    old_version = knowledge_base.version
+    text = "\n".join(KB_LINES + ["", "Refunds are issued within 30 days."])
+    
+    stats = knowledge_base.update(text)
+    
+    assert stats["version"] == knowledge_base.version != old_version
+    assert stats["chunks"] == stats["embedded"] + stats["reused"]
+    assert kb_path.read_text() == text
+    assert _knowledge_base(tmp_path, kb_path).version == knowledge_base.version
@@ -0,0 +1,72 @@
+"""
+Tests for streamed and whole LLM responses giving the same answer.
+"""
+
+import types
+import asyncio
+
+import pytest
+
+import core.llm
+from core.llm import LanguageModel
+
+USER_INFO = {"name": "Ada"}
+
+class _Chunk:
+    """Streamed chat completion chunk carrying one delta."""
+    
+    def __init__(self, content):
+        self.choices = [types.SimpleNamespace(delta=types.SimpleNamespace(content=content))]
+
+class _ReplyClient:
+    """Chat client replying with fixed fragments, streamed or whole."""
+    
+    def __init__(self, fragments):
+        self.fragments = fragments
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+    
+    def create(self, stream=False, **kwargs):
+        if stream:
+            return iter([_Chunk(fragment) for fragment in self.fragments])
+        message = types.SimpleNamespace(content="".join(self.fragments))
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+class _AsyncReplyClient(_ReplyClient):
+    """Async chat client replying with fixed fragments, streamed or whole."""
+    
+    async def create(self, stream=False, **kwargs):
+        if not stream:
+            return super().create(**kwargs)
+        
+        async def chunks():
+            for fragment in self.fragments:
+                yield _Chunk(fragment)
+        return chunks()
+
+@pytest.mark.parametrize("fragments", [
+    ["I'm not sure, ", "but I can help with your plan."],
+    ["You told me ", "you are A", "da. ", "How can I help?"],
+])
+def test_streamed_answer_matches_whole_answer(monkeypatch, fragments):
+    monkeypatch.setattr(core.llm, "get_client", lambda *args: _ReplyClient(fragments))
+    monkeypatch.setattr(core.llm, "get_async_client", lambda *args: _AsyncReplyClient(fragments))
+    llm = LanguageModel()
+    query = "What's my name?"
+    
+    whole = llm.generate_response(query, [], user_info=USER_INFO)
+    streamed = "".join(llm.generate_response_stream(query, [], user_info=USER_INFO))
+    
+    async def consume():
+        return "".join([fragment async for fragment in llm.agenerate_response_stream(query, [], user_info=USER_INFO)])
+        
+    assert "Ada" in whole
+    assert streamed == whole
+    assert asyncio.run(consume()) == whole
+
+def test_stream_without_name_query_is_not_held_back(monkeypatch):
+    fragments = ["Fort Wise offers ", "three plans."]
+    monkeypatch.setattr(core.llm, "get_client", lambda *args: _ReplyClient(fragments))
+    
+    streamed = list(LanguageModel().generate_response_stream("What are the plans?", [], user_info=USER_INFO))
+    
+    assert streamed == fragments
@@ -0,0 +1,57 @@
+"""
+Tests for loading shared models once per process.
+"""
+
+import pytest
+
+from config import settings
+from core import model_registry
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setattr(settings, "EMBEDDING_THREADS", 0)
+
+def test_model_is_loaded_once():
+    loads = []
+    
+    def loader():
+        loads.append(1)
+        return object()
+        
+    first = model_registry.get_model("embedding", "test-model", loader)
+    
+    assert model_registry.get_model("embedding", "test-model", loader) is first
+    assert model_registry.get_model("embedding", "test-model", loader, options={"backend": "int8"}) is not first
+    assert len(loads) == 2
+    assert set(model_registry.get_stats()["models"]) == {"embedding:test-model", "embedding:test-model:int8"}
+
+def test_failed_load_is_retried():
+    def failing_loader():
+        raise RuntimeError("download failed")
+        
+    with pytest.raises(RuntimeError):
+        model_registry.get_model("stt", "test-model", failing_loader)
+        
+    assert model_registry.get_model("stt", "test-model", lambda: "model") == "model"
+
+def test_forked_worker_keeps_only_fork_safe_models():
+    shared = model_registry.get_model("embedding", "test-model", object)
+    model_registry.get_model("stt", "test-model", object, fork_safe=False)
+    
+    model_registry._after_fork()
+    
+    assert model_registry.get_model("embedding", "test-model", object) is shared
+    assert set(model_registry.get_stats()["models"]) == {"embedding:test-model"}
+
+def test_invalid_embedding_backend_is_rejected():
+    with pytest.raises(ValueError):
+        model_registry.get_embedding_model("test-model", backend="gpu")
+
+@pytest.mark.parametrize("backend, model_id", [
+    ("torch", "test-model"),
+    ("int8", "test-model:int8"),
+    ("onnx", "test-model:onnx"),
+])
+def test_embedding_model_id_names_the_backend(backend, model_id):
+    assert model_registry.embedding_model_id("test-model", backend) == model_id
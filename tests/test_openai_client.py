@@ -0,0 +1,46 @@
+"""
+Tests for the shared, pooled OpenAI clients.
+"""
+
+import httpx
+import pytest
+
+from core import openai_client
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(openai_client, "_client", None)
+    monkeypatch.setattr(openai_client, "_async_client", None)
+    monkeypatch.setattr(openai_client, "_client_pid", None)
+
+def test_callers_share_one_connection_pool():
+    client = openai_client.get_client()
+    tuned = openai_client.get_client(timeout=5, max_retries=0)
+    
+    assert openai_client.get_client() is client
+    assert tuned is not client
+    assert tuned._client is client._client
+    assert tuned.max_retries == 0
+    assert openai_client.get_async_client(timeout=5)._client is openai_client.get_async_client()._client
+
+def test_clients_are_recreated_after_a_fork(monkeypatch):
+    client = openai_client.get_client()
+    monkeypatch.setattr(openai_client, "_client_pid", -1)
+    
+    assert openai_client.get_client() is not client
+
+def test_pool_metrics_count_requests_and_new_connections():
+    metrics = openai_client.PoolMetrics()
+    for status in (200, 200, 429):
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        metrics.on_request(request)
+        metrics.on_response(httpx.Response(status, request=request))
+    metrics.trace("connection.connect_tcp.complete", {})
+    metrics.trace("connection.start_tls.complete", {})
+    
+    stats = metrics.get_stats()
+    
+    assert stats["requests"] == 3
+    assert stats["error_responses"] == 1
+    assert stats["tcp_connects"] == 1 and stats["tls_handshakes"] == 1
+    assert stats["connection_reuse"] == round(2 / 3, 4)
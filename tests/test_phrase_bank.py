@@ -0,0 +1,52 @@
+"""
+Tests for serving pre-rendered canned phrase audio.
+"""
+
+import pytest
+
+from config import settings
+from core.tts import TextToSpeech
+from core.tts_cache import TTSCache
+from core.phrase_bank import PhraseBank, ERROR_RESPONSE
+
+@pytest.fixture
+def make_tts(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    rendered = []
+    
+    def synthesize(self, text, output_path, voice=None, speed=None):
+        rendered.append(text)
+        with open(output_path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+        return output_path
+    monkeypatch.setattr(TextToSpeech, "synthesize", synthesize)
+    
+    def make():
+        return TextToSpeech(cache=TTSCache(str(tmp_path / "tts"), extension=settings.TTS_FORMAT))
+    make.rendered = rendered
+    return make
+
+def test_prerendered_phrases_are_pinned(make_tts):
+    tts = make_tts()
+    bank = PhraseBank(tts)
+    
+    assert bank.prerender() == len(make_tts.rendered)
+    path = bank.get(ERROR_RESPONSE)
+    assert path in tts.cache.pinned
+
+def test_phrases_rendered_by_another_process_are_picked_up(make_tts):
+    PhraseBank(make_tts()).prerender()
+    rendered = len(make_tts.rendered)
+    tts = make_tts()
+    
+    path = PhraseBank(tts).get(ERROR_RESPONSE)
+    
+    assert path is not None
+    assert path in tts.cache.pinned
+    assert len(make_tts.rendered) == rendered
+
+def test_missing_or_uncanned_phrases_are_not_served(make_tts):
+    bank = PhraseBank(make_tts())
+    
+    assert bank.get(ERROR_RESPONSE) is None
+    assert bank.get("Fort Wise offers three plans.") is None
@@ -0,0 +1,48 @@
+"""
+Tests for the recordings retention limits.
+"""
+
+import os
+import time
+
+from core.recordings_janitor import RecordingsJanitor
+from core.tts_cache import TTSCache
+
+def _recording(directory, name, size, age):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_expired_recordings_are_deleted(tmp_path):
+    janitor = RecordingsJanitor(str(tmp_path), max_age=3600, min_age=60)
+    old = _recording(tmp_path, "old.webm", 10, 7200)
+    new = _recording(tmp_path, "new.webm", 10, 600)
+    
+    assert janitor.run() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+def test_oldest_recordings_go_first_but_recent_ones_stay(tmp_path):
+    janitor = RecordingsJanitor(str(tmp_path), max_bytes=150, max_files=10, min_age=60)
+    oldest = _recording(tmp_path, "oldest.webm", 100, 900)
+    older = _recording(tmp_path, "older.webm", 100, 600)
+    recent = _recording(tmp_path, "recent.webm", 100, 10)
+    
+    assert janitor.run() == 2
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    # Still over the limit, but it may belong to a turn in progress
+    assert os.path.exists(recent)
+    assert janitor.get_stats()["bytes"] == 100
+
+def test_tts_cache_and_pinned_files_are_left_alone(tmp_path):
+    cache = TTSCache(str(tmp_path / "tts"), extension="mp3")
+    cached = _recording(cache.cache_dir, "a" * 64 + ".mp3", 10, 7200)
+    pinned = _recording(tmp_path, "phrase.mp3", 10, 7200)
+    cache.pin(pinned)
+    janitor = RecordingsJanitor(str(tmp_path), max_age=3600, min_age=60, tts_cache=cache)
+    
+    assert janitor.run() == 0
+    assert os.path.exists(cached) and os.path.exists(pinned)
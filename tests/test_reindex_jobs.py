@@ -0,0 +1,60 @@
+"""
+Tests for background re-index jobs and old bundle versions.
+"""
+
+import os
+
+import pytest
+
+from core.reindex_jobs import ReindexJobs
+from core.index_bundle import VERSIONS_DIR, prune_versions, write_pointer
+
+def _finish(jobs):
+    # Jobs run one at a time, so an empty task waits for all earlier ones
+    jobs.executor.submit(lambda: None).result(timeout=5)
+
+def test_job_status_is_visible_to_other_workers(tmp_path):
+    jobs = ReindexJobs(lambda text: {"chunks": len(text.split())}, str(tmp_path))
+    
+    job = jobs.submit("one two three", filename="kb.txt")
+    _finish(jobs)
+    
+    record = ReindexJobs(lambda text: {}, str(tmp_path)).get(job["id"])
+    assert record["status"] == "done"
+    assert record["stats"] == {"chunks": 3}
+    assert jobs.get_stats() == {"pending": 0, "completed": 1, "failed": 0}
+
+def test_failed_job_records_its_error(tmp_path):
+    def reindex(text):
+        raise ValueError("empty knowledge base")
+    jobs = ReindexJobs(reindex, str(tmp_path))
+    
+    job = jobs.submit("")
+    _finish(jobs)
+    
+    assert jobs.get(job["id"])["status"] == "failed"
+    assert jobs.get(job["id"])["error"] == "empty knowledge base"
+    assert jobs.get_stats()["failed"] == 1
+
+@pytest.mark.parametrize("job_id", ["../secret", "not-a-job", "0" * 31])
+def test_unknown_job_ids_are_rejected(tmp_path, job_id):
+    assert ReindexJobs(lambda text: {}, str(tmp_path)).get(job_id) is None
+
+def test_old_job_records_are_pruned(tmp_path):
+    jobs = ReindexJobs(lambda text: {}, str(tmp_path), keep=2)
+    
+    for _ in range(4):
+        jobs.submit("text")
+    _finish(jobs)
+    
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_prune_keeps_the_current_and_newest_versions(tmp_path):
+    names = ["1-1", "2-1", "3-1", "4-1"]
+    for name in names:
+        os.makedirs(tmp_path / VERSIONS_DIR / name)
+    write_pointer(str(tmp_path), str(tmp_path / VERSIONS_DIR / "1-1"))
+    
+    prune_versions(str(tmp_path), keep=2)
+    
+    assert sorted(os.listdir(tmp_path / VERSIONS_DIR)) == ["1-1", "3-1", "4-1"]
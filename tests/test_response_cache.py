@@ -0,0 +1,47 @@
+"""
+Tests for reusing answers to near-duplicate questions.
+"""
+
+import numpy as np
+
+from core.response_cache import SemanticResponseCache
+
+CHUNKS = (3, 1)
+
+def _vector(*values):
+    return np.array(values, dtype='float32')
+
+def test_near_duplicate_question_with_same_context_hits():
+    cache = SemanticResponseCache(threshold=0.95)
+    cache.store(_vector(1, 0, 0), CHUNKS, "v1", "Basic and Pro.")
+    
+    hit = cache.lookup(_vector(10, 0.5, 0), CHUNKS, "v1")
+    
+    assert hit == {"response": "Basic and Pro.", "audio_path": None}
+
+def test_different_question_or_context_misses():
+    cache = SemanticResponseCache(threshold=0.95)
+    cache.store(_vector(1, 0, 0), CHUNKS, "v1", "Basic and Pro.")
+    
+    assert cache.lookup(_vector(0, 1, 0), CHUNKS, "v1") is None
+    assert cache.lookup(_vector(1, 0, 0), (1, 3), "v1") is None
+    assert cache.lookup(_vector(1, 0, 0), CHUNKS, "v2") is None
+    assert cache.get_stats()["misses"] == 3
+
+def test_expired_answers_are_not_reused():
+    cache = SemanticResponseCache(ttl=-1)
+    cache.store(_vector(1, 0, 0), CHUNKS, "v1", "Basic and Pro.")
+    
+    assert cache.lookup(_vector(1, 0, 0), CHUNKS, "v1") is None
+
+def test_audio_is_reused_while_the_answer_is_cached(tmp_path):
+    cache = SemanticResponseCache(maxsize=1)
+    audio_path = tmp_path / "answer.mp3"
+    audio_path.write_bytes(b"audio")
+    cache.store(_vector(1, 0, 0), CHUNKS, "v1", "Basic and Pro.")
+    
+    cache.attach_audio("Basic and Pro.", str(audio_path))
+    assert cache.audio_for("Basic and Pro.") == str(audio_path)
+    
+    cache.store(_vector(0, 1, 0), CHUNKS, "v1", "Email support.")
+    assert cache.audio_for("Basic and Pro.") is None
@@ -0,0 +1,79 @@
+"""
+Tests for sharing session contexts between workers through a session backend.
+"""
+
+import pytest
+
+from core.session_store import SessionStore
+from core.session_backends import SQLiteBackend
+
+class _CountingBackend(SQLiteBackend):
+    """SQLite backend counting the version checks it answers."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version_checks = 0
+    
+    def get_version(self, session_id):
+        self.version_checks += 1
+        return super().get_version(session_id)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+def _store(db_path, **kwargs):
+    # A long flush interval keeps the background flusher out of the way; tests flush explicitly
+    return SessionStore(backend=_CountingBackend(db_path), flush_interval=60, **kwargs)
+
+def _answer(store, session_id, query, response):
+    store.get(session_id).add_exchange(query, response)
+    store.commit(session_id)
+    store.flush()
+
+def test_session_is_shared_between_workers(db_path):
+    first, second = _store(db_path), _store(db_path)
+    
+    _answer(first, "caller", "What plans are there?", "Basic and Pro.")
+    
+    assert [exchange["query"] for exchange in second.get("caller").get_history()] == ["What plans are there?"]
+
+def test_version_is_checked_at_most_once_per_interval(db_path):
+    store = _store(db_path, version_check_interval=60)
+    _answer(store, "caller", "Hello", "Hi there.")
+    checks = store.backend.version_checks
+    
+    for _ in range(5):
+        store.get("caller")
+    
+    assert store.backend.version_checks == checks
+
+def test_updates_from_another_worker_are_seen_after_the_interval(db_path):
+    first, second = _store(db_path), _store(db_path, version_check_interval=0)
+    _answer(first, "caller", "Hello", "Hi there.")
+    second.get("caller")
+    
+    _answer(first, "caller", "What plans are there?", "Basic and Pro.")
+    
+    assert len(second.get("caller").get_history()) == 2
+
+def test_stale_write_is_rejected_and_reloaded(db_path):
+    first, second = _store(db_path), _store(db_path, version_check_interval=60)
+    _answer(first, "caller", "Hello", "Hi there.")
+    second.get("caller")
+    _answer(first, "caller", "What plans are there?", "Basic and Pro.")
+    
+    # The second worker answers from its cached copy, which is one exchange behind
+    _answer(second, "caller", "How much is Pro?", "Ten dollars a month.")
+    
+    assert second.conflicts == 1
+    history = second.get("caller").get_history()
+    assert [exchange["query"] for exchange in history] == ["Hello", "What plans are there?"]
+
+def test_expired_session_is_not_loaded(db_path):
+    first = _store(db_path)
+    _answer(first, "caller", "Hello", "Hi there.")
+    
+    second = SessionStore(backend=SQLiteBackend(db_path, ttl=-1), flush_interval=60)
+    
+    assert second.get("caller").get_history() == []
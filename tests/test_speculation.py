@@ -0,0 +1,69 @@
+"""
+Tests for reusing retrieval done on partial transcripts.
+"""
+
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.speculation import TurnStore, transcript_similarity
+from core.voice_processor import VoiceProcessor
+
+PARTIAL = "What does the Pro plan"
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = VoiceProcessor.__new__(VoiceProcessor)
+    processor.turns = TurnStore(str(tmp_path / "turns"))
+    processor.speculation_executor = ThreadPoolExecutor(max_workers=1)
+    processor.stt = types.SimpleNamespace(transcribe=lambda audio, filename=None: PARTIAL)
+    processor.retrieved = []
+    
+    def retrieve_context(query, session_id):
+        processor.retrieved.append(query)
+        return [{"chunk": f"Context for {query}"}]
+    processor.retrieve_context = retrieve_context
+    processor.speculation_hits = 0
+    processor.speculation_misses = 0
+    processor._speculation_lock = threading.Lock()
+    yield processor
+    processor.speculation_executor.shutdown()
+
+def _record_turn(processor):
+    processor.add_audio_segment("caller", "turn-1", b"audio")
+    processor.turns._turns[("caller", "turn-1")].future.result(timeout=5)
+    return processor.finish_turn("caller", "turn-1")[1]
+
+def test_transcript_similarity_compares_words():
+    assert transcript_similarity("What does the Pro plan", "what does the Pro plan include?") > 0.8
+    assert transcript_similarity("What does the Pro plan", "How do I reset my password?") < 0.3
+    assert transcript_similarity("", "Anything") == 0.0
+
+def test_matching_final_transcript_reuses_speculative_retrieval(processor):
+    turn = _record_turn(processor)
+    
+    context = processor.retrieve_context_for_turn("What does the Pro plan include?", "caller", turn)
+    
+    assert context == [{"chunk": f"Context for {PARTIAL}"}]
+    assert processor.retrieved == [PARTIAL]
+    assert processor._speculation_stats()["hits"] == 1
+
+def test_diverging_final_transcript_retrieves_again(processor):
+    turn = _record_turn(processor)
+    
+    context = processor.retrieve_context_for_turn("How do I reset my password?", "caller", turn)
+    
+    assert context == [{"chunk": "Context for How do I reset my password?"}]
+    assert processor._speculation_stats()["misses"] == 1
+
+def test_abandoned_turns_are_dropped_with_their_audio(tmp_path):
+    turns = TurnStore(str(tmp_path), ttl=-1)
+    abandoned = turns.append("caller", "turn-1", b"audio", ".webm")
+    
+    turns.append("caller", "turn-2", b"audio", ".webm")
+    
+    assert len(turns) == 1
+    assert not (tmp_path / "caller-turn-1.webm").exists()
+    assert abandoned.audio_path.endswith("caller-turn-1.webm")
@@ -0,0 +1,103 @@
+"""
+Tests for streamed responses that fail partway through.
+"""
+
+import types
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import core.llm
+from core.llm import LanguageModel
+from core.response_cache import SemanticResponseCache
+from core.session_store import SessionStore
+from core.voice_processor import VoiceProcessor
+from core.async_voice_processor import AsyncVoiceProcessor
+
+class _Chunk:
+    """Streamed chat completion chunk carrying one delta."""
+    
+    def __init__(self, content):
+        self.choices = [types.SimpleNamespace(delta=types.SimpleNamespace(content=content))]
+
+class _FailingClient:
+    """Chat client whose stream fails after its first delta."""
+    
+    def __init__(self):
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+    
+    def create(self, **kwargs):
+        def stream():
+            yield _Chunk("Fort Wise offers three plans. The Pro plan")
+            raise ConnectionError("stream interrupted")
+        return stream()
+
+class _AsyncFailingClient:
+    """Async chat client whose stream fails after its first delta."""
+    
+    def __init__(self):
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+    
+    async def create(self, **kwargs):
+        async def stream():
+            yield _Chunk("Fort Wise offers three plans. The Pro plan")
+            raise ConnectionError("stream interrupted")
+        return stream()
+
+class _KnowledgeBase:
+    """Knowledge base stand-in with a fixed query embedding."""
+    
+    version = "test"
+    
+    def encode_query(self, text):
+        return np.ones(4, dtype="float32")
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(core.llm, "get_client", lambda *args: _FailingClient())
+    monkeypatch.setattr(core.llm, "get_async_client", lambda *args: _AsyncFailingClient())
+    
+    processor = VoiceProcessor.__new__(VoiceProcessor)
+    processor.llm = LanguageModel()
+    processor.knowledge_base = _KnowledgeBase()
+    processor.response_cache = SemanticResponseCache()
+    processor.sessions = SessionStore()
+    processor.tts_executor = ThreadPoolExecutor(max_workers=1)
+    processor.text_to_speech = lambda text: "speech.mp3"
+    yield processor
+    processor.tts_executor.shutdown()
+
+def test_llm_stream_raises_after_partial_text(monkeypatch):
+    monkeypatch.setattr(core.llm, "get_client", lambda *args: _FailingClient())
+    
+    fragments = []
+    with pytest.raises(ConnectionError):
+        for fragment in LanguageModel().generate_response_stream("What are the plans?", []):
+            fragments.append(fragment)
+    
+    assert fragments == ["Fort Wise offers three plans. The Pro plan"]
+
+def test_interrupted_stream_is_not_cached_or_recorded(processor):
+    events = []
+    with pytest.raises(ConnectionError):
+        for event in processor.stream_response("What are the plans?", [], session_id="caller"):
+            events.append(event)
+    
+    assert all(event["type"] != "done" for event in events)
+    assert processor.response_cache.get_stats()["size"] == 0
+    assert processor.get_context_manager("caller").get_history() == []
+
+def test_interrupted_async_stream_is_not_cached_or_recorded(processor):
+    pipeline = AsyncVoiceProcessor(processor, max_workers=1)
+    pipeline.text_to_speech = lambda text: asyncio.sleep(0, result="speech.mp3")
+    
+    async def consume():
+        return [event async for event in pipeline.stream_response("What are the plans?", [], session_id="caller")]
+    
+    with pytest.raises(ConnectionError):
+        asyncio.run(consume())
+    
+    assert processor.response_cache.get_stats()["size"] == 0
+    assert processor.get_context_manager("caller").get_history() == []
@@ -0,0 +1,47 @@
+"""
+Tests for the on-disk cache of synthesized audio.
+"""
+
+import os
+
+from core.tts_cache import TTSCache
+
+def _add(cache, tmp_path, text, size, mtime):
+    key = cache.key(text, "ash", 1.0, "tts-1")
+    tmp_file = tmp_path / f"{key}.tmp"
+    tmp_file.write_bytes(b"x" * size)
+    path = cache.add(key, str(tmp_file))
+    os.utime(path, (mtime, mtime))
+    return key, path
+
+def test_key_covers_every_synthesis_parameter(tmp_path):
+    cache = TTSCache(str(tmp_path / "tts"), extension="mp3")
+    key = cache.key("Hello", "ash", 1.0, "tts-1")
+    
+    assert key == cache.key("Hello", "ash", 1, "tts-1")
+    assert len({key, cache.key("Hello", "nova", 1.0, "tts-1"), cache.key("Hello", "ash", 1.25, "tts-1"),
+                cache.key("Hello", "ash", 1.0, "tts-1-hd"), cache.key("Hello!", "ash", 1.0, "tts-1")}) == 5
+
+def test_least_recently_used_unpinned_files_are_evicted(tmp_path):
+    cache = TTSCache(str(tmp_path / "tts"), max_bytes=250, extension="mp3")
+    oldest_key, oldest = _add(cache, tmp_path, "oldest", 100, 1000)
+    old_key, _ = _add(cache, tmp_path, "old", 100, 2000)
+    cache.pin(oldest)
+    
+    new_key, _ = _add(cache, tmp_path, "new", 100, 3000)
+    
+    assert cache.get(oldest_key) is not None
+    assert cache.get(old_key) is None
+    assert cache.get(new_key) is not None
+    assert cache.evictions == 1
+    assert cache.total_bytes == 200
+
+def test_speech_request_round_trip(tmp_path):
+    cache = TTSCache(str(tmp_path / "tts"), extension="mp3")
+    key = cache.key("Hello", "ash", 1.0, "tts-1")
+    
+    cache.save_request(key, "Hello")
+    
+    assert cache.load_request(key) == "Hello"
+    assert cache.load_request("../" + key) is None
+    assert TTSCache(str(tmp_path / "tts"), extension="mp3", request_ttl=-1).load_request(key) is None
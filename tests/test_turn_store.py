@@ -0,0 +1,61 @@
+"""
+Tests for recordings uploaded in segments.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.speculation import TurnStore
+from core.voice_processor import VoiceProcessor
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = VoiceProcessor.__new__(VoiceProcessor)
+    processor.turns = TurnStore(str(tmp_path), max_bytes=10)
+    processor.speculation_executor = ThreadPoolExecutor(max_workers=1)
+    processor._speculate = lambda turn, session_id: None
+    yield processor
+    processor.speculation_executor.shutdown()
+
+def test_segments_are_appended_in_order(processor):
+    processor.add_audio_segment("caller", "turn-1", b"abc")
+    processor.add_audio_segment("caller", "turn-1", b"def")
+    
+    audio_path, turn = processor.finish_turn("caller", "turn-1", b"g")
+    
+    with open(audio_path, 'rb') as f:
+        assert f.read() == b"abcdefg"
+    assert turn.segments == 3
+
+def test_oversized_turn_is_rejected_and_deleted(processor):
+    processor.add_audio_segment("caller", "turn-1", b"12345678")
+    
+    with pytest.raises(ValueError):
+        processor.add_audio_segment("caller", "turn-1", b"9abc")
+    with pytest.raises(ValueError):
+        processor.finish_turn("caller", "turn-1")
+        
+    assert os.listdir(processor.turns.turns_dir) == []
+
+def test_segments_from_another_worker_count_towards_the_limit(tmp_path):
+    TurnStore(str(tmp_path), max_bytes=10).append("caller", "turn-1", b"12345678", ".webm")
+    
+    with pytest.raises(ValueError):
+        TurnStore(str(tmp_path), max_bytes=10).append("caller", "turn-1", b"9abc", ".webm")
+
+def test_turn_finished_on_another_worker_uses_the_shared_file(processor, tmp_path):
+    TurnStore(str(tmp_path)).append("caller", "turn-1", b"abc", ".webm")
+    
+    audio_path, turn = processor.finish_turn("caller", "turn-1")
+    
+    assert turn is None
+    assert audio_path == os.path.join(str(tmp_path), "caller-turn-1.webm")
+    with pytest.raises(ValueError):
+        processor.finish_turn("caller", "turn-2")
+
+@pytest.mark.parametrize("turn_id", ["../escape", "", "a" * 65, "turn 1"])
+def test_unsafe_turn_ids_are_rejected(tmp_path, turn_id):
+    with pytest.raises(ValueError):
+        TurnStore(str(tmp_path)).append("caller", turn_id, b"abc", ".webm")
@@ -0,0 +1,68 @@
+"""
+Tests for the request helpers shared by app.py and asgi.py.
+"""
+
+import pytest
+
+from config import settings
+from core.tts import TextToSpeech
+from core.tts_cache import TTSCache
+from utils import web_utils
+
+def test_secret_key_is_required_in_production(monkeypatch):
+    monkeypatch.setattr(settings, "SECRET_KEY", None)
+    monkeypatch.setattr(settings, "DEBUG", False)
+    
+    with pytest.raises(RuntimeError):
+        web_utils.load_secret_key()
+
+def test_development_secret_key_is_generated_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "SECRET_KEY", None)
+    monkeypatch.setattr(settings, "DEBUG", True)
+    monkeypatch.setattr(settings, "SECRET_KEY_FILE", str(tmp_path / "keys" / "secret_key"))
+    
+    key = web_utils.load_secret_key()
+    
+    assert len(key) == 64
+    assert web_utils.load_secret_key() == key
+    assert (tmp_path / "keys" / "secret_key").stat().st_mode & 0o077 == 0
+
+def test_configured_secret_key_is_used(monkeypatch):
+    monkeypatch.setattr(settings, "SECRET_KEY", "configured")
+    monkeypatch.setattr(settings, "DEBUG", False)
+    
+    assert web_utils.load_secret_key() == "configured"
+
+def test_issued_session_is_resumed():
+    session_id, new = web_utils.resolve_session_id({}, {})
+    token = web_utils.session_token(session_id)
+    
+    assert new
+    assert web_utils.resolve_session_id({}, {settings.SESSION_COOKIE_NAME: token}) == (session_id, False)
+    assert web_utils.resolve_session_id({settings.SESSION_HEADER: token}, {}) == (session_id, False)
+
+@pytest.mark.parametrize("token", [
+    "victim-session",
+    web_utils.session_tokens.dumps("victim-session")[:-2] + "xx",
+    web_utils.session_tokens.dumps("../not-an-id"),
+])
+def test_unissued_session_ids_start_a_new_session(token):
+    session_id, new = web_utils.resolve_session_id({settings.SESSION_HEADER: token}, {})
+    
+    assert new
+    assert session_id != "victim-session"
+
+def test_speech_url_round_trip(tmp_path):
+    tts = TextToSpeech(cache=TTSCache(str(tmp_path / "tts"), extension=settings.TTS_FORMAT))
+    url = web_utils.speech_url(tts.save_request("Fort Wise offers three plans."))
+    token = url.rsplit("/", 1)[1]
+    
+    assert "plans" not in url
+    assert tts.load_request(web_utils.speech_request_key(token)) == "Fort Wise offers three plans."
+    assert web_utils.speech_request_key(token[:-2] + "xx") is None
+
+def test_expired_speech_url_is_rejected(monkeypatch):
+    token = web_utils.speech_url("0" * 64).rsplit("/", 1)[1]
+    monkeypatch.setattr(settings, "SPEECH_URL_MAX_AGE", -1)
+    
+    assert web_utils.speech_request_key(token) is None
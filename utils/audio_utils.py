@@ -4,21 +4,34 @@ Audio Utilities Module
 This module provides utility functions for audio processing.
 """
 
-import os
+import io
+import time
+import struct
 import logging
 import librosa
+import numpy as np
 import soundfile as sf
 from pydub import AudioSegment
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union, Dict, Any, List, Callable
 
 logger = logging.getLogger(__name__)
 
-def validate_audio_duration(audio_path: str, max_duration: float) -> bool:
+# Audio given as a file path or as the encoded bytes of a file
+AudioInput = Union[str, bytes]
+
+# Encodings for audio re-encoded in memory: (soundfile format, subtype, file extension)
+AUDIO_ENCODINGS = {
+    "ogg": ("OGG", "VORBIS", ".ogg"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "wav": ("WAV", "PCM_16", ".wav")
+}
+
+def validate_audio_duration(audio: AudioInput, max_duration: float) -> bool:
     """
     Validate that audio file doesn't exceed maximum duration.
     
     Args:
-        audio_path: Path to the audio file
+        audio: Path to the audio file, or its encoded bytes
         max_duration: Maximum duration in seconds
         
     Returns:
@@ -26,7 +39,7 @@ def validate_audio_duration(audio_path: str, max_duration: float) -> bool:
     """
     try:
         # Get audio duration
-        duration = get_audio_duration(audio_path)
+        duration = get_audio_duration(audio)
         
         # Check if duration is within limit
         if duration > max_duration:
@@ -40,34 +53,575 @@ def validate_audio_duration(audio_path: str, max_duration: float) -> bool:
         # In case of error, assume it's invalid
         return False
 
-def get_audio_duration(audio_path: str) -> float:
+def get_audio_duration(audio: AudioInput) -> float:
     """
     Get the duration of an audio file.
     
+    The duration is read from the container header where possible (WAV,
+    WebM, Ogg and MP3); other audio is decoded.
+    
     Args:
-        audio_path: Path to the audio file
+        audio: Path to the audio file, or its encoded bytes
+        
+    Returns:
+        Duration in seconds
+    """
+    if isinstance(audio, bytes):
+        data = audio
+    else:
+        with open(audio, "rb") as f:
+            data = f.read()
+        
+    try:
+        duration = probe_duration(data)
+    except Exception as e:
+        logger.debug(f"Error probing audio header: {e}")
+        duration = None
+        
+    if duration is not None:
+        logger.debug(f"Audio duration (header): {duration:.2f} seconds")
+        return duration
+        
+    return decode_audio_duration(audio)
+
+def decode_audio_duration(audio: AudioInput) -> float:
+    """
+    Get the duration of an audio file by decoding it.
+    
+    Args:
+        audio: Path to the audio file, or its encoded bytes
         
     Returns:
         Duration in seconds
     """
     try:
-        # Use librosa to get duration
-        duration = librosa.get_duration(path=audio_path)
+        if isinstance(audio, bytes):
+            # libsndfile reads the frame count from the header of formats it knows
+            duration = sf.info(io.BytesIO(audio)).duration
+        else:
+            # Use librosa to get duration
+            duration = librosa.get_duration(path=audio)
         logger.debug(f"Audio duration: {duration:.2f} seconds")
         return duration
         
     except Exception as e:
-        logger.error(f"Error getting audio duration: {e}")
+        logger.debug(f"Error getting audio duration, decoding with pydub: {e}")
         # Try with pydub as a fallback
         try:
-            audio = AudioSegment.from_file(audio_path)
-            duration = len(audio) / 1000.0  # Convert milliseconds to seconds
+            audio_segment = AudioSegment.from_file(io.BytesIO(audio) if isinstance(audio, bytes) else audio)
+            duration = len(audio_segment) / 1000.0  # Convert milliseconds to seconds
             logger.debug(f"Audio duration (pydub fallback): {duration:.2f} seconds")
             return duration
         except Exception as e2:
             logger.error(f"Error getting audio duration with pydub: {e2}")
             raise
 
+def probe_duration(data: bytes) -> Optional[float]:
+    """
+    Get the duration of encoded audio from its container, without decoding it.
+    
+    Args:
+        data: Encoded audio bytes
+        
+    Returns:
+        Duration in seconds, or None if the container isn't recognized or
+        doesn't say
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return _wav_duration(data)
+    if data[:4] == b"\x1aE\xdf\xa3":
+        return _webm_duration(data)
+    if data[:4] == b"OggS":
+        return _ogg_duration(data)
+    # MP3 has no container, so only claim data that begins like an MP3 file;
+    # other formats (FLAC, MP4) can contain bytes that look like MP3 frames
+    if data[:3] == b"ID3" or _mp3_frame(data, 0):
+        return _mp3_duration(data)
+    return None
+        
+def _wav_duration(data: bytes) -> Optional[float]:
+    """Get the duration of WAV audio from its fmt and data chunk sizes."""
+    byte_rate = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        if chunk_id == b"fmt ":
+            byte_rate = int.from_bytes(data[pos + 16:pos + 20], "little")
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Recorders streaming WAV write a placeholder size
+            available = len(data) - pos - 8
+            if size in (0, 0xFFFFFFFF) or size > available:
+                size = available
+            return size / byte_rate
+        # Chunks are padded to an even size
+        pos += 8 + size + (size & 1)
+    return None
+
+# Matroska/WebM element ids
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_CLUSTER = 0x1F43B675
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_TIMESTAMP_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_CLUSTER_TIMESTAMP = 0xE7
+_EBML_SIMPLE_BLOCK = 0xA3
+_EBML_BLOCK = 0xA1
+
+# Elements whose children are read; all others are skipped over
+_EBML_CONTAINERS = {_EBML_SEGMENT, _EBML_INFO, _EBML_CLUSTER, _EBML_BLOCK_GROUP}
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool = False) -> Tuple[Optional[int], int]:
+    """
+    Read an EBML variable-length integer.
+    
+    Args:
+        data: Encoded bytes
+        pos: Offset of the integer
+        keep_marker: Keep the length marker bit, as element ids do
+        
+    Returns:
+        (value, offset after the integer); the value is None for the
+        reserved "unknown size"
+    """
+    first = data[pos]
+    length = 9 - first.bit_length()
+    if length > 8:
+        raise ValueError("Invalid EBML integer")
+    value = int.from_bytes(data[pos:pos + length], "big")
+    if not keep_marker:
+        value &= (1 << (7 * length)) - 1
+        if value == (1 << (7 * length)) - 1:
+            return None, pos + length
+    return value, pos + length
+
+def _webm_duration(data: bytes) -> Optional[float]:
+    """
+    Get the duration of WebM audio.
+    
+    The Info Duration is used when present. Browser recordings are written
+    live and have none, so the timestamp of the last block is used instead,
+    by walking the element headers and skipping over the audio frames.
+    """
+    timestamp_scale = 1000000  # Nanoseconds per timestamp unit
+    cluster_timestamp = 0
+    last_timestamp = None
+    pos = 0
+    while pos < len(data):
+        try:
+            element_id, pos_size = _read_vint(data, pos, keep_marker=True)
+            size, pos_data = _read_vint(data, pos_size)
+        except (IndexError, ValueError):
+            break
+            
+        if element_id in _EBML_CONTAINERS:
+            # Read children in place; live recordings leave the size unknown
+            pos = pos_data
+            continue
+        if size is None or pos_data + size > len(data):
+            break
+            
+        payload = data[pos_data:pos_data + size]
+        if element_id == _EBML_TIMESTAMP_SCALE:
+            timestamp_scale = int.from_bytes(payload, "big")
+        elif element_id == _EBML_DURATION and size in (4, 8):
+            duration = struct.unpack(">f" if size == 4 else ">d", payload)[0]
+            if duration > 0:
+                return duration * timestamp_scale / 1e9
+        elif element_id == _EBML_CLUSTER_TIMESTAMP:
+            cluster_timestamp = int.from_bytes(payload, "big")
+        elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK):
+            # Track number, then the timestamp relative to the cluster
+            _, offset = _read_vint(payload, 0)
+            timestamp = cluster_timestamp + int.from_bytes(payload[offset:offset + 2], "big", signed=True)
+            last_timestamp = max(timestamp, last_timestamp or 0)
+        pos = pos_data + size
+        
+    if last_timestamp is None:
+        return None
+    # The last block's own length is unknown, so this is short by one frame (~20 ms)
+    return last_timestamp * timestamp_scale / 1e9
+
+def _ogg_duration(data: bytes) -> Optional[float]:
+    """Get the duration of Ogg Opus or Vorbis audio from the last page's granule position."""
+    # The first page holds the codec identification header
+    if len(data) < 27:
+        return None
+    segments = data[26]
+    if len(data) < 27 + segments:
+        return None
+    packet = data[27 + segments:]
+    if packet[:8] == b"OpusHead":
+        # Opus granules count 48 kHz samples, including the encoder delay
+        sample_rate = 48000
+        pre_skip = int.from_bytes(packet[10:12], "little")
+    elif packet[:7] == b"\x01vorbis":
+        sample_rate = int.from_bytes(packet[12:16], "little")
+        pre_skip = 0
+    else:
+        return None
+        
+    pos = len(data)
+    while True:
+        pos = data.rfind(b"OggS", 0, pos)
+        if pos < 0:
+            return None
+        # A page header cut off by truncation is skipped
+        if pos + 27 > len(data):
+            continue
+        granule = int.from_bytes(data[pos + 6:pos + 14], "little", signed=True)
+        # -1 marks pages where no packet ends; header pages are at 0
+        if data[pos + 4] == 0 and granule > 0:
+            return max(granule - pre_skip, 0) / sample_rate
+
+# MP3 frame header tables, by MPEG version (1, 2, 2.5) and layer (1, 2, 3)
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+def _mp3_frame(data: bytes, pos: int) -> Optional[Dict[str, Any]]:
+    """
+    Parse an MP3 frame header.
+    
+    Args:
+        data: Encoded bytes
+        pos: Offset of the frame
+        
+    Returns:
+        Dictionary with the frame's version, bitrate, sample rate, samples,
+        length and mono flag, or None if there is no valid header at pos
+    """
+    if pos + 4 > len(data):
+        return None
+    header = int.from_bytes(data[pos:pos + 4], "big")
+    if header >> 21 != 0x7FF:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header >> 19) & 3)
+    layer = 4 - ((header >> 17) & 3)
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if version is None or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+        
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "length": length,
+        "mono": (header >> 6) & 3 == 3
+    }
+
+def _mp3_duration(data: bytes) -> Optional[float]:
+    """Get the duration of MP3 audio from its Xing/VBRI header, or its bitrate if it has none."""
+    pos = 0
+    end = len(data)
+    
+    # Skip ID3v2 tags at the start and an ID3v1 tag at the end
+    while data[pos:pos + 3] == b"ID3" and pos + 10 <= end:
+        size = 0
+        for byte in data[pos + 6:pos + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        pos += 10 + size + (10 if data[pos + 5] & 0x10 else 0)
+    if data[end - 128:end - 125] == b"TAG":
+        end -= 128
+        
+    # Find the first frame; a following frame confirms the sync wasn't a false match
+    limit = min(pos + 64 * 1024, end)
+    while True:
+        pos = data.find(b"\xff", pos, limit)
+        if pos < 0:
+            return None
+        frame = _mp3_frame(data, pos)
+        if frame and (pos + frame["length"] >= end or _mp3_frame(data, pos + frame["length"])):
+            break
+        pos += 1
+        
+    # VBR encoders store the frame count in the first frame
+    side_info = (17 if frame["mono"] else 32) if frame["version"] == 1 else (9 if frame["mono"] else 17)
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 1:
+            frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+            return frames * frame["samples"] / frame["sample_rate"]
+    vbri = pos + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri + 14:vbri + 18], "big")
+        return frames * frame["samples"] / frame["sample_rate"]
+        
+    # Constant bitrate
+    return (end - pos) * 8 / frame["bitrate"]
+
+def load_audio(audio: AudioInput, sample_rate: Optional[int] = 16000) -> Tuple[np.ndarray, int]:
+    """
+    Decode audio to mono samples, resampling in the same pass.
+    
+    Args:
+        audio: Path to the audio file, or its encoded bytes
+        sample_rate: Target sample rate, or None to keep the original one
+        
+    Returns:
+        (float32 samples in [-1, 1], sample rate)
+    """
+    try:
+        return librosa.load(io.BytesIO(audio) if isinstance(audio, bytes) else audio, sr=sample_rate, mono=True)
+        
+    except Exception as e:
+        # Containers libsndfile can't read (e.g. WebM) need ffmpeg
+        logger.debug(f"Error loading audio with librosa, decoding with pydub: {e}")
+        segment = AudioSegment.from_file(io.BytesIO(audio) if isinstance(audio, bytes) else audio)
+        segment = segment.set_channels(1)
+        if sample_rate:
+            segment = segment.set_frame_rate(sample_rate)
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        return samples / float(1 << (8 * segment.sample_width - 1)), segment.frame_rate
+
+def detect_speech(y: np.ndarray, sample_rate: int, top_db: float = 35.0, min_level_db: float = -50.0,
+                  noise_margin_db: float = 6.0, min_speech: float = 0.2,
+                  padding: float = 0.2) -> Optional[Tuple[int, int]]:
+    """
+    Find the span of speech in audio with an energy-based voice activity detector.
+    
+    Args:
+        y: Mono samples
+        sample_rate: Sample rate of y
+        top_db: Frames this many dB below the loudest frame count as silence
+        min_level_db: Frames quieter than this (dBFS) always count as silence
+        noise_margin_db: Frames must be this many dB above the noise floor
+            (the 10th percentile frame), so steady noise isn't taken for speech
+        min_speech: Seconds of voiced frames below which the audio has no speech
+        padding: Seconds of audio kept before and after the speech
+        
+    Returns:
+        (start, end) sample indices of the speech, or None if there is none
+    """
+    # 30 ms frames every 10 ms
+    frame_length = int(0.03 * sample_rate)
+    hop_length = int(0.01 * sample_rate)
+    if len(y) < frame_length:
+        return None
+        
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+    
+    threshold = max(db.max() - top_db, np.percentile(db, 10) + noise_margin_db, min_level_db)
+    voiced = np.flatnonzero(db > threshold)
+    if len(voiced) * hop_length < min_speech * sample_rate:
+        return None
+        
+    pad = int(padding * sample_rate)
+    start = max(voiced[0] * hop_length - pad, 0)
+    end = min(voiced[-1] * hop_length + frame_length + pad, len(y))
+    return start, end
+
+def encode_audio(y: np.ndarray, sample_rate: int, encoding: str = "ogg") -> bytes:
+    """
+    Encode samples in memory.
+    
+    Args:
+        y: Mono samples
+        sample_rate: Sample rate of y
+        encoding: One of AUDIO_ENCODINGS
+        
+    Returns:
+        Encoded audio bytes
+    """
+    audio_format, subtype, _ = AUDIO_ENCODINGS[encoding]
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sample_rate, format=audio_format, subtype=subtype)
+    return buffer.getvalue()
+
+class Resample:
+    """Pipeline stage changing the sample rate."""
+    
+    name = "resample"
+    
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+    
+    def __call__(self, y: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        if sample_rate == self.sample_rate:
+            return y, sample_rate
+        return librosa.resample(y, orig_sr=sample_rate, target_sr=self.sample_rate), self.sample_rate
+
+class Normalize:
+    """Pipeline stage scaling audio to a peak level."""
+    
+    name = "normalize"
+    
+    def __init__(self, peak: float = 1.0):
+        self.peak = peak
+    
+    def __call__(self, y: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        top = np.max(np.abs(y)) if len(y) else 0.0
+        if top == 0:
+            return y, sample_rate
+        return y * (self.peak / top), sample_rate
+
+class TrimSilence:
+    """Pipeline stage trimming leading and trailing audio quieter than a threshold."""
+    
+    name = "trim"
+    
+    def __init__(self, top_db: float = 20):
+        self.top_db = top_db
+    
+    def __call__(self, y: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        y_trimmed, _ = librosa.effects.trim(y, top_db=self.top_db)
+        return y_trimmed, sample_rate
+
+class VoiceActivity:
+    """Pipeline stage keeping only the span of speech, and dropping audio without any."""
+    
+    name = "vad"
+    
+    def __init__(self, **options):
+        """
+        Initialize the stage.
+        
+        Args:
+            **options: Keyword arguments for detect_speech
+        """
+        self.options = options
+    
+    def __call__(self, y: np.ndarray, sample_rate: int) -> Optional[Tuple[np.ndarray, int]]:
+        speech = detect_speech(y, sample_rate, **self.options)
+        if speech is None:
+            return None
+        start, end = speech
+        return y[start:end], sample_rate
+
+class AudioPipeline:
+    """Chain of in-memory audio processing stages, with a single decode and encode."""
+    
+    def __init__(self, stages: Optional[List[Callable]] = None, sample_rate: Optional[int] = None):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            stages: Callables taking and returning (samples, sample rate); a
+                stage returns None to drop the audio (e.g. no speech found)
+            sample_rate: Rate to decode at, or None to keep the original one;
+                resampling while decoding is cheaper than a separate stage
+        """
+        self.stages = stages or []
+        self.sample_rate = sample_rate
+    
+    def decode(self, audio: AudioInput, timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, int]:
+        """
+        Decode audio to mono samples at the pipeline's sample rate.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            timings: Optional dictionary receiving seconds spent per step
+            
+        Returns:
+            (samples, sample rate)
+        """
+        started = time.perf_counter()
+        y, sample_rate = load_audio(audio, self.sample_rate)
+        if timings is not None:
+            timings["decode"] = time.perf_counter() - started
+        return y, sample_rate
+    
+    def apply(self, y: np.ndarray, sample_rate: int,
+              timings: Optional[Dict[str, float]] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Run the stages over decoded audio.
+        
+        Args:
+            y: Mono samples
+            sample_rate: Sample rate of y
+            timings: Optional dictionary receiving seconds spent per stage
+            
+        Returns:
+            (samples, sample rate), or None if a stage dropped the audio
+        """
+        for stage in self.stages:
+            started = time.perf_counter()
+            result = stage(y, sample_rate)
+            if timings is not None:
+                name = getattr(stage, "name", type(stage).__name__)
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+            if result is None:
+                return None
+            y, sample_rate = result
+        return y, sample_rate
+    
+    def process(self, audio: AudioInput, timings: Optional[Dict[str, float]] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Decode audio and run the stages over it.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            timings: Optional dictionary receiving seconds spent per step
+            
+        Returns:
+            (samples, sample rate), or None if a stage dropped the audio
+        """
+        y, sample_rate = self.decode(audio, timings)
+        return self.apply(y, sample_rate, timings)
+    
+    def encode(self, audio: AudioInput, encoding: str = "wav",
+               timings: Optional[Dict[str, float]] = None) -> Optional[bytes]:
+        """
+        Decode, process and encode audio.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            encoding: One of AUDIO_ENCODINGS
+            timings: Optional dictionary receiving seconds spent per step
+            
+        Returns:
+            Encoded audio bytes, or None if a stage dropped the audio
+        """
+        result = self.process(audio, timings)
+        if result is None:
+            return None
+        started = time.perf_counter()
+        data = encode_audio(result[0], result[1], encoding)
+        if timings is not None:
+            timings["encode"] = time.perf_counter() - started
+        return data
+    
+    def save(self, audio: AudioInput, output_path: str) -> str:
+        """
+        Decode, process and write audio to a WAV file.
+        
+        Args:
+            audio: Path to the audio file, or its encoded bytes
+            output_path: Path to save the processed audio
+            
+        Returns:
+            Path to the processed audio file
+        """
+        data = self.encode(audio, "wav")
+        if data is None:
+            raise ValueError("No audio left after processing")
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return output_path
+
 def convert_audio_format(input_path: str, output_path: str, 
                          sample_rate: int = 16000) -> str:
     """
@@ -82,11 +636,7 @@ def convert_audio_format(input_path: str, output_path: str,
         Path to the converted audio file
     """
     try:
-        # Load audio file
-        y, sr = librosa.load(input_path, sr=sample_rate, mono=True)
-        
-        # Save as WAV
-        sf.write(output_path, y, sample_rate)
+        AudioPipeline(sample_rate=sample_rate).save(input_path, output_path)
         
         logger.info(f"Audio converted and saved to {output_path}")
         return output_path
@@ -99,6 +649,9 @@ def normalize_audio(audio_path: str, output_path: Optional[str] = None) -> str:
     """
     Normalize audio volume.
     
+    To combine this with other steps, use an AudioPipeline so the audio is
+    decoded and encoded only once.
+    
     Args:
         audio_path: Path to the audio file
         output_path: Path to save the normalized audio (if None, overwrite original)
@@ -110,14 +663,7 @@ def normalize_audio(audio_path: str, output_path: Optional[str] = None) -> str:
         output_path = audio_path
     
     try:
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=None)
-        
-        # Normalize
-        y_norm = librosa.util.normalize(y)
-        
-        # Save
-        sf.write(output_path, y_norm, sr)
+        AudioPipeline([Normalize()]).save(audio_path, output_path)
         
         logger.info(f"Audio normalized and saved to {output_path}")
         return output_path
@@ -131,6 +677,9 @@ def trim_silence(audio_path: str, output_path: Optional[str] = None,
     """
     Trim silence from beginning and end of audio.
     
+    To combine this with other steps, use an AudioPipeline so the audio is
+    decoded and encoded only once.
+    
     Args:
         audio_path: Path to the audio file
         output_path: Path to save the trimmed audio (if None, overwrite original)
@@ -143,14 +692,7 @@ def trim_silence(audio_path: str, output_path: Optional[str] = None,
         output_path = audio_path
     
     try:
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=None)
-        
-        # Trim silence
-        y_trimmed, trim_indices = librosa.effects.trim(y, top_db=top_db)
-        
-        # Save
-        sf.write(output_path, y_trimmed, sr)
+        AudioPipeline([TrimSilence(top_db)]).save(audio_path, output_path)
         
         logger.info(f"Silence trimmed from audio and saved to {output_path}")
         return output_path
@@ -159,33 +701,27 @@ def trim_silence(audio_path: str, output_path: Optional[str] = None,
         logger.error(f"Error trimming silence: {e}")
         raise
 
-def get_audio_properties(audio_path: str) -> dict:
+def get_audio_properties(audio: AudioInput) -> dict:
     """
     Get audio file properties.
     
     Args:
-        audio_path: Path to the audio file
+        audio: Path to the audio file, or its encoded bytes
         
     Returns:
         Dictionary with audio properties
     """
     try:
         # Load audio file
-        y, sr = librosa.load(audio_path, sr=None)
-        
-        # Get duration
-        duration = librosa.get_duration(y=y, sr=sr)
-        
-        # Get number of channels (mono/stereo)
-        channels = 1 if len(y.shape) == 1 else y.shape[0]
+        y, sr = load_audio(audio, sample_rate=None)
         
         return {
             "sample_rate": sr,
-            "duration": duration,
-            "channels": channels,
+            "duration": len(y) / sr,
+            "channels": 1,  # Decoded as mono
             "samples": len(y)
         }
         
     except Exception as e:
         logger.error(f"Error getting audio properties: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,159 @@
+"""
+Text Utilities Module
+
+This module provides utility functions for processing response text and
+splitting knowledge base documents into chunks.
+"""
+
+import re
+import logging
+from typing import List, Optional, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Sentence end: terminal punctuation, optional closing quote/bracket, then whitespace
+SENTENCE_BOUNDARY = re.compile(r'([.!?]+["\')\]]*)\s+')
+
+# Common abbreviations that end with a period but do not end a sentence
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "vs.", "etc.", "e.g.", "i.e.", "inc.", "ltd.", "no."}
+
+class SentenceSplitter:
+    """Incrementally split streamed text into complete sentences."""
+    
+    def __init__(self, min_length: int = 20):
+        """
+        Initialize the sentence splitter.
+        
+        Args:
+            min_length: Minimum sentence length in characters; shorter sentences
+                are merged with the following one to avoid tiny TTS requests
+        """
+        self.min_length = min_length
+        self.buffer = ""
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return any sentences completed by it.
+        
+        Args:
+            text: Text fragment to append
+        
+        Returns:
+            List of complete sentences (possibly empty)
+        """
+        self.buffer += text
+        sentences = []
+        start = 0
+        
+        for match in SENTENCE_BOUNDARY.finditer(self.buffer):
+            end = match.end(1)
+            candidate = self.buffer[start:end].strip()
+            
+            # Skip abbreviations and sentences that are too short to synthesize on their own
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if last_word in ABBREVIATIONS or len(candidate) < self.min_length:
+                continue
+            
+            sentences.append(candidate)
+            start = match.end()
+        
+        self.buffer = self.buffer[start:]
+        return sentences
+    
+    def flush(self) -> Optional[str]:
+        """
+        Return whatever text remains in the buffer.
+        
+        Returns:
+            Remaining text or None if the buffer is empty
+        """
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return remainder or None
+
+def split_sentences(text: str, min_length: int = 20) -> List[str]:
+    """
+    Split a complete text into sentences.
+    
+    Args:
+        text: Text to split
+        min_length: Minimum sentence length in characters
+    
+    Returns:
+        List of sentences
+    """
+    splitter = SentenceSplitter(min_length=min_length)
+    sentences = splitter.feed(text)
+    remainder = splitter.flush()
+    if remainder:
+        sentences.append(remainder)
+    return sentences
+
+class TextChunk(NamedTuple):
+    """Chunk of a document with its character offsets in the document."""
+    text: str
+    start: int
+    end: int
+
+def split_chunks(text: str, min_size: int = 300, max_size: int = 1000,
+                 overlap_lines: int = 0) -> List[TextChunk]:
+    """
+    Split a document into chunks at section headers.
+    
+    A header (a short line without ending punctuation) starts a new chunk once
+    the current one holds more than min_size characters, and chunks longer
+    than max_size are split regardless. Each chunk's text equals
+    text[chunk.start:chunk.end].
+    
+    Args:
+        text: Document text
+        min_size: Characters a chunk needs before a header may end it
+        max_size: Characters after which a chunk is split without a header
+        overlap_lines: Trailing lines of a chunk repeated at the start of the next
+        
+    Returns:
+        List of non-empty chunks in document order
+    """
+    chunks = []
+    current = []  # (line, offset) pairs
+    current_size = 0
+    
+    def emit():
+        raw = '\n'.join(line for line, _ in current)
+        stripped = raw.strip()
+        if stripped:
+            start = current[0][1] + (len(raw) - len(raw.lstrip()))
+            chunks.append(TextChunk(stripped, start, start + len(stripped)))
+    
+    def carry_over():
+        # Keep some context for overlap
+        kept = current[-overlap_lines:] if overlap_lines else []
+        return kept, sum(len(line) for line, _ in kept)
+        
+    offset = 0
+    for line in text.split('\n'):
+        # If line is a potential header (short line with no ending punctuation)
+        is_header = len(line.strip()) < 80 and not line.strip().endswith(('.', '?', '!', ',', ';', ':'))
+        
+        # If we have a large enough chunk and this is a header, start a new chunk
+        if current_size > min_size and is_header:
+            emit()
+            current, current_size = carry_over()
+            
+        current.append((line, offset))
+        current_size += len(line)
+        offset += len(line) + 1
+        
+        # If current chunk is very large, split it
+        if current_size > max_size:
+            emit()
+            current, current_size = carry_over()
+            
+    if current:
+        emit()
+        
+    # Overlap can leave a final chunk that only repeats the previous one's end
+    if len(chunks) > 1 and chunks[-1].start >= chunks[-2].start and chunks[-1].end <= chunks[-2].end:
+        chunks.pop()
+        
+    return chunks
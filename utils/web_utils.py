@@ -0,0 +1,279 @@
+"""
+Web Utilities Module
+
+This module holds the request and session handling shared by the Flask app
+(app.py) and the ASGI app (asgi.py), so both serve the same session cookies,
+upload names, audio URLs and response payloads.
+"""
+
+import os
+import re
+import json
+import uuid
+import secrets
+import logging
+from typing import Dict, Mapping, Optional, Tuple
+
+from itsdangerous import URLSafeSerializer, URLSafeTimedSerializer, BadSignature
+
+from core.tts_cache import CACHE_FILENAME_PATTERN
+from core.phrase_bank import FALLBACK_RESPONSE
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session ids we issue; anything else in a session token is rejected
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Transcript shown when a recording contains no speech
+NO_SPEECH_TRANSCRIPT = "[No speech detected]"
+
+def load_secret_key() -> str:
+    """
+    Get the key for signing URLs and session cookies.
+    
+    Production requires SECRET_KEY. In development a random key is generated
+    once and kept in SECRET_KEY_FILE, so every worker and restart signs with
+    the same key.
+    
+    Returns:
+        Secret key
+        
+    Raises:
+        RuntimeError: If SECRET_KEY is not set in production
+    """
+    if settings.SECRET_KEY:
+        return settings.SECRET_KEY
+    if not settings.DEBUG:
+        raise RuntimeError("SECRET_KEY must be set in production")
+        
+    path = settings.SECRET_KEY_FILE
+    logger.warning(f"SECRET_KEY is not set, using the development key in {path}")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            # The first worker to get here decides the key
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path) as f:
+        return f.read().strip()
+
+_signing_key = load_secret_key()
+
+# Signed tokens carrying the session id, so clients can only present ids we issued
+session_tokens = URLSafeSerializer(_signing_key, salt='session')
+
+# Signed, expiring tokens carrying the key of the speech request behind a /speech/ URL,
+# so only our own answers can be synthesized and their text stays out of URLs and logs
+speech_tokens = URLSafeTimedSerializer(_signing_key, salt='speech')
+
+def resolve_session_id(headers: Mapping[str, str], cookies: Mapping[str, str]) -> Tuple[str, bool]:
+    """
+    Identify the caller's session from the header or cookie, or start a new one.
+    
+    Only session tokens we signed are accepted; a missing, forged or unknown
+    token starts a new session.
+    
+    Args:
+        headers: Request headers
+        cookies: Request cookies
+        
+    Returns:
+        (session id, whether it was newly created)
+    """
+    token = headers.get(settings.SESSION_HEADER) or cookies.get(settings.SESSION_COOKIE_NAME)
+    session_id = None
+    if token:
+        try:
+            session_id = session_tokens.loads(token)
+        except BadSignature:
+            logger.warning("Rejected a session token with an invalid signature")
+            
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        return str(uuid.uuid4()), True
+    return session_id, False
+
+def session_token(session_id: str) -> str:
+    """
+    Get the signed token a client presents to resume a session.
+    
+    Args:
+        session_id: Session identifier
+        
+    Returns:
+        Token for the session cookie or the session header
+    """
+    return session_tokens.dumps(session_id)
+
+def set_session_cookie(response, session_id: str) -> None:
+    """
+    Hand a newly created session back to the client as a cookie.
+    
+    Args:
+        response: Flask or Quart response
+        session_id: Session identifier
+    """
+    response.set_cookie(settings.SESSION_COOKIE_NAME, session_token(session_id), httponly=True, samesite='Lax')
+
+def upload_filename(audio_file) -> str:
+    """
+    Get a safe name for an uploaded recording.
+    
+    Args:
+        audio_file: Uploaded file from the request, or None
+        
+    Returns:
+        File name whose extension tells Whisper how the audio is encoded
+    """
+    extension = os.path.splitext(audio_file.filename or '')[1].lower() if audio_file else ''
+    if extension not in settings.ALLOWED_AUDIO_FORMATS:
+        extension = '.webm'
+    return f"recording{extension}"
+
+def remove_upload(path: str) -> None:
+    """Delete a processed upload."""
+    try:
+        os.remove(path)
+    except Exception as e:
+        logger.warning(f"Failed to delete temporary audio file: {e}")
+
+def display_transcript(text_input: str) -> str:
+    """
+    Get the transcript shown to the user.
+    
+    Args:
+        text_input: Transcribed user query
+        
+    Returns:
+        The transcript, or a placeholder if there was no speech
+    """
+    if not text_input or text_input.strip() == "":
+        return NO_SPEECH_TRANSCRIPT
+    return text_input
+
+def checked_response(text_response: Optional[str]) -> str:
+    """
+    Validate a response before it is spoken.
+    
+    Args:
+        text_response: Response text
+        
+    Returns:
+        The response, or the fallback phrase if it is empty
+    """
+    if not text_response or text_response.strip() == "":
+        logger.warning("Empty response received from LLM, using fallback")
+        text_response = FALLBACK_RESPONSE
+        
+    logger.info(f"Generated response: {text_response}")
+    return text_response
+
+def answer_payload(text_input: str, text_response: str, audio_url: str) -> Dict[str, str]:
+    """
+    Build the JSON body answering an audio upload.
+    
+    Args:
+        text_input: Transcribed user query
+        text_response: Response text
+        audio_url: URL of the response audio
+        
+    Returns:
+        Dictionary with the query text, response text and audio URL
+    """
+    return {
+        'text_input': display_transcript(text_input),
+        'text_response': text_response,
+        'audio_url': audio_url
+    }
+
+def audio_url(audio_path: str) -> str:
+    """
+    Get the URL an audio file is served from.
+    
+    Args:
+        audio_path: Path to a synthesized or cached audio file
+        
+    Returns:
+        Relative /audio/ URL
+    """
+    return f"/audio/{os.path.basename(audio_path)}"
+
+def speech_url(request_key: str) -> str:
+    """
+    Get the URL of a stream synthesizing a response while it is fetched.
+    
+    Args:
+        request_key: Key of the saved speech request (see TextToSpeech.save_request)
+        
+    Returns:
+        Relative /speech/ URL, valid for SPEECH_URL_MAX_AGE seconds
+    """
+    return f"/speech/{speech_tokens.dumps(request_key)}"
+
+def speech_request_key(token: str) -> Optional[str]:
+    """
+    Get the speech request key behind a /speech/ URL.
+    
+    Args:
+        token: Signed token from the URL
+        
+    Returns:
+        Request key, or None if the token is invalid or expired
+    """
+    try:
+        return speech_tokens.loads(token, max_age=settings.SPEECH_URL_MAX_AGE)
+    except BadSignature:
+        return None
+
+def sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sentence_sse(index: int, text: str, audio_path: str) -> str:
+    """
+    Format the Server-Sent Event for one sentence of a response.
+    
+    Args:
+        index: Position of the sentence in the response
+        text: Sentence text
+        audio_path: Path to the sentence's audio file
+        
+    Returns:
+        Formatted 'sentence' event
+    """
+    return sse('sentence', {'index': index, 'text': text, 'audio_url': audio_url(audio_path)})
+
+def cached_audio_etag(filename: str) -> Optional[str]:
+    """
+    Get the ETag of a file in the TTS cache.
+    
+    Cached audio is content-addressed, so its URL never changes meaning and
+    can be served as immutable.
+    
+    Args:
+        filename: Requested audio file name
+        
+    Returns:
+        The file's content hash, or None if it isn't a cached file
+    """
+    match = CACHE_FILENAME_PATTERN.match(filename)
+    if match and os.path.exists(os.path.join(settings.TTS_CACHE_DIR, filename)):
+        return match.group(1)
+    return None
+
+def mark_immutable(response) -> None:
+    """
+    Let clients and proxies keep a cached audio response forever.
+    
+    Args:
+        response: Flask or Quart response
+    """
+    response.cache_control.public = True
+    response.cache_control.immutable = True